@@ -0,0 +1,151 @@
+"""
+End-to-end daemon throughput against the mock LLM provider.
+
+Starts daemon.py in a temp HOME, points it at bench/mock_provider.py (fake
+claude CLI by default, or the Anthropic/OpenAI HTTP wire format), then drives
+a weighted mix of /chat, /parallel, /task/create, dashboard polling and alarm
+runs at the requested concurrency. Prints p50/p95/p99 latency, throughput and
+daemon RSS as JSON.
+
+    python3 bench/daemon_throughput.py --concurrency 8 --requests 400 \\
+        --mix chat=3,poll=10,parallel=1,task=1,alarm=1 --out run.json
+    python3 bench/daemon_throughput.py ... --compare run.json   # p95 deltas vs an earlier run
+"""
+
+import argparse, itertools, json, random, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import Daemon, RssSampler, summarize
+from mock_provider import MockConfig, MockProvider, write_fake_cli
+
+POLL_PATHS = ["/status", "/tasks/board", "/usage", "/agents", "/history?agent=FORGE&limit=30", "/alarms"]
+
+
+def parse_mix(spec: str) -> list:
+    weights = []
+    for part in spec.split(","):
+        name, _, w = part.partition("=")
+        weights.append((name.strip(), int(w or 1)))
+    return weights
+
+
+def provider_setup(kind: str, mock: MockConfig, tmp: Path):
+    """Return (forge.json, env, MockProvider|None) for one provider mode."""
+    if kind == "cli":
+        bin_dir = tmp / "bin"
+        write_fake_cli(bin_dir, mock)
+        return ({"providers": {"anthropic": {"oauth_token": "mock-oauth"}}},
+                {"FORGE_BIN_PATH": f"{bin_dir}:/usr/bin:/bin", "CLAUDE_CODE_OAUTH_TOKEN": ""}, None)
+    mp = MockProvider(mock).start()
+    if kind == "anthropic":
+        return ({"providers": {"anthropic": {"api_key": "mock-key"}}},
+                {"ANTHROPIC_BASE_URL": mp.url}, mp)
+    if kind == "openai":
+        return ({"providers": {"openai": {"api_key": "mock-key"}},
+                 "models": {"primary": {"provider": "openai", "model": "gpt-mock"}}},
+                {"OPENAI_BASE_URL": mp.url + "/v1"}, mp)
+    raise SystemExit(f"unknown provider mode: {kind}")
+
+
+def run(args) -> dict:
+    mock = MockConfig(args.latency_ms, args.jitter_ms, args.token_ms, args.tokens)
+    tmp  = Path(tempfile.mkdtemp(prefix="forge-mock-"))
+    cfg, env, mp = provider_setup(args.provider, mock, tmp)
+    cfg["heartbeat"] = {"enabled": False}
+
+    with Daemon(cfg, env) as d:
+        boot_s = d.start()
+        alarm_id = d.post("/alarms", {"name": "bench", "cron": "0 3 1 1 *", "task": "bench alarm",
+                                      "enabled": True})["id"]
+        counter = itertools.count()
+
+        def op(kind: str):
+            n = next(counter)
+            if kind == "chat":
+                return d.post("/chat", {"message": f"bench message {n}"})
+            if kind == "parallel":
+                return d.post("/parallel", {"tasks": {f"BENCH{i}": f"sub-task {n}.{i}" for i in range(args.fanout)}})
+            if kind == "task":
+                return d.post("/task/create", {"title": f"bench task {n}", "steps": [f"step {n}.1", f"step {n}.2"]})
+            if kind == "poll":
+                return d.get(POLL_PATHS[n % len(POLL_PATHS)])
+            if kind == "alarm":
+                return d.post("/alarms/run", {"id": alarm_id})
+            raise ValueError(kind)
+
+        mix     = parse_mix(args.mix)
+        names   = [m[0] for m in mix]
+        weights = [m[1] for m in mix]
+        rnd     = random.Random(args.seed)
+        plan    = rnd.choices(names, weights, k=args.requests)
+        lat     = {k: [] for k in names}
+        errors  = {k: 0 for k in names}
+        lock    = threading.Lock()
+
+        def timed(kind: str):
+            t0 = time.perf_counter()
+            try:
+                res = op(kind)
+                ok = not (isinstance(res, dict) and res.get("error"))
+            except Exception:
+                ok = False
+            ms = (time.perf_counter() - t0) * 1000
+            with lock:
+                lat[kind].append(ms)
+                if not ok: errors[kind] += 1
+
+        rss = RssSampler(d.proc.pid); rss.start()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as ex:
+            list(ex.map(timed, plan))
+        wall = time.perf_counter() - t0
+        mem = rss.stop()
+
+    if mp: mp.stop()
+    all_lat = [x for v in lat.values() for x in v]
+    return {
+        "config": {k: getattr(args, k) for k in ("provider", "concurrency", "requests", "mix",
+                                                 "latency_ms", "jitter_ms", "token_ms", "tokens", "fanout")},
+        "boot_s":  round(boot_s, 3),
+        "wall_s":  round(wall, 3),
+        "overall": summarize(all_lat, wall, sum(errors.values())),
+        "by_op":   {k: summarize(v, wall, errors[k]) for k, v in lat.items() if v},
+        **mem,
+    }
+
+
+def compare(new: dict, old: dict) -> dict:
+    out = {}
+    for k, cur in {"overall": new["overall"], **new["by_op"]}.items():
+        prev = old["overall"] if k == "overall" else old.get("by_op", {}).get(k)
+        if not prev: continue
+        out[k] = {m: round(cur[m] - prev[m], 2) for m in ("p50_ms", "p95_ms", "p99_ms", "throughput")}
+    out["rss_peak_kb"] = new["rss_peak_kb"] - old.get("rss_peak_kb", 0)
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--provider", choices=("cli", "anthropic", "openai"), default="cli")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--mix", default="chat=3,poll=10,parallel=1,task=1,alarm=1")
+    ap.add_argument("--fanout", type=int, default=3, help="agents per /parallel call")
+    ap.add_argument("--latency-ms", type=float, default=150)
+    ap.add_argument("--jitter-ms", type=float, default=30)
+    ap.add_argument("--token-ms", type=float, default=2)
+    ap.add_argument("--tokens", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="write the JSON report here as well as stdout")
+    ap.add_argument("--compare", help="earlier JSON report to diff against")
+    a = ap.parse_args()
+
+    report = run(a)
+    if a.compare:
+        report["delta_vs_baseline"] = compare(report, json.loads(Path(a.compare).read_text()))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if a.out:
+        Path(a.out).write_text(text + "\n")
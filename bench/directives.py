@@ -0,0 +1,103 @@
+"""
+Directive parsing: the legacy one-regex-pass-per-directive parser vs the current
+single-pass parse_directives, on a long reply full of directives.
+
+Legacy (kept here as the reference): a `re.finditer` pass per directive kind,
+each match spliced in with `response.replace`, so every directive rescans the
+whole reply. Both parsers get the same handlers: __UPDATE_CORE__ (memory.md)
+and __SAVE__ blocks, which write real files into a throwaway HOME, or no-op
+handlers with --dry to time the scanning alone. Outputs are checked equal.
+
+    python3 bench/directives.py --kb 200 --directives 100
+    python3 bench/directives.py --kb 200 --directives 100 --dry --runs 50
+"""
+
+import argparse, importlib.util, json, os, random, re, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import DAEMON, percentile
+
+LEGACY = [  # (pattern, kind) in the order the old parser ran them
+    (r"__UPDATE_CORE__([a-zA-Z_.]+\.md)__(.+?)__END__", "core_body"),
+    (r"__SPAWN__:\s*(\{.+?\})__END__", "spawn"),
+    (r"__INSTALL_SKILL__(\{.+?\})__END__", "install"),
+    (r"__RUN__(python|bash|node)\n(.+?)__END__", "run_code"),
+    (r"__SAVE__([^\n]+)__\n(.+?)__END__", "save_body"),
+]
+
+
+def load_daemon(home: Path):
+    os.environ["HOME"] = str(home)
+    (home / "Forge").mkdir(parents=True, exist_ok=True)
+    spec = importlib.util.spec_from_file_location("forge_daemon", DAEMON)
+    mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+    mod.CORE_DIR.mkdir(parents=True, exist_ok=True)
+    return mod
+
+
+def make_reply(kb: int, n: int, seed: int = 7) -> str:
+    rnd = random.Random(seed)
+    words = "the daemon writes notes about tasks and files while the agent plans next steps".split()
+    blocks = []
+    for i in range(n):
+        body = " ".join(rnd.choice(words) for _ in range(40))
+        blocks.append(f"__UPDATE_CORE__memory.md__## Memory {i}\n{body}\n__END__" if i % 2 else
+                      f"__SAVE__bench/note_{i}.md__\n# Note {i}\n{body}\n__END__")
+    filler = max(0, kb * 1024 - sum(map(len, blocks)))
+    prose = [" ".join(rnd.choice(words) for _ in range(filler // (n + 1) // 6)) for _ in range(n + 1)]
+    text = "".join(p + "\n\n" + b + "\n\n" for p, b in zip(prose, blocks)) + prose[-1]
+    while len(text) < kb * 1024:
+        text += " " + rnd.choice(words)
+    return text
+
+
+def legacy_parse(d, response: str, cfg: dict) -> str:
+    # same regexes, same handlers, the old splice: rescan + replace per match
+    for pattern, kind in LEGACY:
+        handler = d.DIRECTIVE_HANDLERS[kind]
+        compiled = re.compile(pattern, re.DOTALL)
+        for m in compiled.finditer(response):
+            named = d.DIRECTIVE_RE.fullmatch(m.group(0))
+            result = handler(named, cfg) if named else None
+            if result is not None:
+                response = response.replace(m.group(0), result)
+    return response
+
+
+def timed(fn, runs: int) -> dict:
+    ms = []
+    for _ in range(runs):
+        t0 = time.perf_counter(); fn(); ms.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": round(percentile(ms, 50), 2), "p95_ms": round(percentile(ms, 95), 2),
+            "max_ms": round(max(ms), 2)}
+
+
+def run(args) -> dict:
+    d = load_daemon(Path(tempfile.mkdtemp(prefix="forge-directives-")))
+    if args.dry:
+        d.DIRECTIVE_HANDLERS = {k: (lambda kind: lambda m, cfg, awaited=False: f"[{kind}]")(k) for k in d.DIRECTIVE_HANDLERS}
+    reply = make_reply(args.kb, args.directives)
+    cfg = {}
+    same = legacy_parse(d, reply, cfg) == d.parse_directives(reply, cfg)
+    legacy, current = timed(lambda: legacy_parse(d, reply, cfg), args.runs), \
+                      timed(lambda: d.parse_directives(reply, cfg), args.runs)
+    plain = reply.replace("__", "  ")
+    return {"reply_kb": round(len(reply) / 1024, 1), "directives": args.directives, "runs": args.runs,
+            "handlers": "no-op" if args.dry else "real", "outputs_equal": same,
+            "legacy": legacy, "current": current,
+            "no_directives": timed(lambda: d.parse_directives(plain, cfg), args.runs),
+            "speedup_p50": round(legacy["p50_ms"] / max(current["p50_ms"], 0.001), 1)}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--kb", type=int, default=200, help="reply size")
+    ap.add_argument("--directives", type=int, default=100)
+    ap.add_argument("--runs", type=int, default=20)
+    ap.add_argument("--dry", action="store_true", help="no-op handlers: time the scan and splice only")
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -0,0 +1,85 @@
+"""
+Python __RUN__ execution: one fresh interpreter per run vs the warm exec pool.
+
+Runs the same set of short snippets through daemon._execute_code (new
+`python3` process each time, the path node/bash still take) and through
+daemon.execute_code (fork-server pool), sequentially and at --concurrency.
+
+    python3 bench/exec.py --snippets 100
+    python3 bench/exec.py --snippets 100 --concurrency 4 --workers 4
+"""
+
+import argparse, importlib.util, json, os, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import DAEMON, rss_kb, summarize
+
+SNIPPETS = [
+    "print(2 + 2)",
+    "import json; print(json.dumps({'ok': True, 'n': [1, 2, 3]}))",
+    "import datetime; print(datetime.date.today().isoformat())",
+    "print(sum(i * i for i in range(10000)))",
+    "import re; print(re.findall(r'\\d+', 'a1b22c333'))",
+    "import hashlib; print(hashlib.sha256(b'forge').hexdigest()[:12])",
+    "import sqlite3; c = sqlite3.connect(':memory:'); print(c.execute('select 1+1').fetchone()[0])",
+    "import urllib.parse; print(urllib.parse.quote('a b&c'))",
+    "import collections; print(collections.Counter('mississippi').most_common(2))",
+    "import statistics; print(statistics.mean([3, 1, 4, 1, 5, 9]))",
+]
+
+
+def load_daemon(home: Path, workers: int):
+    os.environ["HOME"] = str(home)
+    (home / ".forge").mkdir(parents=True, exist_ok=True)
+    (home / "Forge").mkdir(parents=True, exist_ok=True)
+    (home / ".forge" / "forge.json").write_text(json.dumps({"exec": {"workers": workers}}))
+    spec = importlib.util.spec_from_file_location("forge_daemon", DAEMON)
+    mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+    return mod
+
+
+def drive(fn, n: int, concurrency: int) -> dict:
+    lat, errors = [], 0
+
+    def one(i):
+        t0 = time.perf_counter()
+        out = fn("python", SNIPPETS[i % len(SNIPPETS)], 30)
+        return (time.perf_counter() - t0) * 1000, out.startswith(("Traceback", "Execution error", "Timed out"))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as ex:
+        for ms, bad in ex.map(one, range(n)):
+            lat.append(ms); errors += bad
+    return summarize(lat, time.perf_counter() - t0, errors)
+
+
+def run(args) -> dict:
+    d = load_daemon(Path(tempfile.mkdtemp(prefix="forge-exec-")), args.workers)
+    pool = d.exec_pool()
+    t0 = time.perf_counter(); pool.prewarm()
+    prewarm_ms = (time.perf_counter() - t0) * 1000
+
+    report = {"snippets": args.snippets, "concurrency": args.concurrency, "workers": args.workers,
+              "pool_prewarm_ms": round(prewarm_ms, 1),
+              "per_process": drive(d._execute_code, args.snippets, args.concurrency),
+              "pool":        drive(d.execute_code, args.snippets, args.concurrency)}
+    st = pool.status()
+    report["pool_status"] = {k: st[k] for k in ("done", "failed", "timeouts", "recycled", "avg_ms")}
+    report["worker_rss_kb"] = [w["rss_kb"] for w in st["workers"]]
+    report["bench_rss_kb"] = rss_kb(os.getpid())
+    report["speedup_p50"] = round(report["per_process"]["p50_ms"] / max(report["pool"]["p50_ms"], 0.01), 1)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--snippets", type=int, default=100)
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -0,0 +1,146 @@
+"""
+Shared helpers for the bench/ scripts.
+
+Starts daemon.py in a throwaway HOME on a free port, talks to it over HTTP,
+and turns raw timings into the p50/p95/p99 summaries every bench reports.
+Stdlib only, same as the daemon.
+"""
+
+import json, os, shutil, socket, subprocess, sys, tempfile, threading, time
+import urllib.request
+from pathlib import Path
+
+REPO   = Path(__file__).resolve().parent.parent
+DAEMON = REPO / "daemon.py"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values: return 0.0
+    vals = sorted(values)
+    k = (len(vals) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(vals) - 1)
+    return vals[lo] + (vals[hi] - vals[lo]) * (k - lo)
+
+
+def summarize(latencies_ms: list, wall_s: float, errors: int = 0) -> dict:
+    return {
+        "requests":   len(latencies_ms),
+        "errors":     errors,
+        "throughput": round(len(latencies_ms) / wall_s, 2) if wall_s else 0.0,
+        "p50_ms":     round(percentile(latencies_ms, 50), 2),
+        "p95_ms":     round(percentile(latencies_ms, 95), 2),
+        "p99_ms":     round(percentile(latencies_ms, 99), 2),
+        "max_ms":     round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def rss_kb(pid: int) -> int:
+    """Resident set size of a process in KB (Linux /proc, falling back to ps on macOS)."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        return int(subprocess.check_output(["ps", "-o", "rss=", "-p", str(pid)], text=True).strip() or 0)
+    except Exception:
+        return 0
+
+
+class RssSampler(threading.Thread):
+    """Samples a pid's RSS in the background; .peak_kb / .last_kb once stopped."""
+
+    def __init__(self, pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.pid, self.interval = pid, interval
+        self.samples, self._stop_evt = [], threading.Event()
+
+    def run(self):
+        while not self._stop_evt.is_set():
+            kb = rss_kb(self.pid)
+            if kb: self.samples.append(kb)
+            self._stop_evt.wait(self.interval)
+
+    def stop(self) -> dict:
+        self._stop_evt.set(); self.join(timeout=2)
+        return {"rss_start_kb": self.samples[0] if self.samples else 0,
+                "rss_peak_kb":  max(self.samples) if self.samples else 0,
+                "rss_end_kb":   self.samples[-1] if self.samples else 0}
+
+
+class Daemon:
+    """
+    A daemon.py process running against a temp HOME.
+    cfg is written to ~/.forge/forge.json before start; env is merged into the child's environment.
+    """
+
+    def __init__(self, cfg: dict = None, env: dict = None, args: list = None, introduced: bool = True):
+        self.home = Path(tempfile.mkdtemp(prefix="forge-bench-"))
+        self.port = free_port()
+        self.cfg, self.extra_env, self.args = cfg or {}, env or {}, args or []
+        forge = self.home / ".forge"
+        forge.mkdir(parents=True)
+        (forge / "forge.json").write_text(json.dumps(self.cfg, indent=2))
+        if introduced:
+            (forge / ".introduced").touch()   # skip the first-contact path
+        self.proc = None
+        self.started_at = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, wait: str = "/status", timeout: float = 30.0) -> float:
+        """Start the daemon and wait until `wait` answers. Returns seconds until it did."""
+        env = os.environ.copy()
+        env.update({"HOME": str(self.home), "FORGE_DAEMON_PORT": str(self.port)})
+        env.update(self.extra_env)
+        self.started_at = time.perf_counter()
+        self.proc = subprocess.Popen([sys.executable, str(DAEMON)] + self.args, env=env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return self.wait_for(wait, timeout)
+
+    def wait_for(self, path: str, timeout: float = 30.0, ok=lambda d: True) -> float:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"daemon exited with {self.proc.returncode} — see {self.home}/.forge/logs/daemon.log")
+            try:
+                if ok(self.get(path, timeout=1)):
+                    return time.perf_counter() - self.started_at
+            except Exception:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"daemon did not answer {path} within {timeout}s")
+
+    def get(self, path: str, timeout: float = 300):
+        with urllib.request.urlopen(self.url + path, timeout=timeout) as r:
+            return json.loads(r.read() or b"null")
+
+    def post(self, path: str, body: dict, timeout: float = 300):
+        req = urllib.request.Request(self.url + path, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return json.loads(r.read() or b"null")
+
+    def stop(self, keep_home: bool = False):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try: self.proc.wait(timeout=5)
+            except subprocess.TimeoutExpired: self.proc.kill()
+        if not keep_home:
+            shutil.rmtree(self.home, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
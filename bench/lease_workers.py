@@ -0,0 +1,82 @@
+"""
+Distributed task steps: one coordinator daemon, 1..N `daemon.py --worker` processes.
+
+Starts a coordinator with "coordinator": {"enabled": true}, queues --tasks tasks
+of --steps steps each through /task/create, then starts W workers (each in its
+own HOME, talking to the fake `claude` CLI from mock_provider.py) and times how
+long it takes until every lease is done. Steps of one task run in order, so the
+speedup tops out at the number of tasks.
+
+    python3 bench/lease_workers.py --workers 1,2,4 --tasks 8 --steps 3 --latency-ms 500
+"""
+
+import argparse, json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import DAEMON, Daemon
+from mock_provider import MockConfig, write_fake_cli
+
+
+def start_worker(url: str, name: str, bin_dir: Path) -> subprocess.Popen:
+    home = Path(tempfile.mkdtemp(prefix=f"forge-{name}-"))
+    (home / ".forge").mkdir()
+    (home / ".forge" / "forge.json").write_text(json.dumps({
+        "providers": {"anthropic": {"oauth_token": "mock-oauth"}}, "heartbeat": {"enabled": False}}))
+    (home / ".forge" / ".introduced").touch()
+    env = {**os.environ, "HOME": str(home), "FORGE_BIN_PATH": f"{bin_dir}:/usr/bin:/bin",
+           "CLAUDE_CODE_OAUTH_TOKEN": ""}
+    return subprocess.Popen([sys.executable, str(DAEMON), "--worker", "--coordinator", url, "--name", name],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run_once(n_workers: int, args, bin_dir: Path) -> dict:
+    with Daemon({"coordinator": {"enabled": True, "lease_s": 30}, "heartbeat": {"enabled": False}}) as d:
+        d.start()
+        d.wait_for("/ready", ok=lambda r: bool(r and r.get("ready")))
+        for t in range(args.tasks):
+            d.post("/task/create", {"title": f"bench task {t}",
+                                    "steps": [f"step {t}.{s}: reply with one line" for s in range(args.steps)]})
+        t0 = time.perf_counter()
+        workers = [start_worker(d.url, f"w{i}", bin_dir) for i in range(n_workers)]
+        try:
+            while True:
+                st = d.get("/lease/status")
+                left = sum(n for k, n in st["leases"].items() if k in ("queued", "leased"))
+                if not left or time.perf_counter() - t0 > args.timeout: break
+                time.sleep(0.1)
+            wall = time.perf_counter() - t0
+        finally:
+            for w in workers: w.terminate()
+            for w in workers: w.wait(timeout=10)
+    total = args.tasks * args.steps
+    return {"wall_s": round(wall, 2), "steps_done": st["leases"].get("done", 0),
+            "steps_failed": st["leases"].get("failed", 0), "timed_out": bool(left),
+            "steps_per_s": round(st["leases"].get("done", 0) / wall, 2) if wall else 0.0,
+            "done_by_worker": st["done_by_worker"], "steps_total": total}
+
+
+def run(args) -> dict:
+    bin_dir = Path(tempfile.mkdtemp(prefix="forge-mockbin-"))
+    write_fake_cli(bin_dir, MockConfig(args.latency_ms, 0, 0, 16))
+    report = {"tasks": args.tasks, "steps": args.steps, "step_latency_ms": args.latency_ms, "runs": {}}
+    for n in map(int, args.workers.split(",")):
+        report["runs"][str(n)] = run_once(n, args, bin_dir)
+    runs = list(report["runs"].values())
+    if len(runs) > 1:
+        report["speedup"] = round(runs[0]["wall_s"] / max(runs[-1]["wall_s"], 0.01), 2)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", default="1,4", help="comma-separated worker process counts")
+    ap.add_argument("--tasks", type=int, default=8)
+    ap.add_argument("--steps", type=int, default=3)
+    ap.add_argument("--latency-ms", type=float, default=500, help="fake CLI reply latency per step")
+    ap.add_argument("--timeout", type=float, default=300)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -0,0 +1,191 @@
+"""
+Mock LLM provider for benchmarks — no real API calls, no cost.
+
+Two faces, same behaviour (first-token latency, then one token every token_ms):
+  * an HTTP server speaking the Anthropic /v1/messages and OpenAI
+    /v1/chat/completions wire formats, streaming (SSE) and non-streaming.
+    Point the SDKs at it with ANTHROPIC_BASE_URL / OPENAI_BASE_URL.
+  * a fake `claude` CLI written into a bin dir; the daemon finds it through
+    FORGE_BIN_PATH, exactly like the real OAuth path.
+
+Run standalone:  python3 bench/mock_provider.py --port 8787 --latency-ms 300 --tokens 120
+"""
+
+import argparse, json, random, stat, sys, threading, time
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+WORDS = ("forge mock token stream latency replay bench daemon agent task memory "
+         "skill vision heartbeat alarm build ship measure").split()
+
+
+@dataclass
+class MockConfig:
+    latency_ms: float = 200.0    # time to first token
+    jitter_ms:  float = 0.0      # +/- uniform jitter on latency_ms
+    token_ms:   float = 5.0      # delay between streamed tokens
+    tokens:     int   = 64       # tokens per reply
+    reply:      str   = ""       # fixed reply text instead of generated words
+
+    def first_token_delay(self) -> float:
+        j = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + j) / 1000
+
+    def token_list(self) -> list:
+        if self.reply:
+            return [self.reply]
+        return [WORDS[i % len(WORDS)] + " " for i in range(self.tokens)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    mock: MockConfig = MockConfig()
+    stats = {"requests": 0}
+
+    def log_message(self, *a): pass
+
+    def _json(self, data: dict, code: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers(); self.wfile.write(body)
+
+    def _sse(self, events):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for name, data in events:
+            line = (f"event: {name}\n" if name else "") + f"data: {data if isinstance(data, str) else json.dumps(data)}\n\n"
+            self.wfile.write(line.encode()); self.wfile.flush()
+        self.close_connection = True
+
+    def do_POST(self):
+        n = int(self.headers.get("Content-Length", 0))
+        req = json.loads(self.rfile.read(n) or b"{}")
+        _Handler.stats["requests"] += 1
+        cfg, model = self.mock, req.get("model", "mock")
+        time.sleep(cfg.first_token_delay())
+        tokens = cfg.token_list()
+
+        if self.path.rstrip("/").endswith("/v1/messages"):
+            if not req.get("stream"):
+                time.sleep(cfg.token_ms * len(tokens) / 1000)
+                self._json({"id": "msg_mock", "type": "message", "role": "assistant", "model": model,
+                            "content": [{"type": "text", "text": "".join(tokens)}],
+                            "stop_reason": "end_turn",
+                            "usage": {"input_tokens": n // 4, "output_tokens": len(tokens)}})
+                return
+            def events():
+                yield "message_start", {"type": "message_start", "message": {
+                    "id": "msg_mock", "type": "message", "role": "assistant", "model": model, "content": [],
+                    "usage": {"input_tokens": n // 4, "output_tokens": 0}}}
+                yield "content_block_start", {"type": "content_block_start", "index": 0,
+                                              "content_block": {"type": "text", "text": ""}}
+                for t in tokens:
+                    time.sleep(cfg.token_ms / 1000)
+                    yield "content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                  "delta": {"type": "text_delta", "text": t}}
+                yield "content_block_stop", {"type": "content_block_stop", "index": 0}
+                yield "message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                        "usage": {"output_tokens": len(tokens)}}
+                yield "message_stop", {"type": "message_stop"}
+            self._sse(events()); return
+
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            if not req.get("stream"):
+                time.sleep(cfg.token_ms * len(tokens) / 1000)
+                self._json({"id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                            "model": model, "choices": [{"index": 0, "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": "".join(tokens)}}],
+                            "usage": {"prompt_tokens": n // 4, "completion_tokens": len(tokens),
+                                      "total_tokens": n // 4 + len(tokens)}})
+                return
+            def events():
+                for t in tokens:
+                    time.sleep(cfg.token_ms / 1000)
+                    yield None, {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                                 "choices": [{"index": 0, "delta": {"content": t}, "finish_reason": None}]}
+                yield None, {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                yield None, "[DONE]"
+            self._sse(events()); return
+
+        self._json({"error": {"type": "not_found", "message": self.path}}, 404)
+
+
+class MockProvider:
+    """HTTP mock on a background thread. Use as a context manager or call start()/stop()."""
+
+    def __init__(self, cfg: MockConfig = None, port: int = 0):
+        handler = type("MockHandler", (_Handler,), {"mock": cfg or MockConfig(), "stats": {"requests": 0}})
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.server.daemon_threads = True
+        self.handler = handler
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def requests(self) -> int:
+        return self.handler.stats["requests"]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown(); self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+FAKE_CLI = '''#!{python}
+# Fake `claude` CLI written by bench/mock_provider.py — replays latency, never calls out.
+import json, sys, time, random
+cfg = {cfg}
+jit = random.uniform(-cfg["jitter_ms"], cfg["jitter_ms"]) if cfg["jitter_ms"] else 0.0
+time.sleep(max(0.0, cfg["latency_ms"] + jit) / 1000 + cfg["token_ms"] * cfg["tokens"] / 1000)
+words = {words!r}
+text = cfg["reply"] or "".join(words[i % len(words)] + " " for i in range(cfg["tokens"]))
+print(json.dumps({{"type": "result", "subtype": "success", "is_error": False,
+                  "result": text, "session_id": "mock-session"}}))
+'''
+
+
+def write_fake_cli(bin_dir: Path, cfg: MockConfig = None) -> Path:
+    """Write an executable fake `claude` into bin_dir and return its path."""
+    cfg = cfg or MockConfig()
+    bin_dir = Path(bin_dir); bin_dir.mkdir(parents=True, exist_ok=True)
+    path = bin_dir / "claude"
+    path.write_text(FAKE_CLI.format(python=sys.executable, words=WORDS, cfg=json.dumps({
+        "latency_ms": cfg.latency_ms, "jitter_ms": cfg.jitter_ms, "token_ms": cfg.token_ms,
+        "tokens": cfg.tokens, "reply": cfg.reply})))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8787)
+    ap.add_argument("--latency-ms", type=float, default=200)
+    ap.add_argument("--jitter-ms", type=float, default=0)
+    ap.add_argument("--token-ms", type=float, default=5)
+    ap.add_argument("--tokens", type=int, default=64)
+    ap.add_argument("--write-cli", metavar="DIR", help="also write a fake claude CLI into DIR")
+    a = ap.parse_args()
+    mc = MockConfig(a.latency_ms, a.jitter_ms, a.token_ms, a.tokens)
+    if a.write_cli:
+        print(f"fake claude CLI: {write_fake_cli(Path(a.write_cli), mc)}")
+    mp = MockProvider(mc, a.port)
+    print(f"mock provider on {mp.url}  (Anthropic /v1/messages, OpenAI /v1/chat/completions)")
+    try: mp.server.serve_forever()
+    except KeyboardInterrupt: pass
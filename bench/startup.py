@@ -0,0 +1,83 @@
+"""
+Daemon startup time and import cost.
+
+  * time from spawn until /status answers and until /ready reports ready,
+    over several cold starts
+  * `python3 -X importtime` of daemon.py's module body (what every start pays)
+  * stand-alone import time of the heavy optional deps the daemon loads lazily,
+    i.e. what the first request that needs each one pays instead of boot
+
+    python3 bench/startup.py --runs 5 --out startup.json
+"""
+
+import argparse, json, os, subprocess, sys, tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import DAEMON, Daemon, percentile
+
+LAZY_MODULES = ["apscheduler.schedulers.background", "anthropic", "openai", "faster_whisper", "playwright"]
+
+LOAD_DAEMON = ("import importlib.util; s = importlib.util.spec_from_file_location('forge_daemon', {path!r}); "
+               "m = importlib.util.module_from_spec(s); s.loader.exec_module(m)")
+
+
+def importtime(code: str, home: str) -> list:
+    """Run code under -X importtime; return [(cumulative_us, self_us, module)] sorted by cumulative."""
+    env = os.environ.copy(); env["HOME"] = home
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                       capture_output=True, text=True, env=env)
+    rows = []
+    for line in r.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        self_us, cum_us, name = (x.strip() for x in line[len("import time:"):].split("|"))
+        rows.append((int(cum_us), int(self_us), name))
+    return sorted(rows, reverse=True)
+
+
+def module_body_ms(home: str) -> float:
+    code = ("import time; t = time.perf_counter(); " + LOAD_DAEMON.format(path=str(DAEMON)) +
+            "; print((time.perf_counter() - t) * 1000)")
+    env = os.environ.copy(); env["HOME"] = home
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env).stdout
+    return round(float(out.strip().splitlines()[-1]), 2)
+
+
+def lazy_import_ms(module: str):
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    r = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    return round(float(r.stdout.strip()), 1) if r.returncode == 0 else None
+
+
+def run(args) -> dict:
+    status_s, ready_s = [], []
+    for _ in range(args.runs):
+        with Daemon({"media": {"whisper_prewarm": False}}) as d:
+            status_s.append(d.start("/status"))
+            ready_s.append(d.wait_for("/ready", ok=lambda r: bool(r and r.get("ready"))))
+
+    home = tempfile.mkdtemp(prefix="forge-import-")
+    rows = importtime(LOAD_DAEMON.format(path=str(DAEMON)), home)
+    total_us = sum(r[1] for r in rows)
+    ms = lambda xs, p: round(percentile(xs, p) * 1000, 1)
+    return {
+        "runs": args.runs,
+        "to_status_ms": {"p50": ms(status_s, 50), "p95": ms(status_s, 95), "max": round(max(status_s) * 1000, 1)},
+        "to_ready_ms":  {"p50": ms(ready_s, 50),  "p95": ms(ready_s, 95),  "max": round(max(ready_s) * 1000, 1)},
+        "module_body_ms": module_body_ms(home),
+        "imports": {"modules": len(rows), "total_self_ms": round(total_us / 1000, 1),
+                    "top_cumulative": [{"module": n, "cumulative_ms": round(c / 1000, 2)}
+                                       for c, _, n in rows[:args.top]]},
+        "lazy_import_ms": {m: lazy_import_ms(m) for m in LAZY_MODULES},
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -0,0 +1,103 @@
+"""
+Transcription throughput: N voice notes posted to /media/transcribe at once.
+
+Uses --audio if given, otherwise generates a short Opus clip with ffmpeg.
+Run it once per --workers value to see how the whisper worker pool scales
+(each worker holds its own model, so RAM grows with the pool). --stream uses
+/media/transcribe/stream instead and also reports time to the first partial.
+
+    python3 bench/transcribe.py --messages 10 --workers 1
+    python3 bench/transcribe.py --messages 10 --workers 2 --audio note.ogg
+    python3 bench/transcribe.py --messages 1 --workers 4 --audio lecture.ogg --stream
+"""
+
+import argparse, base64, json, subprocess, sys, tempfile, time, urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import Daemon, RssSampler, summarize
+
+
+def sample_audio(seconds: int) -> bytes:
+    out = Path(tempfile.mkdtemp()) / "tone.ogg"
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+                    "-i", f"sine=frequency=440:duration={seconds}", "-c:a", "libopus", str(out)], check=True)
+    return out.read_bytes()
+
+
+def stream(d, body: dict, timeout: float):
+    """POST to the NDJSON endpoint; return (ms to first partial, final event)."""
+    req = urllib.request.Request(d.url + "/media/transcribe/stream", data=json.dumps(body).encode(),
+                                 headers={"Content-Type": "application/json"}, method="POST")
+    t0, first, last = time.perf_counter(), None, {}
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        for line in r:
+            last = json.loads(line)
+            if first is None and last["type"] in ("partial", "done"):
+                first = (time.perf_counter() - t0) * 1000
+    return first or 0.0, last
+
+
+def run(args) -> dict:
+    audio = Path(args.audio).read_bytes() if args.audio else sample_audio(args.seconds)
+    # cache off: every message is the same clip, and a cache hit would measure nothing
+    body  = {"data": base64.b64encode(audio).decode(), "cache": False}
+    cfg   = {"media": {"whisper_workers": args.workers, "whisper_model": args.model,
+                       "whisper_prewarm": True}}
+
+    with Daemon(cfg) as d:
+        d.start()
+        # wait for the pre-warm so model load isn't counted as transcription time
+        d.wait_for("/media/transcribe/status", timeout=args.warm_timeout,
+                   ok=lambda s: not s["available"] or all(w["pid"] for w in s["workers"]))
+        status = d.get("/media/transcribe/status")
+        if not status["available"]:
+            print(f"warning: local whisper unavailable ({status['error']}) — timings are the fallback path",
+                  file=sys.stderr)
+
+        rss = RssSampler(d.proc.pid); rss.start()
+        lat, first, empty = [], [], 0
+
+        def one(_):
+            t0 = time.perf_counter()
+            if args.stream:
+                ms, done = stream(d, body, args.warm_timeout)
+                first.append(ms)
+                return (time.perf_counter() - t0) * 1000, bool(done.get("text"))
+            r = d.post("/media/transcribe", body, timeout=args.warm_timeout)
+            return (time.perf_counter() - t0) * 1000, bool(r.get("transcript"))
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(args.messages) as ex:
+            for ms, ok in ex.map(one, range(args.messages)):
+                lat.append(ms); empty += not ok
+        wall = time.perf_counter() - t0
+        mem = rss.stop()
+        pool = d.get("/media/transcribe/status")
+
+    return {
+        "messages": args.messages, "workers": args.workers, "model": args.model,
+        "audio_bytes": len(audio), "wall_s": round(wall, 3),
+        "latency": summarize(lat, wall), "empty_transcripts": empty,
+        **({"first_partial": summarize(first, wall)} if first else {}),
+        "daemon": mem,
+        "pool": {k: pool[k] for k in ("available", "done", "failed", "timeouts", "rejected", "avg_ms")},
+        "worker_rss_kb": [w["rss_kb"] for w in pool["workers"]],
+    }
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--messages", type=int, default=10)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--model", default="medium")
+    ap.add_argument("--audio", help="audio file to send (default: generated tone)")
+    ap.add_argument("--seconds", type=int, default=8, help="length of the generated clip")
+    ap.add_argument("--stream", action="store_true", help="use /media/transcribe/stream")
+    ap.add_argument("--warm-timeout", type=float, default=900)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
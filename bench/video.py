@@ -0,0 +1,113 @@
+"""
+Video pipeline: the legacy two-pass path vs the current single-pass one.
+
+Legacy (kept here as the reference): ffmpeg once for Opus audio, once more for 4
+frames through a filter that decodes every frame, then transcription, then vision.
+The original `select=...nb_frames...` filter errors out on ffmpeg 7, so the
+reference uses an fps filter, which decodes every frame the same way.
+Current: daemon._tg_video — one keyframe-only ffmpeg pass, frame count from the
+clip length, transcription and vision in parallel.
+
+Vision goes to bench/mock_provider.py (ANTHROPIC_BASE_URL); transcription is a
+sleep of --transcribe-ms unless --real-whisper. Sample clips are generated with
+ffmpeg (testsrc2 + tone) unless --clip is given.
+
+    python3 bench/video.py --durations 15,60,180 --runs 3
+    python3 bench/video.py --clip a.mp4 --clip b.mp4 --real-whisper
+"""
+
+import argparse, importlib.util, json, os, subprocess, sys, tempfile, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import DAEMON, percentile
+from mock_provider import MockConfig, MockProvider
+
+
+def make_clip(out: Path, seconds: int) -> Path:
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "testsrc2=size=1280x720:rate=30",
+                    "-f", "lavfi", "-i", "sine=frequency=300",
+                    "-t", str(seconds), "-c:v", "libx264", "-g", "60", "-pix_fmt", "yuv420p",
+                    "-c:a", "aac", "-shortest", str(out)], check=True)
+    return out
+
+
+def load_daemon(home: Path):
+    os.environ["HOME"] = str(home)
+    spec = importlib.util.spec_from_file_location("forge_daemon", DAEMON)
+    mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+    return mod
+
+
+def legacy_video(d, video_bytes: bytes, duration: float, caption: str, cfg: dict) -> str:
+    """The pre-single-pass _tg_video, minus the cache."""
+    with tempfile.TemporaryDirectory() as tmp:
+        src, audio = os.path.join(tmp, "v.mp4"), os.path.join(tmp, "a.ogg")
+        Path(src).write_bytes(video_bytes)
+        subprocess.run(["ffmpeg", "-y", "-i", src, "-vn", "-acodec", "libopus", audio],
+                       capture_output=True, timeout=60)
+        transcript = d._tg_transcribe(Path(audio).read_bytes(), cfg) if os.path.exists(audio) else ""
+        subprocess.run(["ffmpeg", "-y", "-i", src,
+                        "-vf", f"fps=4/{max(duration, 1):.3f},scale=640:-1",
+                        "-vsync", "vfr", "-frames:v", "4", f"{tmp}/frame%02d.jpg"],
+                       capture_output=True, timeout=60)
+        frames = [f.read_bytes() for f in sorted(Path(tmp).glob("frame*.jpg"))[:4]]
+        prompt = caption or "Analyse these 4 video frames and describe what's happening."
+        if transcript: prompt += f"\n\nAudio transcript: {transcript}"
+        vision = d._video_vision(frames, prompt, cfg)
+    return "\n\n".join(p for p in (transcript, vision) if p)
+
+
+def timed(fn, runs: int) -> dict:
+    ms = []
+    for _ in range(runs):
+        t0 = time.perf_counter(); fn(); ms.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": round(percentile(ms, 50), 1), "max_ms": round(max(ms), 1)}
+
+
+def run(args) -> dict:
+    tmp = Path(tempfile.mkdtemp(prefix="forge-video-"))
+    clips = [Path(c) for c in args.clip] or \
+            [make_clip(tmp / f"clip_{s}s.mp4", s) for s in map(int, args.durations.split(","))]
+
+    mp = MockProvider(MockConfig(args.latency_ms, 0, 2, 64)).start()
+    os.environ["ANTHROPIC_BASE_URL"] = mp.url
+    d = load_daemon(tmp / "home")
+    cfg = {"providers": {"anthropic": {"api_key": "mock-key"}}}
+    if not args.real_whisper:
+        d._tg_transcribe = lambda audio, cfg, cache=True: (time.sleep(args.transcribe_ms / 1000), "mock transcript")[1]
+
+    report = []
+    for clip in clips:
+        data = clip.read_bytes()
+        with tempfile.TemporaryDirectory() as t:
+            Path(t, "v.mp4").write_bytes(data)
+            t0 = time.perf_counter()
+            extracted = d._video_extract(os.path.join(t, "v.mp4"), t, cfg)
+            extract_ms = (time.perf_counter() - t0) * 1000
+        report.append({
+            "clip": clip.name, "bytes": len(data), "duration_s": round(extracted["duration"], 1),
+            "frames": len(extracted["frames"]), "single_pass_extract_ms": round(extract_ms, 1),
+            "legacy":  timed(lambda: legacy_video(d, data, extracted["duration"], "", cfg), args.runs),
+            "current": timed(lambda: d._tg_video(data, "", cfg, cache=False), args.runs),
+            "cached":  timed(lambda: d._tg_video(data, "", cfg), args.runs),
+        })
+    mp.stop()
+    return {"runs": args.runs, "vision_latency_ms": args.latency_ms,
+            "transcribe_ms": None if args.real_whisper else args.transcribe_ms, "clips": report}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--clip", action="append", default=[], help="video file (repeatable)")
+    ap.add_argument("--durations", default="15,60,180", help="generated clip lengths in seconds")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--latency-ms", type=float, default=1500, help="mock vision latency")
+    ap.add_argument("--transcribe-ms", type=float, default=2000, help="simulated transcription time")
+    ap.add_argument("--real-whisper", action="store_true", help="use the daemon's whisper pool instead")
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -0,0 +1,90 @@
+"""
+HTTP throughput: one daemon process vs `--workers N` pre-forked workers.
+
+Seeds forge.db with chat history and tasks, then drives a read-heavy dashboard
+mix (/history pages, /tasks/board, /usage, /status) at --concurrency against
+each worker count in turn. Responses are JSON encoded in Python, so a single
+process is bound by one GIL; N workers should scale until the cores run out.
+/status answers say which worker served them, so the report also shows how
+evenly the kernel spread accept()s, and which worker is the scheduler leader.
+
+    python3 bench/workers.py --workers 1,4 --concurrency 16 --requests 2000
+"""
+
+import argparse, json, random, sqlite3, sys, time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from harness import Daemon, rss_kb, summarize
+
+MIX = [("/history?limit=200", 4), ("/tasks/board", 2), ("/usage", 2), ("/status", 2)]
+
+
+def seed(d: Daemon, messages: int, tasks: int):
+    c = sqlite3.connect(d.home / ".forge" / "forge.db", timeout=30)
+    c.executemany("INSERT INTO memory(agent,role,content,timestamp) VALUES('FORGE',?,?,?)",
+                  [("user" if i % 2 else "assistant", f"message {i} " + "lorem ipsum " * 40,
+                    "2026-01-01T00:00:00") for i in range(messages)])
+    c.executemany("INSERT INTO tasks(title,status,description) VALUES(?,?,?)",
+                  [(f"task {i}", ("pending", "running", "completed")[i % 3], "details " * 30)
+                   for i in range(tasks)])
+    c.commit(); c.close()
+
+
+def drive(d: Daemon, n: int, concurrency: int, rng: random.Random) -> dict:
+    paths = [p for p, w in MIX for _ in range(w)]
+    plan = [rng.choice(paths) for _ in range(n)]
+    lat, errors, served = [], 0, {}
+
+    def one(path):
+        t0 = time.perf_counter()
+        try:
+            body = d.get(path, timeout=60)
+        except Exception:
+            return (time.perf_counter() - t0) * 1000, True, None
+        return (time.perf_counter() - t0) * 1000, False, (body or {}).get("worker") if path == "/status" else None
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as ex:
+        for ms, bad, worker in ex.map(one, plan):
+            lat.append(ms); errors += bad
+            if worker: served[worker["pid"]] = served.get(worker["pid"], 0) + 1
+    return {**summarize(lat, time.perf_counter() - t0, errors), "status_by_pid": served}
+
+
+def run(args) -> dict:
+    report = {"requests": args.requests, "concurrency": args.concurrency,
+              "seed": {"messages": args.messages, "tasks": args.tasks}, "runs": {}}
+    for n in map(int, args.workers.split(",")):
+        with Daemon({"media": {"whisper_prewarm": False}}, args=["--workers", str(n)]) as d:
+            d.start("/status")
+            d.wait_for("/ready", ok=lambda r: bool(r and r.get("ready")))
+            seed(d, args.messages, args.tasks)
+            drive(d, args.warmup, args.concurrency, random.Random(0))
+            res = drive(d, args.requests, args.concurrency, random.Random(args.seed))
+            pids = set(res["status_by_pid"]) | {d.proc.pid}
+            leaders = {s["worker"]["pid"] for s in (d.get("/status") for _ in range(4 * n))
+                       if s["worker"]["leader"]}
+            report["runs"][str(n)] = {**res, "leader_pids": sorted(leaders),
+                                      "rss_kb_total": sum(rss_kb(p) for p in pids)}
+    runs = list(report["runs"].values())
+    if len(runs) > 1:
+        report["speedup"] = round(runs[-1]["throughput"] / max(runs[0]["throughput"], 0.01), 2)
+    return report
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--workers", default="1,4", help="comma-separated worker counts to compare")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--warmup", type=int, default=100)
+    ap.add_argument("--messages", type=int, default=5000)
+    ap.add_argument("--tasks", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out")
+    a = ap.parse_args()
+    text = json.dumps(run(a), indent=2)
+    print(text)
+    if a.out: Path(a.out).write_text(text + "\n")
@@ -10,19 +10,22 @@ Forge Daemon v3
 - Never stops learning — updates own files from every conversation
 """
 
-import os, json, sqlite3, threading, logging, time, subprocess, re
+import os, sys, json, sqlite3, threading, logging, time, subprocess, re, struct, queue
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-    HAS_APSCHEDULER = True
-except ImportError:
-    HAS_APSCHEDULER = False
+# Heavy/optional imports (apscheduler, anthropic, openai, faster_whisper, playwright)
+# are deferred to first use so the daemon can bind its port straight away.
+HAS_APSCHEDULER = False   # set by _boot_scheduler()
 
 # ── WHISPER SINGLETON ──────────────────────────────────────
+# Loaded inside the transcription worker process (daemon.py --transcribe-worker),
+# never in the daemon itself.
 _whisper_model = None
 _whisper_lock  = threading.Lock()
 
@@ -35,7 +38,9 @@ def _get_whisper_model():
         if _whisper_model is None:
             try:
                 from faster_whisper import WhisperModel
-                _whisper_model = WhisperModel("medium", device="cpu", compute_type="int8")
+                _whisper_model = WhisperModel(
+                    os.environ.get("FORGE_WHISPER_MODEL", "medium"), device="cpu", compute_type="int8",
+                    cpu_threads=int(os.environ.get("FORGE_WHISPER_THREADS", "0")))
             except Exception:
                 pass
     return _whisper_model
@@ -47,8 +52,10 @@ FORGE_WS   = HOME / "Forge"
 CORE_DIR   = FORGE_WS / ".cortex_brain" / "core"
 DB_PATH    = FORGE_CFG / "forge.db"
 CFG_PATH   = FORGE_CFG / "forge.json"
-PORT           = 2079
+PORT           = int(os.environ.get('FORGE_DAEMON_PORT', 2079))
 PROJECT_DIR    = Path(os.environ.get('FORGE_PROJECT_DIR', str(Path.home() / 'projects')))
+# Searched before $PATH for claude/node/ffmpeg etc. (bench/ points this at a fake claude CLI)
+BIN_PATH       = os.environ.get('FORGE_BIN_PATH', '/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin')
 
 # ── LOGGING ───────────────────────────────────────────────
 (FORGE_CFG / "logs").mkdir(parents=True, exist_ok=True)
@@ -71,6 +78,567 @@ def load_cfg() -> dict:
 def save_cfg(cfg: dict):
     CFG_PATH.write_text(json.dumps(cfg, indent=2))
 
+_cfg_cache = {"mtime": None, "cfg": {}}
+
+def load_cfg_cached() -> dict:
+    """load_cfg() memoised on forge.json mtime — for settings read on the hot path. Treat as read-only."""
+    try: mtime = CFG_PATH.stat().st_mtime
+    except OSError: mtime = None
+    if mtime != _cfg_cache["mtime"]:
+        _cfg_cache["cfg"]   = load_cfg()
+        _cfg_cache["mtime"] = mtime
+    return _cfg_cache["cfg"]
+
+# ── TRACING ───────────────────────────────────────────────
+# One trace per HTTP request, spans for the slow parts (prompt build, provider
+# call, subprocesses, directives, DB writes). Outside a request _span is a no-op.
+# Each thread keeps its own stack of open spans; work handed to a pool thread
+# goes through _trace_bind so its spans land under the caller's open span.
+TRACE_HEADER = "X-Forge-Trace-Id"
+TRACE_BUFFER = 200                      # finished traces kept in memory
+TRACE_SKIP   = {"/status", "/tasks/board", "/usage", "/ping", "/traces/recent", "/metrics"}  # polling noise
+TRACE_JSONL  = FORGE_CFG / "logs" / "traces.jsonl"
+
+_trace_local = threading.local()
+_traces      = OrderedDict()
+_traces_lock = threading.Lock()
+
+def _trace_begin(name: str, trace_id: str = ""):
+    if not trace_id or not re.fullmatch(r"[A-Za-z0-9_-]{1,64}", trace_id):
+        trace_id = os.urandom(8).hex()
+    tr = {"id": trace_id, "name": name, "start": time.time(), "t0": time.perf_counter(),
+          "spans": [], "next": 0, "lock": threading.Lock()}
+    _trace_local.trace, _trace_local.stack = tr, []
+    return tr
+
+def _trace_end(status: int = 200):
+    tr = getattr(_trace_local, "trace", None)
+    if tr is None: return
+    _trace_local.trace = None
+    with tr["lock"]: spans = list(tr["spans"])
+    done = {"id": tr["id"], "name": tr["name"],
+            "start": datetime.fromtimestamp(tr["start"]).isoformat(),
+            "dur_ms": round((time.perf_counter() - tr["t0"]) * 1000, 2),
+            "status": status, "spans": spans}
+    with _traces_lock:
+        _traces[tr["id"]] = done
+        while len(_traces) > TRACE_BUFFER:
+            _traces.popitem(last=False)
+    if load_cfg_cached().get("tracing", {}).get("export_jsonl"):
+        try:
+            with open(TRACE_JSONL, "a") as f: f.write(json.dumps(done, default=str) + "\n")
+        except Exception as e: log.warning(f"Trace export failed: {e}")
+
+def current_trace_id() -> str:
+    tr = getattr(_trace_local, "trace", None)
+    return tr["id"] if tr else ""
+
+def recent_traces(limit: int = 50) -> list:
+    with _traces_lock:
+        items = list(_traces.values())[-limit:]
+    return [{k: v for k, v in t.items() if k != "spans"} | {"spans": len(t["spans"])}
+            for t in reversed(items)]
+
+def get_trace(trace_id: str):
+    with _traces_lock:
+        return _traces.get(trace_id)
+
+def _trace_bind(fn):
+    """fn, wrapped to run on another thread under the calling thread's trace and open span."""
+    tr = getattr(_trace_local, "trace", None)
+    if tr is None: return fn
+    parent = getattr(_trace_local, "stack", [])[-1:]
+
+    def bound(*args, **kwargs):
+        prev = getattr(_trace_local, "trace", None), getattr(_trace_local, "stack", None)
+        _trace_local.trace, _trace_local.stack = tr, list(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _trace_local.trace, _trace_local.stack = prev      # pool threads get reused
+    return bound
+
+class _span:
+    """Time a block as a child span of the current request trace."""
+    __slots__ = ("name", "attrs", "tr", "sid", "parent", "t0")
+
+    def __init__(self, name: str, **attrs):
+        self.name, self.attrs = name, attrs
+
+    def __enter__(self):
+        tr = self.tr = getattr(_trace_local, "trace", None)
+        if tr is not None:
+            with tr["lock"]:
+                self.sid = tr["next"]; tr["next"] += 1
+            stack = _trace_local.stack
+            self.parent = stack[-1] if stack else None
+            stack.append(self.sid)
+            self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tr = self.tr
+        if tr is None: return False
+        end = time.perf_counter()
+        _trace_local.stack.pop()
+        span = {"id": self.sid, "parent": self.parent,
+                "name": self.name, "start_ms": round((self.t0 - tr["t0"]) * 1000, 2),
+                "dur_ms": round((end - self.t0) * 1000, 2)}
+        if self.attrs: span["attrs"] = self.attrs
+        if exc is not None: span["error"] = f"{exc_type.__name__}: {exc}"[:200]
+        with tr["lock"]: tr["spans"].append(span)
+        return False
+
+# ── PROFILER + SLOW-OP LOG ────────────────────────────────
+# Both are off unless asked for: the profiler only runs for the duration of a
+# /debug/profile request, the slow-op log only when forge.json sets
+#   "debug": {"slow_ms": {"http": 2000, "sql": 200, "provider": 30000}}
+SLOW_LOG    = FORGE_CFG / "logs" / "slow.log"
+SLOW_BUFFER = 200
+_slow_ops   = []
+_slow_lock  = threading.Lock()
+_profile_lock = threading.Lock()
+
+def slow_threshold(kind: str):
+    """Threshold in ms for one kind of operation, or None when slow-op logging is off for it."""
+    slow = load_cfg_cached().get("debug", {}).get("slow_ms")
+    if isinstance(slow, dict): return slow.get(kind)
+    return slow
+
+def _slow_op(kind: str, name: str, dur_ms: float, args: str = ""):
+    import traceback
+    entry = {"ts": datetime.now().isoformat(), "kind": kind, "name": name[:200],
+             "dur_ms": round(dur_ms, 2), "args": args[:300], "trace_id": current_trace_id(),
+             "thread": threading.current_thread().name,
+             "stack": [l.strip() for l in traceback.format_stack(limit=14)[:-2]]}
+    with _slow_lock:
+        _slow_ops.append(entry)
+        del _slow_ops[:-SLOW_BUFFER]
+    log.warning(f"Slow {kind}: {name[:80]} took {dur_ms:.0f}ms")
+    try:
+        with open(SLOW_LOG, "a") as f: f.write(json.dumps(entry) + "\n")
+    except Exception: pass
+
+def recent_slow_ops(limit: int = 50) -> list:
+    with _slow_lock:
+        return list(reversed(_slow_ops[-limit:]))
+
+class _slow:
+    """Log the block to the slow-op log if it runs longer than debug.slow_ms[kind]."""
+    __slots__ = ("kind", "name", "args", "limit", "t0")
+
+    def __init__(self, kind: str, name: str, args: str = ""):
+        self.kind, self.name, self.args = kind, name, args
+
+    def __enter__(self):
+        self.limit = slow_threshold(self.kind)
+        if self.limit is not None: self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.limit is not None:
+            ms = (time.perf_counter() - self.t0) * 1000
+            if ms >= self.limit: _slow_op(self.kind, self.name, ms, self.args)
+        return False
+
+class _TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that reports statements slower than debug.slow_ms.sql. Only used while that is set."""
+    slow_ms = 0
+
+    def execute(self, sql, params=()):
+        t0 = time.perf_counter()
+        try: return super().execute(sql, params)
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            if ms >= self.slow_ms: _slow_op("sql", " ".join(sql.split()), ms, repr(params))
+
+    def commit(self):
+        t0 = time.perf_counter()
+        try: return super().commit()
+        finally:
+            ms = (time.perf_counter() - t0) * 1000
+            if ms >= self.slow_ms: _slow_op("sql", "COMMIT", ms)
+
+def profile_threads(seconds: float, hz: int = 100) -> dict:
+    """
+    Stack-sample every thread for `seconds` and return collapsed stacks
+    ("thread;outer;...;inner count" per line) ready for flamegraph.pl / speedscope.
+    """
+    import sys
+    if not _profile_lock.acquire(blocking=False):
+        return {"error": "a profile is already running"}
+    try:
+        me       = threading.get_ident()
+        names    = {}
+        counts   = {}
+        interval = 1.0 / max(1, min(hz, 1000))
+        deadline = time.perf_counter() + seconds
+        samples  = 0
+        while time.perf_counter() < deadline:
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me: continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+            samples += 1
+            time.sleep(interval)
+        collapsed = "\n".join(f"{k} {v}" for k, v in sorted(counts.items(), key=lambda kv: -kv[1]))
+        return {"seconds": seconds, "hz": hz, "samples": samples, "collapsed": collapsed}
+    finally:
+        _profile_lock.release()
+
+# ── METRICS ───────────────────────────────────────────────
+# In-process counters and histograms since start, served at GET /metrics
+# (JSON, or ?format=prometheus). Names are dotted: "vision.bytes_saved".
+METRIC_BUCKETS = [b * 10 ** e for e in range(10) for b in (1, 2, 5)]   # 1 .. 5e9, fits ms and bytes
+
+_counters     = {}
+_histograms   = {}
+_metrics_lock = threading.Lock()
+
+def metric_inc(name: str, n: float = 1):
+    with _metrics_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def metric_observe(name: str, value: float):
+    import bisect
+    with _metrics_lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = {"count": 0, "sum": 0.0, "min": value, "max": value,
+                                     "buckets": [0] * (len(METRIC_BUCKETS) + 1)}
+        h["count"] += 1; h["sum"] += value
+        h["min"], h["max"] = min(h["min"], value), max(h["max"], value)
+        h["buckets"][bisect.bisect_left(METRIC_BUCKETS, value)] += 1
+
+def _hist_quantile(h: dict, q: float) -> float:
+    """Upper bound of the bucket holding the q-quantile (clamped to the observed max)."""
+    rank, seen = q * h["count"], 0
+    for i, n in enumerate(h["buckets"]):
+        seen += n
+        if seen >= rank and n:
+            return min(METRIC_BUCKETS[i], h["max"]) if i < len(METRIC_BUCKETS) else h["max"]
+    return h["max"]
+
+def metrics_snapshot() -> dict:
+    with _metrics_lock:
+        return {
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {k: {"count": h["count"], "sum": round(h["sum"], 2),
+                               "avg": round(h["sum"] / h["count"], 2), "min": round(h["min"], 2), "max": round(h["max"], 2),
+                               "p50": round(_hist_quantile(h, .5), 2), "p95": round(_hist_quantile(h, .95), 2),
+                               "p99": round(_hist_quantile(h, .99), 2)}
+                           for k, h in sorted(_histograms.items())},
+        }
+
+def metrics_prometheus() -> str:
+    lines = []
+    prom = lambda k: "forge_" + re.sub(r"[^a-zA-Z0-9_]", "_", k)
+    with _metrics_lock:
+        for k, v in sorted(_counters.items()):
+            lines += [f"# TYPE {prom(k)} counter", f"{prom(k)} {v}"]
+        for k, h in sorted(_histograms.items()):
+            lines.append(f"# TYPE {prom(k)} histogram")
+            cum = 0
+            for le, n in zip(METRIC_BUCKETS + ["+Inf"], h["buckets"]):
+                cum += n
+                if n or le == "+Inf": lines.append(f'{prom(k)}_bucket{{le="{le}"}} {cum}')
+            lines += [f"{prom(k)}_sum {h['sum']}", f"{prom(k)}_count {h['count']}"]
+    return "\n".join(lines) + "\n"
+
+# ── EVENTS ────────────────────────────────────────────────
+# Results that land after the request that started them (directives run in the
+# background) are published here with a running sequence number. Clients long-poll
+# GET /events?after=<seq>&wait=<s>; the buffer keeps the last EVENT_BUFFER events.
+EVENT_BUFFER = 1000
+
+_events      = []
+_events_seq  = 0
+_events_cond = threading.Condition()
+
+def event_publish(event_type: str, **data) -> int:
+    global _events_seq
+    with _events_cond:
+        _events_seq += 1
+        _events.append({"seq": _events_seq, "type": event_type, "ts": time.time(), **data})
+        if len(_events) > EVENT_BUFFER: del _events[:len(_events) - EVENT_BUFFER]
+        _events_cond.notify_all()
+        return _events_seq
+
+def events_since(after: int = 0, wait: float = 0, event_type: str = None) -> dict:
+    """Events with seq > after (optionally one type), waiting up to `wait` seconds for the first."""
+    deadline = time.monotonic() + wait
+    with _events_cond:
+        while True:
+            out = [e for e in _events if e["seq"] > after and (event_type is None or e["type"] == event_type)]
+            left = deadline - time.monotonic()
+            if out or left <= 0:
+                return {"events": out, "next": _events_seq}
+            _events_cond.wait(left)
+
+# ── WORKER PROCESSES ──────────────────────────────────────
+# Heavy or untrusted work runs in long-lived `python3 daemon.py --<mode>`
+# children instead of on HTTP handler threads. Parent and worker exchange
+# frames over the child's stdin/stdout:
+#   4-byte big-endian header length | JSON header | header["size"] payload bytes
+
+class WorkerPoolError(RuntimeError):
+    pass
+
+class WorkerPoolRejected(WorkerPoolError):
+    """The job never reached a worker (pool unavailable, queue full, gave up while queued)."""
+
+def _read_exact(f, n: int, deadline: float = None) -> bytes:
+    import select
+    buf = bytearray()
+    while len(buf) < n:
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0 or not select.select([f], [], [], left)[0]:
+                raise TimeoutError
+        chunk = f.read(n - len(buf))
+        if not chunk: raise EOFError("worker pipe closed")
+        buf += chunk
+    return bytes(buf)
+
+def ipc_send(f, header: dict, payload: bytes = b""):
+    head = json.dumps({**header, "size": len(payload)}).encode()
+    f.write(struct.pack(">I", len(head)) + head)
+    if payload: f.write(payload)
+    f.flush()
+
+def ipc_recv(f, deadline: float = None):
+    n = struct.unpack(">I", _read_exact(f, 4, deadline))[0]
+    header = json.loads(_read_exact(f, n, deadline))
+    payload = _read_exact(f, header.get("size", 0), deadline) if header.get("size") else b""
+    return header, payload
+
+def rss_kb(pid: int) -> int:
+    """Resident set size of a process in KB (/proc on Linux, ps elsewhere)."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"): return int(line.split()[1])
+    except OSError: pass
+    try:
+        return int(subprocess.run(["ps", "-o", "rss=", "-p", str(pid)],
+                                  capture_output=True, text=True).stdout.strip() or 0)
+    except Exception: return 0
+
+def worker_serve(handle, hello: dict = None):
+    """
+    Worker side of the protocol: send a hello frame, then answer jobs until stdin closes.
+    handle(header, payload, emit) -> (header, payload); emit(header, payload) sends an
+    intermediate {"stream": true} frame before the reply (progress, output chunks).
+    fd 1 is re-pointed at stderr so stray prints from libraries or skill code can't
+    corrupt the pipe.
+    """
+    out = os.fdopen(os.dup(1), "wb", buffering=0)
+    inp = os.fdopen(os.dup(0), "rb", buffering=0)
+    os.dup2(2, 1)
+    emit = lambda h, p=b"": ipc_send(out, {**h, "stream": True}, p)
+    ipc_send(out, {"hello": True, "ok": True, "pid": os.getpid(), **(hello or {})})
+    if hello and hello.get("ok") is False:
+        return 1
+    while True:
+        try: header, payload = ipc_recv(inp)
+        except EOFError: return 0
+        t0 = time.perf_counter()
+        try:
+            rh, rp = handle(header, payload, emit)
+            rh = {"ok": True, **rh}
+        except Exception as e:
+            rh, rp = {"ok": False, "error": f"{type(e).__name__}: {e}"[:2000]}, b""
+        rh["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        ipc_send(out, rh, rp)
+
+class WorkerPool:
+    """
+    A fixed number of `daemon.py --<mode>` worker processes behind a bounded job queue.
+    Each worker runs one job at a time; a job that overruns its timeout gets its worker
+    killed and respawned. recycle_after / max_rss_mb restart workers that have run too
+    many jobs or grown too big. If a worker doesn't start (no hello, or ok:false in it:
+    a missing dependency) the pool is unavailable and fails jobs fast until the next
+    spawn attempt, which waits RETRY_MIN_S, doubling per failure up to RETRY_MAX_S.
+    Every pool failure, a job timeout included, raises WorkerPoolError; WorkerPoolRejected
+    when the job never reached a worker, so it is safe to run elsewhere. A caller waits
+    at most queue_wait_s for its job to reach a worker on top of the run timeout.
+    """
+    RETRY_MIN_S, RETRY_MAX_S = 5.0, 300.0
+
+    def __init__(self, name: str, mode: str, size: int = 1, queue_max: int = 32,
+                 timeout: float = 300.0, hello_timeout: float = 600.0, queue_wait_s: float = 60.0,
+                 recycle_after: int = 0, max_rss_mb: int = 0, env: dict = None):
+        self.name, self.mode, self.size = name, mode, max(1, size)
+        self.timeout, self.hello_timeout, self.queue_wait_s = timeout, hello_timeout, queue_wait_s
+        self.recycle_after, self.max_rss_mb, self.env = recycle_after, max_rss_mb, env or {}
+        self.jobs = queue.Queue(maxsize=max(1, queue_max))
+        self.slots = [{"proc": None, "jobs": 0, "busy": False, "started": None, "lock": threading.Lock()}
+                      for _ in range(self.size)]
+        self.stats = {"done": 0, "failed": 0, "timeouts": 0, "rejected": 0, "recycled": 0, "total_ms": 0.0}
+        self.error, self._fails, self._retry_at = "", 0, 0.0
+        self._lock, self._started = threading.Lock(), False
+
+    @property
+    def available(self) -> bool:
+        """False while a failed spawn is backing off."""
+        return time.monotonic() >= self._retry_at
+
+    def start(self):
+        with self._lock:
+            if self._started: return self
+            self._started = True
+        for i in range(self.size):
+            threading.Thread(target=self._dispatch, args=(i,), name=f"{self.name}-{i}", daemon=True).start()
+        return self
+
+    def submit(self, header: dict, payload: bytes = b"", timeout: float = None, on_frame=None) -> Future:
+        """Queue a job. on_frame(header, payload) gets each intermediate frame the worker emits."""
+        self.start()
+        fut = Future()
+        if not self.available:
+            fut.set_exception(WorkerPoolRejected(f"{self.name} unavailable: {self.error}")); return fut
+        try:
+            self.jobs.put_nowait((header, payload, timeout or self.timeout, fut, time.monotonic(), on_frame))
+        except queue.Full:
+            with self._lock: self.stats["rejected"] += 1
+            fut.set_exception(WorkerPoolRejected(f"{self.name} queue full ({self.jobs.maxsize})"))
+        return fut
+
+    def call(self, header: dict, payload: bytes = b"", timeout: float = None, on_frame=None):
+        """Run one job and wait for it. Returns (header, payload); raises WorkerPoolError."""
+        t = timeout or self.timeout
+        return self.wait(self.submit(header, payload, t, on_frame), t)
+
+    def wait(self, fut: Future, timeout: float = None):
+        """Result of a submitted job. Allows queue_wait_s + run time; the dispatcher enforces the run timeout itself."""
+        from concurrent.futures import TimeoutError as FutureTimeout
+        limit = self.queue_wait_s + (timeout or self.timeout) + 5
+        try:
+            return fut.result(timeout=limit)
+        except FutureTimeout:
+            err = WorkerPoolRejected if fut.cancel() else WorkerPoolError     # cancel() only works while queued
+            raise err(f"{self.name}: no result after {limit:.0f}s") from None
+
+    def status(self) -> dict:
+        with self._lock:
+            done = self.stats["done"]
+            return {
+                "name": self.name, "available": self.available, "error": self.error,
+                "retry_in_s": round(max(0.0, self._retry_at - time.monotonic()), 1),
+                "workers": [{"pid": s["proc"].pid if s["proc"] else None, "busy": s["busy"],
+                             "jobs": s["jobs"], "started": s["started"],
+                             "rss_kb": rss_kb(s["proc"].pid) if s["proc"] and s["proc"].poll() is None else 0}
+                            for s in self.slots],
+                "queued": self.jobs.qsize(), "queue_max": self.jobs.maxsize,
+                "timeout_s": self.timeout, "queue_wait_s": self.queue_wait_s,
+                **{k: v for k, v in self.stats.items() if k != "total_ms"},
+                "avg_ms": round(self.stats["total_ms"] / done, 1) if done else 0.0,
+            }
+
+    def _spawn(self, i: int):
+        slot = self.slots[i]
+        env = os.environ.copy(); env.update(self.env)
+        try:
+            proc = subprocess.Popen([sys.executable, str(Path(__file__).resolve()), f"--{self.mode}"],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0, env=env)
+        except OSError as e:                # EMFILE, ENOMEM, no interpreter
+            proc, hello = None, {"ok": False, "error": f"could not start worker: {e}"}
+        else:
+            try:
+                hello, _ = ipc_recv(proc.stdout, time.monotonic() + self.hello_timeout)
+            except Exception as e:
+                hello = {"ok": False, "error": f"no hello from worker: {e}"}
+        if not hello.get("ok"):
+            if proc: self._kill(proc)
+            with self._lock:
+                delay = min(self.RETRY_MAX_S, self.RETRY_MIN_S * 2 ** self._fails)
+                self._fails += 1
+                self._retry_at, self.error = time.monotonic() + delay, hello.get("error", "worker failed to start")
+            log.warning(f"{self.name}: worker unavailable — {self.error} (retrying in {delay:.0f}s)")
+            return
+        with self._lock:
+            self._fails, self.error = 0, ""
+        slot.update(proc=proc, jobs=0, started=datetime.now().isoformat())
+        log.info(f"{self.name}: worker {i} up (pid {proc.pid})")
+
+    @staticmethod
+    def _kill(proc):
+        try:
+            proc.kill(); proc.wait(timeout=5)
+        except Exception: pass
+
+    def _recycle_due(self, slot) -> bool:
+        if self.recycle_after and slot["jobs"] >= self.recycle_after: return True
+        if self.max_rss_mb and rss_kb(slot["proc"].pid) > self.max_rss_mb * 1024: return True
+        return False
+
+    def prewarm(self):
+        """Spawn every worker now instead of on its first job (model loads, imports)."""
+        self.start()
+        for i, slot in enumerate(self.slots):
+            with slot["lock"]:
+                if self.available and (slot["proc"] is None or slot["proc"].poll() is not None):
+                    self._spawn(i)
+
+    def _dispatch(self, i: int):
+        slot = self.slots[i]
+        while True:
+            job = self.jobs.get()
+            try:
+                with slot["lock"]:
+                    self._run_job(i, slot, *job)
+            except Exception as e:          # keep the slot serving; don't leave the caller hanging
+                log.error(f"{self.name}: dispatcher {i}: {type(e).__name__}: {e}")
+                fut = job[3]
+                if not fut.done(): fut.set_exception(WorkerPoolError(f"{self.name}: {e}"))
+
+    def _run_job(self, i, slot, header, payload, timeout, fut, queued_at, on_frame):
+        if not fut.set_running_or_notify_cancel(): return
+        dequeued = time.monotonic()
+        if self.available and (slot["proc"] is None or slot["proc"].poll() is not None):
+            self._spawn(i)
+        if not self.available or slot["proc"] is None:
+            with self._lock: self.stats["failed"] += 1
+            fut.set_exception(WorkerPoolRejected(f"{self.name} unavailable: {self.error}")); return
+        proc, t0 = slot["proc"], time.perf_counter()
+        slot["busy"] = True
+        try:
+            ipc_send(proc.stdin, header, payload)
+            deadline = time.monotonic() + timeout
+            rh, rp = ipc_recv(proc.stdout, deadline)
+            while rh.get("stream"):
+                if on_frame:
+                    try: on_frame(rh, rp)
+                    except Exception as e: log.warning(f"{self.name}: on_frame failed: {e}")
+                rh, rp = ipc_recv(proc.stdout, deadline)
+            rh["queue_ms"] = round((dequeued - queued_at) * 1000, 1)
+            with self._lock:
+                self.stats["done"] += 1
+                self.stats["total_ms"] += (time.perf_counter() - t0) * 1000
+            fut.set_result((rh, rp))
+        except TimeoutError:
+            self._kill(proc); slot["proc"] = None
+            with self._lock: self.stats["timeouts"] += 1; self.stats["failed"] += 1
+            fut.set_exception(WorkerPoolError(f"{self.name}: job timed out after {timeout:.0f}s"))
+        except Exception as e:
+            self._kill(proc); slot["proc"] = None
+            with self._lock: self.stats["failed"] += 1
+            fut.set_exception(WorkerPoolError(f"{self.name}: worker died — {e}"))
+        finally:
+            slot["busy"] = False
+        if slot["proc"] is not None:
+            slot["jobs"] += 1
+            if self._recycle_due(slot):
+                self._kill(slot["proc"]); slot["proc"] = None
+                with self._lock: self.stats["recycled"] += 1
+
 # ── CORE FILE I/O ─────────────────────────────────────────
 def read_core(name: str) -> str:
     """Read a core identity file from ~/Forge/.cortex_brain/core/"""
@@ -86,6 +654,20 @@ def write_core(name: str, content: str):
     (CORE_DIR / name).write_text(content)
     log.info(f"Core file updated: {name}")
 
+def write_core_if_changed(name: str, content: str, current: str = None, ignore: str = None) -> bool:
+    """
+    write_core, skipped when the file already says the same thing. `ignore` is a
+    multiline regex for parts that don't count as a change (a timestamp line).
+    Returns whether the file was written.
+    """
+    import hashlib
+    if current is None: current = read_core(name)
+    digest = lambda t: hashlib.sha256((re.sub(ignore, "", t, flags=re.M) if ignore else t).encode()).digest()
+    if current and digest(current) == digest(content):
+        return False
+    write_core(name, content)
+    return True
+
 def get_agent_name() -> str:
     """Get the AI's current name from identity.md, fall back to forge.json, then 'Forge'."""
     identity = read_core("identity.md")
@@ -131,7 +713,8 @@ def workspace_notes() -> str:
 
 # ── DATABASE ──────────────────────────────────────────────
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")   # persistent; readers never block the writer
     conn.executescript("""
         CREATE TABLE IF NOT EXISTS memory (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -159,6 +742,21 @@ def init_db():
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             status TEXT, notes TEXT, timestamp TEXT
         );
+        CREATE TABLE IF NOT EXISTS skill_installs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            install_id TEXT, skill TEXT, manager TEXT, packages TEXT,
+            ok INTEGER, cached INTEGER, ms REAL, output TEXT, timestamp TEXT
+        );
+        CREATE TABLE IF NOT EXISTS memory_summaries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            agent TEXT, level TEXT, period_start TEXT, period_end TEXT, summary TEXT,
+            source_rows INTEGER, first_id INTEGER, last_id INTEGER, tokens INTEGER, created TEXT,
+            UNIQUE(agent, level, period_start)
+        );
+        CREATE TABLE IF NOT EXISTS db_size (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT, bytes INTEGER, free_bytes INTEGER, archive_bytes INTEGER, rows TEXT
+        );
         CREATE TABLE IF NOT EXISTS alarms (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -169,18 +767,116 @@ def init_db():
             last_run TEXT,
             created TEXT
         );
-    """)
+        CREATE TABLE IF NOT EXISTS task_leases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task_id TEXT, step INTEGER, kind TEXT, payload TEXT,
+            status TEXT, worker TEXT, token TEXT, lease_until REAL, attempts INTEGER DEFAULT 0,
+            result TEXT, created TEXT, updated TEXT,
+            UNIQUE(task_id, step)
+        );
+        CREATE INDEX IF NOT EXISTS idx_task_leases_status ON task_leases(status);
+        CREATE TABLE IF NOT EXISTS stats (key TEXT PRIMARY KEY, n INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID;
+    """ + _stats_triggers())
     conn.commit(); conn.close()
 
+# Row counters kept in `stats` by triggers, so /status and /usage are one indexed read.
+# Keys: "<table>" for every counted table, plus "<table>.<column>.<value>" per STATS_SPLIT column.
+# REPLACE deletes the old row without firing the DELETE trigger, so counted tables take
+# upserts (INSERT … ON CONFLICT DO UPDATE) instead.
+STATS_TABLES = ("memory", "tasks", "learnings", "agents")
+STATS_SPLIT  = {"memory": "role", "tasks": "status"}
+
+def _stats_triggers() -> str:
+    bump = ("INSERT INTO stats(key,n) VALUES({key},{d}) "
+            "ON CONFLICT(key) DO UPDATE SET n = n + excluded.n;")
+    sql = []
+    for t in STATS_TABLES:
+        col = STATS_SPLIT.get(t)
+        for ev, row, d in (("INSERT", "NEW", 1), ("DELETE", "OLD", -1)):
+            body = bump.format(key=f"'{t}'", d=d)
+            if col: body += bump.format(key=f"'{t}.{col}.' || COALESCE({row}.{col},'')", d=d)
+            sql.append(f"CREATE TRIGGER IF NOT EXISTS stats_{t}_{ev.lower()} AFTER {ev} ON {t} "
+                       f"BEGIN {body} END;")
+        if col:
+            sql.append(f"CREATE TRIGGER IF NOT EXISTS stats_{t}_{col} AFTER UPDATE OF {col} ON {t} "
+                       f"WHEN OLD.{col} IS NOT NEW.{col} BEGIN "
+                       + bump.format(key=f"'{t}.{col}.' || COALESCE(OLD.{col},'')", d=-1)
+                       + bump.format(key=f"'{t}.{col}.' || COALESCE(NEW.{col},'')", d=1) + " END;")
+    return "\n".join(sql)
+
+def _stats_actual(c) -> dict:
+    """The counters as a full scan would compute them."""
+    out = {}
+    for t in STATS_TABLES:
+        out[t] = c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+        col = STATS_SPLIT.get(t)
+        if col:
+            for v, n in c.execute(f"SELECT COALESCE({col},''), COUNT(*) FROM {t} GROUP BY 1"):
+                out[f"{t}.{col}.{v}"] = n
+    return out
+
+def stats_rebuild(c=None) -> dict:
+    """Recount every table into `stats` in one transaction."""
+    own = c is None
+    c = c or _db()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        actual = _stats_actual(c)
+        c.execute("DELETE FROM stats")
+        c.executemany("INSERT INTO stats(key,n) VALUES(?,?)", actual.items())
+        c.commit()
+    finally:
+        if own: c.close()
+    return actual
+
+def stats_read(c=None) -> dict:
+    own = c is None
+    c = c or _db()
+    try: return {k: n for k, n in c.execute("SELECT key, n FROM stats")}
+    finally:
+        if own: c.close()
+
+def stat(counts: dict, table: str, col: str = None, *values) -> int:
+    if not col: return counts.get(table, 0)
+    return sum(counts.get(f"{table}.{col}.{v}", 0) for v in values)
+
+def stats_check(repair: bool = False) -> dict:
+    """Compare the counters with real counts; with repair, rebuild them if they drifted."""
+    c = _db()
+    try:
+        c.execute("BEGIN")                       # one snapshot for both reads
+        kept, actual = stats_read(c), _stats_actual(c)
+        c.commit()
+        drift = {k: {"stored": kept.get(k, 0), "actual": actual.get(k, 0)}
+                 for k in sorted(set(kept) | set(actual)) if kept.get(k, 0) != actual.get(k, 0)}
+        if drift:
+            log.warning(f"Stats counters drifted on {len(drift)} key(s)"
+                        + (" — rebuilding" if repair else ""))
+            if repair: stats_rebuild(c)
+    finally:
+        c.close()
+    return {"ok": not drift, "drift": drift, "repaired": bool(drift and repair), "keys": len(actual)}
+
+SCHEMA_VERSION = 6   # bump when migrate_db() gains a step
+
 def migrate_db():
-    """Add new columns to existing tables — safe to run multiple times."""
+    """Add new columns to existing tables — safe to run multiple times.
+    Skipped entirely once PRAGMA user_version has reached SCHEMA_VERSION."""
     c = _db()
+    if c.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        c.close(); return
     migrations = [
         "ALTER TABLE tasks ADD COLUMN priority TEXT DEFAULT 'P3 Normal'",
         "ALTER TABLE tasks ADD COLUMN eta TEXT",
         "ALTER TABLE tasks ADD COLUMN progress INTEGER DEFAULT 0",
         "ALTER TABLE tasks ADD COLUMN description TEXT",
         "ALTER TABLE tasks ADD COLUMN assignee TEXT DEFAULT 'FORGE'",
+        "ALTER TABLE heartbeats ADD COLUMN timings TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)",
+        "CREATE INDEX IF NOT EXISTS idx_memory_ts ON memory(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_heartbeats_ts ON heartbeats(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_learnings_ts ON learnings(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_memory_agent ON memory(agent, id)",
     ]
     for sql in migrations:
         try:
@@ -208,17 +904,36 @@ def migrate_db():
             triggered_msg TEXT
         )
     """)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_alarm_logs_fired ON alarm_logs(fired_at)")
+    # Per-alarm run options (NULL = the forge.json "alarms" default) and run durations
+    for sql in ("ALTER TABLE alarms ADD COLUMN max_instances INTEGER",
+                "ALTER TABLE alarms ADD COLUMN coalesce INTEGER",
+                "ALTER TABLE alarms ADD COLUMN jitter_s INTEGER",
+                "ALTER TABLE alarm_logs ADD COLUMN duration_ms REAL"):
+        try: c.execute(sql)
+        except sqlite3.OperationalError: pass   # column already exists
+    c.commit()
+    stats_rebuild(c)     # the triggers only count from here on
+    c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     c.commit()
     c.close()
 
+DB_BUSY_TIMEOUT = 15   # seconds a writer waits on another connection (or worker process)
+
 def _db():
-    c = sqlite3.connect(DB_PATH); c.row_factory = sqlite3.Row; return c
+    slow_ms = slow_threshold("sql")
+    if slow_ms is None:
+        c = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT)
+    else:
+        c = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, factory=_TimedConnection); c.slow_ms = slow_ms
+    c.row_factory = sqlite3.Row; return c
 
 def mem_save(role: str, content: str, agent: str = "FORGE"):
-    c = _db()
-    c.execute("INSERT INTO memory(agent,role,content,timestamp) VALUES(?,?,?,?)",
-              (agent, role, content, datetime.now().isoformat()))
-    c.commit(); c.close()
+    with _span("db.write", table="memory"):
+        c = _db()
+        c.execute("INSERT INTO memory(agent,role,content,timestamp) VALUES(?,?,?,?)",
+                  (agent, role, content, datetime.now().isoformat()))
+        c.commit(); c.close()
 
 def mem_recall(agent: str = "FORGE", limit: int = 10) -> list:
     c = _db()
@@ -227,7 +942,7 @@ def mem_recall(agent: str = "FORGE", limit: int = 10) -> list:
     c.close(); return list(reversed(rows))
 
 def mem_count() -> int:
-    c = _db(); n = c.execute("SELECT COUNT(*) FROM memory").fetchone()[0]; c.close(); return n
+    return stat(stats_read(), "memory")
 
 def get_agents() -> list:
     c = _db(); rows = c.execute("SELECT * FROM agents ORDER BY id").fetchall()
@@ -238,37 +953,41 @@ def get_agent(name: str):
     c.close(); return dict(row) if row else None
 
 def save_agent(name, role, provider, model, system_prompt):
-    c = _db()
-    c.execute("INSERT OR REPLACE INTO agents(name,role,provider,model,system_prompt,created) VALUES(?,?,?,?,?,?)",
-              (name.upper(), role, provider, model, system_prompt, datetime.now().isoformat()))
-    c.commit(); c.close()
+    with _span("db.write", table="agents"):
+        c = _db()
+        c.execute("INSERT INTO agents(name,role,provider,model,system_prompt,created) VALUES(?,?,?,?,?,?) "
+                  "ON CONFLICT(name) DO UPDATE SET role=excluded.role, provider=excluded.provider, "
+                  "model=excluded.model, system_prompt=excluded.system_prompt, created=excluded.created",
+                  (name.upper(), role, provider, model, system_prompt, datetime.now().isoformat()))
+        c.commit(); c.close()
 
 def save_learning(category: str, insight: str, source: str = "conversation"):
-    c = _db()
-    c.execute("INSERT INTO learnings(category,insight,source,timestamp) VALUES(?,?,?,?)",
-              (category, insight, source, datetime.now().isoformat()))
-    c.commit(); c.close()
+    with _span("db.write", table="learnings"):
+        c = _db()
+        c.execute("INSERT INTO learnings(category,insight,source,timestamp) VALUES(?,?,?,?)",
+                  (category, insight, source, datetime.now().isoformat()))
+        c.commit(); c.close()
 
 def get_learnings(limit: int = 20) -> list:
     c = _db(); rows = c.execute("SELECT * FROM learnings ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
     c.close(); return [dict(r) for r in rows]
 
-def get_tasks_board() -> dict:
-    """Return tasks grouped into kanban columns."""
+BOARD_COLUMNS = {"backlog": "status NOT IN ('completed','running','in_progress') OR status IS NULL",
+                 "in_progress": "status IN ('running','in_progress')",
+                 "completed": "status='completed'"}
+
+def tasks_board_stream(page: dict):
+    """The kanban board — {backlog, in_progress, completed} — as JSON chunks.
+    Each column is its own page query, so limit/cursors apply per column."""
     c = _db()
-    rows = c.execute("SELECT * FROM tasks ORDER BY id DESC LIMIT 500").fetchall()
-    c.close()
-    board = {"backlog": [], "in_progress": [], "completed": []}
-    for r in rows:
-        d = dict(r)
-        s = d.get("status", "pending")
-        if s == "completed":
-            board["completed"].append(d)
-        elif s in ("running", "in_progress"):
-            board["in_progress"].append(d)
-        else:
-            board["backlog"].append(d)
-    return board
+    try:
+        yield b"{"
+        for i, (col, where) in enumerate(BOARD_COLUMNS.items()):
+            yield (", " if i else "").encode() + json.dumps(col).encode() + b": "
+            yield from json_rows(page_query(c, "tasks", page, where)[0])
+        yield b"}"
+    finally:
+        c.close()
 
 def create_task_db(title, description, priority, assignee, eta) -> int:
     c = _db()
@@ -297,22 +1016,15 @@ def delete_task_db(task_id: int):
     c.execute("DELETE FROM tasks WHERE id=?", (task_id,)); c.commit(); c.close()
 
 def get_usage_stats() -> dict:
-    c = _db()
-    total_msgs  = c.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
-    user_msgs   = c.execute("SELECT COUNT(*) FROM memory WHERE role='user'").fetchone()[0]
-    ai_msgs     = c.execute("SELECT COUNT(*) FROM memory WHERE role='assistant'").fetchone()[0]
-    tasks_total = c.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
-    tasks_done  = c.execute("SELECT COUNT(*) FROM tasks WHERE status='completed'").fetchone()[0]
-    tasks_pend  = c.execute("SELECT COUNT(*) FROM tasks WHERE status='pending'").fetchone()[0]
-    tasks_run   = c.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('running','in_progress')").fetchone()[0]
-    learnings   = c.execute("SELECT COUNT(*) FROM learnings").fetchone()[0]
-    agents      = c.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
-    c.close()
+    n = stats_read()
     return {
-        "messages_total": total_msgs, "messages_user": user_msgs, "messages_ai": ai_msgs,
-        "tasks_total": tasks_total, "tasks_done": tasks_done,
-        "tasks_pending": tasks_pend, "tasks_running": tasks_run,
-        "learnings": learnings, "agents": agents,
+        "messages_total": stat(n, "memory"),
+        "messages_user": stat(n, "memory", "role", "user"),
+        "messages_ai": stat(n, "memory", "role", "assistant"),
+        "tasks_total": stat(n, "tasks"), "tasks_done": stat(n, "tasks", "status", "completed"),
+        "tasks_pending": stat(n, "tasks", "status", "pending"),
+        "tasks_running": stat(n, "tasks", "status", "running", "in_progress"),
+        "learnings": stat(n, "learnings"), "agents": stat(n, "agents"),
     }
 
 # ── SYSTEM PROMPT — reads from markdown files ─────────────
@@ -641,6 +1353,15 @@ def _is_deep_task(message):
     matches = sum(1 for k in DEEP_KEYWORDS if k in msg)
     return matches >= 2 and len(msg.split()) > 8
 
+# ForgeAI.call reports provider failures as the reply text instead of raising; callers
+# that store a reply rather than show it check it with call_failed first
+_CALL_FAILURE = re.compile(
+    r"(?:\w+(?: API)? error: |Cursor agent failed: |Request timed out\.$|No auth configured\."
+    r"|All CLI methods failed\.|Auth failed\. Run: |\w+ key not configured\.)")
+
+def call_failed(reply: str) -> bool:
+    return not (reply or "").strip() or bool(_CALL_FAILURE.match(reply.strip()))
+
 
 class ForgeAI:
 
@@ -686,13 +1407,15 @@ class ForgeAI:
                 except Exception as _e:
                     log.warning(f"OpenAI: failed to load openai_token.json: {_e}")
 
-        if provider == "cursor_bg":  return ForgeAI._cursor_bg(system, messages, active_model_key, cfg)
-        if provider == "cursor":    return ForgeAI._cursor_call(system, messages, active_model_key, cfg)
-        if provider == "google":    return ForgeAI._gemini_call(system, messages, model, model_key)
-        if provider == "openai":    return cls._openai(system, messages, model, model_key)
-        if provider == "byteplus":  return cls._byteplus(system, messages, model, key)
-        if provider == "moonshot":  return cls._moonshot(system, messages, model, key)
-        return cls._anthropic(system, messages, model, cfg)
+        with _span("provider.call", provider=provider, model=model), \
+             _slow("provider", f"{provider}/{model}", f"{len(messages)} msgs, system {len(system)} chars"):
+            if provider == "cursor_bg":  return ForgeAI._cursor_bg(system, messages, active_model_key, cfg)
+            if provider == "cursor":    return ForgeAI._cursor_call(system, messages, active_model_key, cfg)
+            if provider == "google":    return ForgeAI._gemini_call(system, messages, model, model_key)
+            if provider == "openai":    return cls._openai(system, messages, model, model_key)
+            if provider == "byteplus":  return cls._byteplus(system, messages, model, key)
+            if provider == "moonshot":  return cls._moonshot(system, messages, model, key)
+            return cls._anthropic(system, messages, model, cfg)
 
     @classmethod
     def _anthropic(cls, system, messages, model, cfg):
@@ -723,7 +1446,7 @@ class ForgeAI:
 
             env = os.environ.copy()
             env["CLAUDE_CODE_OAUTH_TOKEN"] = oauth_token
-            env["PATH"] = "/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin:" + env.get("PATH", "")
+            env["PATH"] = BIN_PATH + ":" + env.get("PATH", "")
 
             try:
                 import json as _json
@@ -747,10 +1470,11 @@ class ForgeAI:
                             "--dangerously-skip-permissions", "--model", "sonnet",
                             "--system-prompt", system[:3000], last]
 
-                r = subprocess.run(
-                    args, capture_output=True, text=True, timeout=120,
-                    env=env, cwd=str(HOME)
-                )
+                with _span("subprocess.claude", resume=bool(session_id)):
+                    r = subprocess.run(
+                        args, capture_output=True, text=True, timeout=120,
+                        env=env, cwd=str(HOME)
+                    )
 
                 if r.returncode == 0 and r.stdout.strip():
                     log.info("claude: success")
@@ -1031,59 +1755,209 @@ def is_first_contact() -> bool:
     return not FIRST_CONTACT_FLAG.exists()
 
 # ── DIRECTIVE PARSER ──────────────────────────────────────
-def parse_directives(response: str, cfg: dict) -> str:
-    """Parse and execute all directives embedded in AI responses."""
-
-    # ── Core file updates ─────────────────────────────────
-    for m in re.finditer(r"__UPDATE_CORE__([a-zA-Z_.]+\.md)__(.+?)__END__", response, re.DOTALL):
-        fname, body = m.group(1), m.group(2).strip()
-        allowed = {"soul.md","identity.md","character.md","memory.md","tools.md","heartbeat.md","god_mode.md"}
-        if fname in allowed:
-            write_core(fname, body)
-            response = response.replace(m.group(0), f"[✓ Updated {fname}]")
-
-    # ── Agent spawning ────────────────────────────────────
-    for m in re.finditer(r"__SPAWN__:\s*(\{.+?\})__END__", response, re.DOTALL):
-        try:
-            data  = json.loads(m.group(1))
-            name  = data.get("name","").strip().upper()
-            role  = data.get("role","").strip()
-            prov  = data.get("provider","anthropic")
-            model = data.get("model","claude-sonnet-4-6")
-            if name and role:
-                sys_p = build_system_prompt(cfg=cfg)
-                gen   = ForgeAI.call(sys_p, [{"role":"user","content":
-                    f"Write a precise 150-word system prompt for agent {name}, role: {role}. Direct and operational."}], cfg=cfg)
-                save_agent(name, role, prov, model, gen)
-                response = response.replace(m.group(0), f"[✓ Agent {name} spawned — {role}]")
-                log.info(f"Agent spawned: {name}")
-        except Exception as e:
-            log.error(f"Spawn parse error: {e}")
+# Every directive ends at the first __END__ after its opening tag. One regex with an
+# alternative per directive finds them all in a single left-to-right pass; the reply is
+# rebuilt from segments, so a directive's handler sees exactly its own block and the
+# cost stays linear however many directives a reply carries. A handler returns the
+# replacement text, or None to leave the block as written. `awaited` is true when a
+# later directive in the reply depends on it (see directive_plan): a handler that
+# starts a background job must then see the job through instead of replying early.
+DIRECTIVE_RE = re.compile(
+    r"__UPDATE_CORE__(?P<core_file>[a-zA-Z_.]+\.md)__(?P<core_body>.+?)__END__"
+    r"|__SPAWN__:\s*(?P<spawn>\{.+?\})__END__"
+    r"|__INSTALL_SKILL__(?P<install>\{.+?\})__END__"
+    r"|__RUN__(?P<run_lang>python|bash|node)\n(?P<run_code>.+?)__END__"
+    r"|__SAVE__(?P<save_path>[^\n]+)__\n(?P<save_body>.+?)__END__",
+    re.DOTALL)
+
+CORE_WRITABLE = {"soul.md","identity.md","character.md","memory.md","tools.md","heartbeat.md","god_mode.md"}
+
+# ── Core file updates ─────────────────────────────────────
+# Syntax: __UPDATE_CORE__memory.md__new full content__END__
+def _directive_update_core(m, cfg, awaited=False):
+    fname, body = m.group("core_file"), m.group("core_body").strip()
+    if fname not in CORE_WRITABLE: return None
+    with _span("directive.update_core", file=fname):
+        write_core(fname, body)
+    return f"[✓ Updated {fname}]"
+
+# ── Agent spawning ────────────────────────────────────────
+# Syntax: __SPAWN__:{"name":"NAME","role":"ROLE","provider":"anthropic","model":"..."}__END__
+def _directive_spawn(m, cfg, awaited=False):
+    try:
+        data  = json.loads(m.group("spawn"))
+        name  = data.get("name","").strip().upper()
+        role  = data.get("role","").strip()
+        prov  = data.get("provider","anthropic")
+        model = data.get("model","claude-sonnet-4-6")
+        if not (name and role): return None
+        with _span("directive.spawn", agent=name):
+            sys_p = build_system_prompt(cfg=cfg)
+            gen   = ForgeAI.call(sys_p, [{"role":"user","content":
+                f"Write a precise 150-word system prompt for agent {name}, role: {role}. Direct and operational."}], cfg=cfg)
+            save_agent(name, role, prov, model, gen)
+        log.info(f"Agent spawned: {name}")
+        return f"[✓ Agent {name} spawned — {role}]"
+    except Exception as e:
+        log.error(f"Spawn parse error: {e}")
+        return None
 
-    # ── Skill installation ────────────────────────────────
-    # Syntax: __INSTALL_SKILL__{"name":"x","pip":"pkg","code":"...","test":"...","description":"..."}__END__
-    for m in re.finditer(r"__INSTALL_SKILL__(\{.+?\})__END__", response, re.DOTALL):
+# ── Skill installation ────────────────────────────────────
+# Syntax: __INSTALL_SKILL__{"name":"x","pip":"pkg","code":"...","test":"...","description":"..."}__END__
+def _directive_install_skill(m, cfg, awaited=False):
+    try:
+        x = cfg.get("skills", {})
+        with _span("directive.install_skill", awaited=awaited):
+            job = install_skill_async(json.loads(m.group("install")), cfg)
+            # a later __RUN__ importing the package or __SPAWN__ reading tools.md needs it finished
+            job.done.wait(float(x.get("install_timeout", 600)) if awaited else float(x.get("install_wait_s", 20)))
+        return job.result or (f"[… Skill '{job.name}' still installing in the background — "
+                              f"GET /skill/install/{job.id}]")
+    except Exception as e:
+        return f"[Skill install error: {e}]"
+
+# ── Execute code directly ─────────────────────────────────
+# Syntax: __RUN__python\ncode here__END__
+def _directive_run(m, cfg, awaited=False):
+    lang, code = m.group("run_lang"), m.group("run_code").strip()
+    # runs as a job: a long one gets its id and output so far instead of holding the turn,
+    # unless a later directive needs it finished (a pip install before the code using it)
+    x = cfg.get("exec", {})
+    with _span("directive.run", lang=lang, awaited=awaited):
+        timeout = int(x.get("directive_timeout_s", 60))
+        job = exec_job_start(lang, code, timeout, source="directive")
+        job.wait(timeout + 5 if awaited else float(x.get("inline_wait_s", 20)))
+    return f"[Output]\n{job.result()}"
+
+# ── Save file to workspace ────────────────────────────────
+# Syntax: __SAVE__relative/path.ext__\ncontent__END__
+def _directive_save(m, cfg, awaited=False):
+    rel_path, body = m.group("save_path").strip(), m.group("save_body")
+    with _span("directive.save", path=rel_path[:80]):
+        return save_to_workspace(rel_path, body)
+
+# keyed by each alternative's last group, which is what Match.lastgroup reports
+DIRECTIVE_HANDLERS = {
+    "core_body": _directive_update_core,
+    "spawn":     _directive_spawn,
+    "install":   _directive_install_skill,
+    "run_code":  _directive_run,
+    "save_body": _directive_save,
+}
+DIRECTIVE_KINDS = {"core_body": "update_core", "spawn": "spawn", "install": "install_skill",
+                   "run_code": "run", "save_body": "save"}
+
+# ── Planner ───────────────────────────────────────────────
+# Directives in one reply run concurrently unless a later one depends on an earlier
+# one. Each directive says what it reads and writes; a directive waits for every
+# earlier one that writes something it touches, or reads something it writes:
+#   __UPDATE_CORE__ f   writes core:f
+#   __SPAWN__ NAME      reads every core file (its prompt is built from them), writes agent:NAME
+#   __INSTALL_SKILL__   writes skill:name, core:tools.md and the installed packages
+#   __RUN__             writes the workspace and the installed packages
+#   __SAVE__ path       reads the workspace, writes file:<base name>
+# Code can touch any file, directory or package without naming it, so __RUN__ blocks
+# keep reply order among themselves and with saves and installs; only the other
+# directives with disjoint resources overlap. Saves are compared by base name — a
+# false dependency only costs concurrency.
+# forge.json "directives": concurrency (4), async (false: the reply waits for them)
+
+def _directive_resources(m) -> tuple:
+    kind = m.lastgroup
+    if kind == "core_body":
+        return set(), {f"core:{m.group('core_file')}"}
+    if kind == "spawn":
+        try: name = str(json.loads(m.group("spawn")).get("name", "")).strip().upper()
+        except Exception: name = ""
+        return {f"core:{f}" for f in CORE_WRITABLE}, {f"agent:{name}"}
+    if kind == "install":
+        try: name = str(json.loads(m.group("install")).get("name", "skill")).lower()
+        except Exception: name = ""
+        return set(), {f"skill:{name}", "core:tools.md", "packages"}
+    if kind == "run_code":
+        return set(), {"workspace", "packages"}
+    return {"workspace"}, {"file:" + m.group("save_path").strip().rsplit("/", 1)[-1]}
+
+def directive_plan(matches: list) -> list:
+    """For each directive, the earlier directives it has to wait for (the rest follow transitively)."""
+    last_write, readers, deps = {}, {}, []
+    for i, m in enumerate(matches):
+        reads, writes = _directive_resources(m)
+        d = {last_write[r] for r in reads | writes if r in last_write}
+        for r in writes:
+            d.update(readers.pop(r, ()))
+            last_write[r] = i
+        for r in reads - writes:
+            readers.setdefault(r, []).append(i)
+        deps.append(sorted(d))
+    return deps
+
+def run_directives(matches: list, cfg: dict, on_result=None) -> list:
+    """Run matched directives per directive_plan; results (or None) in match order."""
+    from concurrent.futures import ThreadPoolExecutor, wait
+    deps = directive_plan(matches)
+    awaited = {j for d in deps for j in d}
+
+    futs = []
+
+    def one(i, m):
+        if deps[i] and futs: wait([futs[j] for j in deps[i]])
+        t0 = time.perf_counter()
         try:
-            result = install_skill(json.loads(m.group(1)), cfg)
-            response = response.replace(m.group(0), result)
+            result = DIRECTIVE_HANDLERS[m.lastgroup](m, cfg, i in awaited)
         except Exception as e:
-            response = response.replace(m.group(0), f"[Skill install error: {e}]")
-
-    # ── Execute code directly ─────────────────────────────
-    # Syntax: __RUN__python\ncode here__END__
-    for m in re.finditer(r"__RUN__(python|bash|node)\n(.+?)__END__", response, re.DOTALL):
-        lang, code = m.group(1), m.group(2).strip()
-        result = execute_code(lang, code)
-        response = response.replace(m.group(0), f"[Output]\n{result}")
-
-    # ── Save file to workspace ────────────────────────────
-    # Syntax: __SAVE__relative/path.ext__\ncontent__END__
-    for m in re.finditer(r"__SAVE__([^\n]+)__\n(.+?)__END__", response, re.DOTALL):
-        rel_path, body = m.group(1).strip(), m.group(2)
-        result = save_to_workspace(rel_path, body)
-        response = response.replace(m.group(0), result)
-
-    return response
+            log.error(f"Directive {DIRECTIVE_KINDS[m.lastgroup]} failed: {e}")
+            result = f"[Directive error: {e}]"
+        metric_observe(f"directive.{DIRECTIVE_KINDS[m.lastgroup]}_ms", (time.perf_counter() - t0) * 1000)
+        if on_result: on_result(i, m, result)
+        return result
+
+    workers = min(int(cfg.get("directives", {}).get("concurrency", 4)), len(matches))
+    if workers <= 1:
+        return [one(i, m) for i, m in enumerate(matches)]
+    # submitted in reply order and deps only point back, so the oldest unfinished
+    # directive always holds a thread and has its deps done — waiting can't deadlock
+    run = _trace_bind(one)
+    with ThreadPoolExecutor(workers, thread_name_prefix="directive") as ex:
+        for i, m in enumerate(matches):
+            futs.append(ex.submit(run, i, m))
+    return [f.result() for f in futs]
+
+def _splice(response: str, matches: list, results: list) -> str:
+    out, pos = [], 0
+    for m, result in zip(matches, results):
+        out.append(response[pos:m.start()])
+        out.append(m.group(0) if result is None else result)
+        pos = m.end()
+    out.append(response[pos:])
+    return "".join(out)
+
+def parse_directives(response: str, cfg: dict, background: bool = False, on_done=None) -> str:
+    """
+    Parse and execute all directives embedded in AI responses. With background=True the
+    reply comes back at once with a placeholder per directive; each result is published
+    as a "directive" event, then "directives_done" carries the finished reply, which is
+    also passed to on_done.
+    """
+    matches = list(DIRECTIVE_RE.finditer(response)) if "__" in response else []
+    if not matches:
+        if on_done: on_done(response)
+        return response
+    if not background:
+        return _splice(response, matches, run_directives(matches, cfg))
+
+    batch = os.urandom(4).hex()
+    def publish(i, m, result):
+        event_publish("directive", batch=batch, index=i, kind=DIRECTIVE_KINDS[m.lastgroup],
+                      result=m.group(0) if result is None else result)
+    def run():
+        final = _splice(response, matches, run_directives(matches, cfg, publish))
+        event_publish("directives_done", batch=batch, response=final)
+        if on_done: on_done(final)
+    threading.Thread(target=run, name=f"directives-{batch}", daemon=True).start()
+    return _splice(response, matches, [f"[… {DIRECTIVE_KINDS[m.lastgroup]} running — "
+                                       f"result on /events as directive {batch}/{i}]"
+                                       for i, m in enumerate(matches)])
 
 
 # ── SKILL SYSTEM ──────────────────────────────────────────
@@ -1108,26 +1982,15 @@ def install_skill(data: dict, cfg: dict) -> str:
     name  = re.sub(r"[^a-zA-Z0-9_]", "_", data.get("name","skill").lower())
     steps = []
 
-    def install_packages(cmd_prefix, packages, label):
-        pkgs = packages if isinstance(packages, list) else [packages]
-        for pkg in pkgs:
-            try:
-                r = subprocess.run(cmd_prefix + [pkg], capture_output=True, text=True, timeout=180)
-                steps.append(f"{label} {pkg}: {'OK' if r.returncode==0 else r.stderr[:80]}")
-            except Exception as e:
-                steps.append(f"{label} {pkg}: failed — {e}")
-
-    if data.get("pip"):
-        install_packages(["pip3","install","--quiet","--break-system-packages"], data["pip"], "pip")
-    if data.get("npm"):
-        install_packages(["npm","install","-g","--quiet"], data["npm"], "npm")
-    if data.get("brew"):
-        install_packages(["brew","install","--quiet"], data["brew"], "brew")
+    for r in install_packages(data, skill=name, install_id=data.get("_install_id", "")):
+        state = ("OK (cached)" if r["cached"] else "OK") if r["ok"] else " ".join(r["output"][-160:].split())
+        steps.append(f"{r['manager']} {' '.join(r['packages'])}: {state} [{r['ms'] / 1000:.1f}s]")
 
     # Save skill code
     if data.get("code"):
         skill_file = SKILLS_DIR / f"{name}.py"
         skill_file.write_text(data["code"])
+        skill_registry.forget(name)
         steps.append(f"Saved: ~/.forge/skills/{name}.py")
 
     # Test
@@ -1156,31 +2019,584 @@ def install_skill(data: dict, cfg: dict) -> str:
     return f"[✓ Skill '{name}' — {status}]\n" + "\n".join(steps)
 
 
+# Skill files are parsed and imported once and kept in memory. Every lookup stats the
+# file; a changed mtime/size re-reads it, and only a changed sha256 re-parses the
+# metadata and drops the imported module, so the next call imports the new code.
+class SkillRegistry:
+    def __init__(self, root: Path):
+        self.root   = root
+        self._lock  = threading.Lock()
+        self._entry = {}               # stem → metadata, stat, hash, module, call stats
+        self._load_locks = {}
+
+    @staticmethod
+    def _parse(stem: str, text: str) -> dict:
+        lines = text.split("\n")
+        name  = next((l for l in lines if l.startswith("Skill:")), "").replace("Skill:", "").strip() or stem
+        # description: first prose line of the docstring (what /skills/list shows);
+        # summary: first non-docstring-fence line, comments unwrapped (what the prompt gets)
+        desc  = next((l.strip().strip('"').strip("'") for l in lines[1:8]
+                      if l.strip() and not l.strip().startswith(
+                          ('"""', "'''", "#", "Skill:", "Usage:", "Requires:", "Setup:"))), stem)
+        summ  = next((l.strip().lstrip("#").strip() for l in lines[:5]
+                      if l.strip() and not l.startswith('"""')), stem)
+        usage = next((l.strip()[len("Usage:"):].strip() for l in lines[:30] if l.strip().startswith("Usage:")), "")
+        return {"name": name, "description": desc, "summary": summ, "usage": usage}
+
+    def _fresh(self, stem: str):
+        """The entry for stem, re-read if the file changed since last time; None if it's gone."""
+        f = self.root / f"{stem}.py"
+        try:
+            st = f.stat()
+        except OSError:
+            with self._lock: self._entry.pop(stem, None)
+            return None
+        with self._lock:
+            e = self._entry.get(stem)
+            if e and e["stat"] == (st.st_mtime_ns, st.st_size):
+                return e
+        try:
+            raw = f.read_bytes()
+        except OSError:
+            return None
+        import hashlib
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            e = self._entry.get(stem)
+            if e and e["sha256"] == digest:
+                e["stat"] = (st.st_mtime_ns, st.st_size)       # touched, not changed
+                return e
+            text = raw.decode("utf-8", "replace")
+            fresh = {"stem": stem, "file": f, "stat": (st.st_mtime_ns, st.st_size), "size": st.st_size,
+                     "sha256": digest, "code": text, **self._parse(stem, text), "module": None,
+                     "loads": 0, "load_ms": 0.0, "calls": 0, "errors": 0, "total_ms": 0.0,
+                     "last_ms": None, "last_error": ""}
+            if e:   # keep the counters across edits of the same skill
+                for k in ("loads", "load_ms", "calls", "errors", "total_ms", "last_ms", "last_error"):
+                    fresh[k] = e[k]
+            self._entry[stem] = fresh
+            return fresh
+
+    def scan(self) -> list:
+        """Every skill file's entry, sorted by stem — files that changed since the last scan are re-read."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        stems = sorted(f.stem for f in self.root.glob("*.py"))
+        with self._lock:
+            for gone in set(self._entry) - set(stems): del self._entry[gone]
+        return [e for e in map(self._fresh, stems) if e]
+
+    def forget(self, stem: str):
+        """Drop a skill's cached module and metadata (after it's saved, installed or deleted)."""
+        with self._lock:
+            e = self._entry.get(stem)
+            if e: e["stat"], e["sha256"], e["module"] = None, None, None
+
+    def module(self, stem: str):
+        import importlib.util
+        e = self._fresh(stem)
+        if e is None: return None, None
+        with self._lock:
+            lock = self._load_locks.setdefault(stem, threading.Lock())
+        with lock:
+            if e["module"] is None:
+                t0 = time.perf_counter()
+                with _span("skill.load", skill=stem):
+                    spec   = importlib.util.spec_from_file_location(stem, e["file"])
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
+                e["module"] = module
+                e["loads"] += 1; e["load_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return e, e["module"]
+
+    def get(self, stem: str):
+        """The metadata entry for a skill (no import), or None."""
+        return self._fresh(stem)
+
+    def run(self, name: str, *args, **kwargs):
+        """Import (if needed) and run a skill here. Returns (result text, error or "")."""
+        try:
+            e, module = self.module(name)
+            if e is None:
+                return f"Skill '{name}' not found. Install it first.", "not found"
+            if not hasattr(module, "run"):
+                return f"Skill '{name}' has no run() function.", "no run()"
+            with _span("skill.call", skill=name):
+                result = module.run(*args, **kwargs)
+            return (str(result) if result is not None else "Done"), ""
+        except Exception as ex:
+            err = str(ex) or type(ex).__name__
+            return f"Skill error: {err}", err
+
+    def record(self, stem: str, ms: float, err: str = ""):
+        with self._lock:
+            e = self._entry.get(stem)
+            if e is None: return
+            e["calls"] += 1; e["total_ms"] += ms; e["last_ms"] = round(ms, 1)
+            if err: e["errors"] += 1; e["last_error"] = err[:200]
+        metric_observe("skill.call_ms", ms)
+        if err: metric_inc("skill.errors")
+
+    def call(self, name: str, *args, **kwargs) -> str:
+        """Run a skill in this process and record its latency."""
+        t0 = time.perf_counter()
+        result, err = self.run(name, *args, **kwargs)
+        self.record(name, (time.perf_counter() - t0) * 1000, err)
+        return result
+
+    def info(self, e: dict) -> dict:
+        return {"name": e["name"], "stem": e["stem"], "file": f"{e['stem']}.py", "description": e["description"],
+                "usage": e["usage"], "size": e["size"], "sha256": e["sha256"],
+                "loaded": e["module"] is not None, "loads": e["loads"], "load_ms": e["load_ms"],
+                "calls": e["calls"], "errors": e["errors"], "last_ms": e["last_ms"],
+                "avg_ms": round(e["total_ms"] / e["calls"], 1) if e["calls"] else None,
+                "last_error": e["last_error"]}
+
+    def stats(self) -> list:
+        return [self.info(e) for e in self.scan()]
+
+skill_registry = SkillRegistry(SKILLS_DIR)
+
+
+# ── SKILL WORKERS ─────────────────────────────────────────
+# Skill code runs in `daemon.py --skill-worker` processes, each with its own
+# SkillRegistry, so imports stay warm per worker while a slow, crashing or leaky
+# skill costs a worker instead of a handler thread and the daemon's RSS. A call
+# that overruns its timeout takes its worker down with it; workers are recycled
+# after recycle_after calls or past max_rss_mb. With max_mem_mb set they also run
+# under an address-space ceiling, so a runaway allocation fails inside the skill (off
+# by default, as for exec: numpy and torch reserve far more than they use).
+# forge.json "skills": pool (true), workers (2), queue (64), timeout (60),
+#   queue_wait_s (60), recycle_after (500), max_rss_mb (512), max_mem_mb (0 = no limit),
+#   batch_max (1000)
+_skill_pool      = None
+_skill_pool_lock = threading.Lock()
+
+def skill_pool():
+    """The skill worker pool, or None when forge.json skills.pool is false."""
+    global _skill_pool
+    x = load_cfg_cached().get("skills", {})
+    if x.get("pool", True) is False:
+        return None
+    with _skill_pool_lock:
+        if _skill_pool is None:
+            _skill_pool = WorkerPool(
+                "skills", "skill-worker", size=int(x.get("workers", 2)),
+                queue_max=int(x.get("queue", 64)), timeout=float(x.get("timeout", 60)), hello_timeout=60,
+                queue_wait_s=float(x.get("queue_wait_s", 60)),
+                recycle_after=int(x.get("recycle_after", 500)), max_rss_mb=int(x.get("max_rss_mb", 512)),
+                env={"FORGE_SKILL_MAX_MEM_MB": str(int(x.get("max_mem_mb", 0)))})
+        return _skill_pool
+
+def _skill_worker_main() -> int:
+    """Entry point for `daemon.py --skill-worker`: call skills from a warm registry until stdin closes."""
+    import resource
+    os.environ["PATH"] = BIN_PATH + ":" + os.environ.get("PATH", "")
+    os.environ["PYTHONPATH"] = str(SKILLS_DIR) + ":" + os.environ.get("PYTHONPATH", "")
+    sys.path.insert(0, str(SKILLS_DIR))
+    mem = int(os.environ.get("FORGE_SKILL_MAX_MEM_MB", "0"))
+    if mem > 0:
+        try: resource.setrlimit(resource.RLIMIT_AS, (mem * 1024 * 1024, mem * 1024 * 1024))
+        except (ValueError, OSError): pass
+    registry = SkillRegistry(SKILLS_DIR)
+
+    def handle(h, p, emit):
+        call = json.loads(p) if p else {}
+        result, err = registry.run(h["name"], *call.get("args", []), **call.get("kwargs", {}))
+        return {"result": result, "error": err}, b""
+    return worker_serve(handle, {"max_mem_mb": mem})
+
+def _skill_submit(pool, name: str, args, kwargs, timeout: float = None):
+    return pool.submit({"op": "call", "name": name},
+                       json.dumps({"args": list(args), "kwargs": kwargs}, default=str).encode(), timeout)
+
+def _skill_reply(pool, name: str, fut, timeout: float = None) -> dict:
+    """Wait for one pooled call: {"result", "error", "ms"}. Pool failures come back as skill errors."""
+    t0 = time.perf_counter()
+    try:
+        rh, _ = pool.wait(fut, timeout)
+        if not rh.get("ok"): raise WorkerPoolError(rh.get("error", "skill worker failed"))
+        return {"result": rh["result"], "error": rh["error"], "ms": rh.get("ms", 0.0)}
+    except WorkerPoolError as e:
+        err = str(e) or "timed out"
+        return {"result": f"Skill error: {err}", "error": err, "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+# ── SKILL INSTALLS ────────────────────────────────────────
+# A skill's packages go in one invocation per package manager, the managers in
+# parallel. pip first builds everything (dependencies included) into a local
+# wheel directory and installs from there with --no-index, so a reinstall, or a
+# new skill sharing dependencies, needs no network; npm installs with its own
+# cache and --prefer-offline. Installs run one at a time in the background —
+# a directive waits skills.install_wait_s (20) before replying with the install id —
+# or up to install_timeout when a later directive in the reply depends on it.
+# Per-manager timings go to the skill_installs table.
+# forge.json "skills": install_timeout (600), install_wait_s (20)
+PKG_CACHE = FORGE_CFG / "pkgcache"     # wheels/ and npm/
+
+def _pkg_run(cmd: list, timeout: float):
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        return r.returncode == 0, (r.stderr or r.stdout).strip()
+    except subprocess.TimeoutExpired:
+        return False, f"timed out after {timeout:.0f}s"
+    except Exception as e:
+        return False, str(e)
+
+def _pip_install(pkgs: list, timeout: float):
+    """(ok, output, cached): from the wheel cache if it has everything, else fill it first."""
+    wheels = PKG_CACHE / "wheels"
+    wheels.mkdir(parents=True, exist_ok=True)
+    offline = ["pip3", "install", "--quiet", "--break-system-packages",
+               "--no-index", "--find-links", str(wheels), *pkgs]
+    ok, out = _pkg_run(offline, timeout)
+    if ok: return True, out, True
+    ok, out = _pkg_run(["pip3", "wheel", "--quiet", "--wheel-dir", str(wheels),
+                        "--find-links", str(wheels), *pkgs], timeout)
+    if ok:
+        ok, out = _pkg_run(offline, timeout)
+        if ok: return True, out, False
+    # no wheel for something (or pip too old for the flags): plain install, uncached
+    ok, out = _pkg_run(["pip3", "install", "--quiet", "--break-system-packages", *pkgs], timeout)
+    return ok, out, False
+
+def _npm_install(pkgs: list, timeout: float):
+    ok, out = _pkg_run(["npm", "install", "-g", "--quiet", "--prefer-offline",
+                        "--cache", str(PKG_CACHE / "npm"), *pkgs], timeout)
+    return ok, out, False
+
+def _brew_install(pkgs: list, timeout: float):
+    ok, out = _pkg_run(["brew", "install", "--quiet", *pkgs], timeout)
+    return ok, out, False
+
+PKG_MANAGERS = {"pip": _pip_install, "npm": _npm_install, "brew": _brew_install}
+
+def install_packages(spec: dict, skill: str = "", install_id: str = "") -> list:
+    """
+    Install spec["pip"], spec["npm"], spec["brew"] (str or list each), one command per
+    manager, managers concurrently. Returns [{manager, packages, ok, cached, ms, output}].
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    timeout = float(load_cfg_cached().get("skills", {}).get("install_timeout", 600))
+    todo = {m: ([spec[m]] if isinstance(spec[m], str) else list(spec[m]))
+            for m in PKG_MANAGERS if spec.get(m)}
+
+    def one(manager):
+        t0 = time.perf_counter()
+        with _span("skill.install", manager=manager):
+            ok, out, cached = PKG_MANAGERS[manager](todo[manager], timeout)
+        return {"manager": manager, "packages": todo[manager], "ok": ok, "cached": cached,
+                "ms": round((time.perf_counter() - t0) * 1000, 1), "output": out[-2000:]}
+
+    if not todo: return []
+    with ThreadPoolExecutor(len(todo), thread_name_prefix="install") as ex:
+        results = list(ex.map(one, todo))
+    c = _db()
+    c.executemany("INSERT INTO skill_installs(install_id,skill,manager,packages,ok,cached,ms,output,timestamp) "
+                  "VALUES(?,?,?,?,?,?,?,?,?)",
+                  [(install_id, skill, r["manager"], " ".join(r["packages"]), int(r["ok"]), int(r["cached"]),
+                    r["ms"], r["output"], datetime.now().isoformat()) for r in results])
+    c.commit(); c.close()
+    for r in results:
+        metric_observe(f"skill.install.{r['manager']}_ms", r["ms"])
+    return results
+
+class SkillInstall:
+    def __init__(self, data: dict, cfg: dict):
+        self.id, self.data, self.cfg = os.urandom(6).hex(), data, cfg
+        self.name = re.sub(r"[^a-zA-Z0-9_]", "_", data.get("name","skill").lower())
+        self.status, self.result = "queued", ""
+        self.created, self.started, self.ended = time.time(), None, None
+        self.done = threading.Event()
+
+    def info(self) -> dict:
+        end = self.ended or time.time()
+        return {"install_id": self.id, "skill": self.name, "status": self.status, "result": self.result,
+                "created": self.created, "started": self.started, "ended": self.ended,
+                "ms": round((end - self.started) * 1000, 1) if self.started else None}
+
+_installs      = OrderedDict()         # install id → SkillInstall, oldest first
+_installs_lock = threading.Lock()
+_install_run   = threading.Lock()      # one install at a time — concurrent pip runs trip over each other
+
+def install_skill_async(data: dict, cfg: dict) -> SkillInstall:
+    """Start install_skill in the background; returns at once."""
+    job = SkillInstall(data, cfg)
+    with _installs_lock:
+        _installs[job.id] = job
+        while len(_installs) > 50:
+            _installs.popitem(last=False)
+
+    def run():
+        with _install_run:
+            job.status, job.started = "running", time.time()
+            try:
+                job.result = install_skill({**data, "_install_id": job.id}, cfg)
+                job.status = "done"
+            except Exception as e:
+                job.result, job.status = f"[Skill install error: {e}]", "failed"
+            job.ended = time.time()
+            job.done.set()
+    threading.Thread(target=run, name=f"install-{job.id}", daemon=True).start()
+    return job
+
+def skill_install(install_id: str):
+    with _installs_lock:
+        return _installs.get(install_id)
+
+def skill_installs(limit: int = 50) -> dict:
+    with _installs_lock:
+        live = [j.info() for j in reversed(_installs.values())]
+    c = _db()
+    rows = c.execute("SELECT * FROM skill_installs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    c.close()
+    return {"installs": live, "timings": [dict(r) for r in rows]}
+
+
 def call_skill(name: str, *args, **kwargs) -> str:
     """Call a previously installed skill by name."""
-    skill_file = SKILLS_DIR / f"{name}.py"
-    if not skill_file.exists():
+    return run_skill(name, args, kwargs)
+
+def run_skill(name: str, args=(), kwargs: dict = None, timeout: float = None) -> str:
+    """call_skill with an explicit per-call timeout (default skills.timeout)."""
+    kwargs = kwargs or {}
+    pool = skill_pool()
+    if pool is None or not pool.available:
+        return skill_registry.call(name, *args, **kwargs)
+    if skill_registry.get(name) is None:
         return f"Skill '{name}' not found. Install it first."
-    try:
-        import importlib.util
-        spec   = importlib.util.spec_from_file_location(name, skill_file)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        if hasattr(module, "run"):
-            result = module.run(*args, **kwargs)
-            return str(result) if result is not None else "Done"
-        return f"Skill '{name}' has no run() function."
-    except Exception as e:
-        return f"Skill error: {e}"
+    r = _skill_reply(pool, name, _skill_submit(pool, name, args, kwargs, timeout), timeout)
+    if r["error"] and not pool.available:   # the pool couldn't start at all, not a skill failure
+        log.warning(f"skill pool unavailable ({pool.error}) — running {name} in-process")
+        return skill_registry.call(name, *args, **kwargs)
+    skill_registry.record(name, r["ms"], r["error"])
+    return r["result"]
+
+def _skill_batch_call(n: int, i) -> tuple:
+    if isinstance(i, list): return i, {}
+    if isinstance(i, (str, int, float, bool)) or i is None: return [i], {}
+    if isinstance(i, dict) and isinstance(i.get("args", []), list) and isinstance(i.get("kwargs", {}), dict):
+        return i.get("args", []), i.get("kwargs", {})
+    raise ValueError(f"inputs[{n}]: expected a list of args, {{\"args\", \"kwargs\"}} or a scalar")
+
+def call_skill_batch(name: str, inputs: list, timeout: float = None) -> list:
+    """
+    Run one skill over many inputs across the worker pool. Each input is a list of
+    positional args, {"args": [...], "kwargs": {...}}, or a single scalar argument.
+    Results come back in input order. Raises ValueError on any other input.
+    """
+    calls = [_skill_batch_call(n, i) for n, i in enumerate(inputs)]
+    pool = skill_pool()
+    if skill_registry.get(name) is None:
+        miss = f"Skill '{name}' not found. Install it first."
+        return [{"result": miss, "error": "not found", "ms": 0.0} for _ in calls]
+    if pool is None or not pool.available:
+        out = []
+        for a, kw in calls:
+            t0 = time.perf_counter()
+            result, err = skill_registry.run(name, *a, **kw)
+            ms = (time.perf_counter() - t0) * 1000
+            skill_registry.record(name, ms, err)
+            out.append({"result": result, "error": err, "ms": round(ms, 1)})
+        return out
+    # keep the pool busy without overfilling its queue: at most workers + queue/2 calls in flight
+    window = pool.size + max(1, pool.jobs.maxsize // 2)
+    out, pending = [None] * len(calls), []
+    for n, (a, kw) in enumerate(calls):
+        if len(pending) >= window:
+            k, fut = pending.pop(0); out[k] = _skill_reply(pool, name, fut, timeout)
+        pending.append((n, _skill_submit(pool, name, a, kw, timeout)))
+    for k, fut in pending:
+        out[k] = _skill_reply(pool, name, fut, timeout)
+    for r in out:
+        skill_registry.record(name, r["ms"], r["error"])
+    return out
 
 
 # ── CODE EXECUTION ────────────────────────────────────────
+# Python runs in a pool of warm `daemon.py --exec-worker` fork servers: each worker
+# imports the common modules once, then forks a fresh child per job, so jobs skip
+# interpreter start-up and imports but can't leak state into each other. The source is
+# written to a temp .py file first, so __file__ and tracebacks look as they would under
+# `python3 file.py`. The child gets wall-time and CPU limits, and an address-space limit
+# when max_mem_mb is set (off by default: numpy, torch and the like reserve far more
+# virtual memory than they use). node and bash keep one process per run.
+# forge.json "exec" settings:
+#   pool (true), workers (min(4, cpus)), queue (64), queue_wait_s (60), recycle_after (500), max_rss_mb (512),
+#   max_mem_mb (0 = no limit, per job), preload (EXEC_PRELOAD)
+EXEC_PRELOAD = ["json", "re", "math", "time", "datetime", "pathlib", "collections", "itertools",
+                "functools", "subprocess", "shutil", "glob", "csv", "sqlite3", "hashlib", "base64",
+                "random", "statistics", "textwrap", "urllib.request", "urllib.parse", "traceback"]
+EXEC_MAX_OUTPUT = 8 * 1024 * 1024      # per stream; the rest is dropped
+
+_exec_pool      = None
+_exec_pool_lock = threading.Lock()
+
+def exec_pool():
+    """The python exec pool, or None when forge.json exec.pool is false."""
+    global _exec_pool
+    x = load_cfg_cached().get("exec", {})
+    if x.get("pool", True) is False or not hasattr(os, "fork"):
+        return None
+    with _exec_pool_lock:
+        if _exec_pool is None:
+            _exec_pool = WorkerPool(
+                "exec", "exec-worker", size=int(x.get("workers", min(4, os.cpu_count() or 2))),
+                queue_max=int(x.get("queue", 64)), timeout=60, hello_timeout=60,
+                queue_wait_s=float(x.get("queue_wait_s", 60)),
+                recycle_after=int(x.get("recycle_after", 500)), max_rss_mb=int(x.get("max_rss_mb", 512)),
+                env={"FORGE_EXEC_PRELOAD": ",".join(x.get("preload", EXEC_PRELOAD))})
+        return _exec_pool
+
+def _exec_child(path: str, src: str, timeout: float, max_mem_mb: int):
+    """In the forked child: apply limits, run the file at path as __main__, exit with its status.
+    Never returns."""
+    import traceback, linecache, resource
+    rc = 1
+    try:
+        os.setpgid(0, 0)                # own process group, so a timeout takes grandchildren too
+        cpu = int(timeout) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        if max_mem_mb:
+            try: resource.setrlimit(resource.RLIMIT_AS, (max_mem_mb << 20, max_mem_mb << 20))
+            except (ValueError, OSError): pass          # not enforceable on macOS
+        os.chdir(FORGE_WS)
+        sys.argv = [path]
+        linecache.cache[path] = (len(src), None, src.splitlines(True), path)   # even if the code deletes it
+        try:
+            exec(compile(src, path, "exec"), {"__name__": "__main__", "__file__": path,
+                                              "__builtins__": __builtins__})
+            rc = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                rc = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            etype, err, tb = sys.exc_info()
+            traceback.print_exception(etype, err, tb.tb_next)   # hide this frame, like `python3 file.py`
+    except BaseException:               # limits or chdir failed before the code ran (FORGE_WS gone)
+        traceback.print_exc()
+    finally:
+        # what interpreter shutdown does for `python3 file.py`: wait for non-daemon
+        # threads, run atexit handlers, flush
+        try:
+            threading._shutdown()
+            import atexit; atexit._run_exitfuncs()
+        except BaseException:
+            traceback.print_exc()
+        try: sys.stdout.flush(); sys.stderr.flush()
+        except Exception: pass
+        os._exit(rc)
+
+def _exec_run(header: dict, payload: bytes, emit=None):
+    """
+    Exec worker job: fork, collect the child's stdout/stderr, enforce the wall-time limit.
+    With emit (header "stream": true) output is sent as it arrives instead of in the reply,
+    preceded by {"event": "start", "pid"} so the daemon can cancel the child's process group.
+    """
+    import select, signal, tempfile
+    timeout = float(header.get("timeout", 60))
+    fd, path = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(fd, "wb") as f: f.write(payload)
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    sys.stdout.flush(); sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(out_r); os.close(err_r)
+        os.dup2(os.open(os.devnull, os.O_RDONLY), 0)
+        os.dup2(out_w, 1); os.dup2(err_w, 2)
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))    # the worker's IPC pipes: fork ignores CLOEXEC
+        _exec_child(path, payload.decode("utf-8", "replace"), timeout, int(header.get("max_mem_mb", 0)))
+    os.close(out_w); os.close(err_w)
+    # the parent sets the group too: a cancel right after "start" must find it even if
+    # the child hasn't been scheduled yet (whichever call runs second is a no-op)
+    try: os.setpgid(pid, pid)
+    except OSError: pass
+    if emit: emit({"event": "start", "pid": pid})
+
+    names = {out_r: "stdout", err_r: "stderr"}
+    bufs = {out_r: bytearray(), err_r: bytearray()}
+    live, status, timed_out = set(bufs), None, False
+    deadline = time.monotonic() + timeout
+    while live:
+        left = deadline - time.monotonic()
+        if left <= 0:
+            timed_out = status is None
+            break
+        for fd in select.select(list(live), [], [], min(left, 0.25))[0]:
+            chunk = os.read(fd, 65536)
+            if not chunk: live.discard(fd)
+            elif emit: emit({"event": "out", "name": names[fd]}, chunk)
+            elif len(bufs[fd]) < EXEC_MAX_OUTPUT: bufs[fd] += chunk
+        if status is None:
+            done, st, ru = os.wait4(pid, os.WNOHANG)
+            if done:
+                # exited; leave a moment for anything it backgrounded to let go of the pipes
+                status, deadline = (st, ru), min(deadline, time.monotonic() + 0.5)
+    if status is None:
+        if timed_out:
+            try: os.killpg(pid, signal.SIGKILL)
+            except OSError: pass
+        _, st, ru = os.wait4(pid, 0)
+        status = (st, ru)
+    os.close(out_r); os.close(err_r)
+    try: os.unlink(path)
+    except OSError: pass
+
+    st, ru = status
+    return {"stdout": bufs[out_r].decode("utf-8", "replace"), "stderr": bufs[err_r].decode("utf-8", "replace"),
+            "exit": os.waitstatus_to_exitcode(st), "timed_out": timed_out,
+            "max_rss_kb": ru.ru_maxrss if sys.platform != "darwin" else ru.ru_maxrss // 1024}, b""
+
+def _exec_worker_main() -> int:
+    """Entry point for `daemon.py --exec-worker`: preload modules once, then fork per job."""
+    import importlib
+    os.environ["PATH"] = BIN_PATH + ":" + os.environ.get("PATH", "")
+    os.environ["PYTHONPATH"] = str(SKILLS_DIR) + ":" + os.environ.get("PYTHONPATH", "")
+    sys.path.insert(0, str(SKILLS_DIR))
+    loaded = []
+    for name in filter(None, os.environ.get("FORGE_EXEC_PRELOAD", "").split(",")):
+        try:
+            importlib.import_module(name.strip()); loaded.append(name.strip())
+        except Exception:
+            pass
+    return worker_serve(lambda h, p, emit: _exec_run(h, p, emit if h.get("stream") else None),
+                        {"preloaded": loaded})
+
+
 def execute_code(lang: str, code: str, timeout: int = 60) -> str:
     """Execute code on the machine. Returns stdout+stderr."""
+    with _span("subprocess.exec", lang=lang):
+        if lang == "python":
+            pool = exec_pool()
+            if pool is not None:
+                try:
+                    return _execute_pooled(pool, code, timeout)
+                except WorkerPoolRejected as e:
+                    log.warning(f"exec pool unavailable ({e}) — running in a fresh process")
+                except WorkerPoolError as e:
+                    return f"Execution error: {e}"     # it may already have run; don't run it twice
+        return _execute_code(lang, code, timeout)
+
+def _execute_pooled(pool, code: str, timeout: int) -> str:
+    x = load_cfg_cached().get("exec", {})
+    rh, _ = pool.call({"op": "run", "timeout": timeout, "max_mem_mb": int(x.get("max_mem_mb", 0))},
+                      code.encode(), timeout=timeout + 10)
+    if not rh.get("ok"):
+        raise WorkerPoolError(rh.get("error", "exec worker failed"))
+    metric_observe("exec.pooled_ms", rh.get("ms", 0))
+    if rh["timed_out"]:
+        return f"Timed out after {timeout}s"
+    out, err = rh["stdout"].strip(), rh["stderr"].strip()
+    if out and err: return f"{out}\n--- stderr ---\n{err}"
+    return out or err or "(no output)"
+
+def _execute_code(lang: str, code: str, timeout: int) -> str:
+    """One fresh interpreter process per run — node, bash, and python when the pool is off."""
     import tempfile
     try:
         env = os.environ.copy()
-        env["PATH"] = "/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin:" + env.get("PATH","")
+        env["PATH"] = BIN_PATH + ":" + env.get("PATH","")
         env["PYTHONPATH"] = str(SKILLS_DIR) + ":" + env.get("PYTHONPATH","")
 
         if lang == "python":
@@ -1211,6 +2627,367 @@ def execute_code(lang: str, code: str, timeout: int = 60) -> str:
         return f"Execution error: {e}"
 
 
+# ── EXEC JOBS ─────────────────────────────────────────────
+# Long runs don't hold a request (or the chat turn) open: POST /run starts a job and
+# returns its id, GET /run/{id}/stream follows the output, POST /run/{id}/cancel kills
+# the process group. Each job keeps its output in a bounded in-memory ring; past that
+# the whole stream goes to ~/.forge/jobs/<pid>-<id>.jsonl so a late reader can still start at 0.
+# Under --workers N the next request may land on another worker, so every job writes
+# its stream there from the start, plus its info() to <pid>-<id>.json; a worker that
+# doesn't own a job serves it from those files (_JobFile), and cancels it by killing
+# its process group or, while it is still queued, leaving a <pid>-<id>.cancel marker.
+# forge.json "exec": job_buffer_kb (256), max_jobs (4 running at once), jobs_keep (100),
+#   max_job_s (3600), directive_timeout_s (60), inline_wait_s (20, how long a __RUN__
+#   directive waits before the reply goes out with the job id instead; one a later
+#   directive depends on waits for the job to end, up to directive_timeout_s)
+JOBS_DIR        = FORGE_CFG / "jobs"
+EXEC_INLINE_MAX = 64 * 1024            # chars of each stream a chat reply gets
+
+class ExecJob:
+    FINAL = ("done", "failed", "timed_out", "cancelled")
+
+    def __init__(self, lang: str, code: str, timeout: int, source: str = "api"):
+        import codecs
+        self.id, self.lang, self.code = os.urandom(6).hex(), lang, code
+        self.timeout, self.source = timeout, source
+        self.status, self.exit, self.error, self.pid = "queued", None, "", None
+        self.created, self.started, self.ended = time.time(), None, None
+        self.cond   = threading.Condition()
+        self.ring   = []               # [(seq, stream, text)], oldest first
+        self.ring_chars = self.bytes = self.seq = 0
+        self.cap    = int(float(load_cfg_cached().get("exec", {}).get("job_buffer_kb", 256)) * 1024)
+        self.spill, self._spill_f = None, None
+        self._dec   = {s: codecs.getincrementaldecoder("utf-8")("replace") for s in ("stdout", "stderr")}
+        self.shared = SERVER["workers"] > 1     # other workers read it from JOBS_DIR
+        if self.shared: self._open_spill()
+
+    def _file(self, ext: str) -> Path:
+        return JOBS_DIR / f"{os.getpid()}-{self.id}{ext}"    # pid: pre-fork cleanup
+
+    def _open_spill(self):
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        self.spill = self._file(".jsonl")
+        self._spill_f = open(self.spill, "w", encoding="utf-8")
+        for e in self.ring: self._spill_f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+    def publish(self):
+        """Write info() for the other pre-fork workers (no-op with one worker)."""
+        if not self.shared: return
+        tmp = self._file(f".json.{threading.get_ident()}")
+        try:
+            tmp.write_text(json.dumps(self.info()))
+            os.replace(tmp, self._file(".json"))
+        except OSError as e:
+            log.warning(f"Job {self.id}: can't publish status: {e}")
+
+    def cancel_marked(self) -> bool:
+        return self.shared and self._file(".cancel").exists()
+
+    def remove_files(self):
+        for ext in (".jsonl", ".json", ".cancel"): self._file(ext).unlink(missing_ok=True)
+
+    def append(self, stream: str, data: bytes, final: bool = False):
+        text = self._dec[stream].decode(data, final)
+        with self.cond:
+            self.bytes += len(data)
+            if not text: return
+            entry = (self.seq, stream, text)
+            self.seq += 1
+            self.ring.append(entry); self.ring_chars += len(text)
+            if self.spill is None and self.ring_chars > self.cap:
+                self._open_spill()
+            elif self._spill_f:
+                self._spill_f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self._spill_f: self._spill_f.flush()
+            drop = 0
+            while self.ring_chars > self.cap and drop < len(self.ring) - 1:
+                self.ring_chars -= len(self.ring[drop][2]); drop += 1
+            if drop: del self.ring[:drop]
+            self.cond.notify_all()
+
+    def finish(self, status: str, exit: int = None, error: str = ""):
+        for s in self._dec: self.append(s, b"", final=True)
+        with self.cond:
+            if self.ended: return
+            self.status = "cancelled" if self.status == "cancelled" or self.cancel_marked() else status
+            self.exit, self.error, self.ended = exit, error, time.time()
+            if self._spill_f: self._spill_f.close(); self._spill_f = None
+            self.cond.notify_all()
+        self.publish()
+        metric_inc(f"exec.jobs.{self.status}")
+        if self.started: metric_observe("exec.job_ms", (self.ended - self.started) * 1000)
+
+    def cancel(self) -> bool:
+        with self.cond:
+            if self.ended: return False
+            queued, self.status = self.status == "queued", "cancelled"
+        if queued: self.finish("cancelled")
+        else: self.cancel_pid()
+        return True
+
+    def cancel_pid(self):
+        import signal
+        if self.pid:
+            try: os.killpg(self.pid, signal.SIGKILL)
+            except OSError: pass
+
+    def wait(self, timeout: float = None) -> bool:
+        with self.cond:
+            return self.cond.wait_for(lambda: self.ended is not None, timeout)
+
+    def read(self, seq: int = 0) -> list:
+        """Output entries from seq on; older ones than the ring holds come from the spill file."""
+        with self.cond:
+            ring = list(self.ring)
+            if not ring or seq >= ring[0][0] or self.spill is None:
+                return [e for e in ring if e[0] >= seq]
+            first, path = ring[0][0], self.spill
+        out = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                e = json.loads(line)
+                if e[0] >= first: break
+                if e[0] >= seq: out.append(tuple(e))
+        return out + ring
+
+    def follow(self, seq: int = 0, idle: float = 15.0):
+        """Output events from seq until the job ends, then one exit event. Pings while idle."""
+        while True:
+            with self.cond:
+                if self.seq <= seq and not self.ended:
+                    self.cond.wait(idle)
+                done = self.ended is not None
+            chunk = self.read(seq)
+            for n, stream, text in chunk:
+                yield {"type": "output", "seq": n, "stream": stream, "text": text}
+                seq = n + 1
+            if done and seq >= self.seq:
+                yield {"type": "exit", **self.info()}; return
+            if not chunk: yield {"type": "ping", "status": self.status}
+
+    def tail(self, limit: int = EXEC_INLINE_MAX) -> dict:
+        """The last `limit` chars of each stream, and how many chars were cut before that."""
+        parts, cut = {"stdout": [], "stderr": []}, {"stdout": 0, "stderr": 0}
+        size = {"stdout": 0, "stderr": 0}
+        for _, stream, text in self.read(0):
+            parts[stream].append(text); size[stream] += len(text)
+            while size[stream] - len(parts[stream][0]) >= limit:
+                t = parts[stream].pop(0); size[stream] -= len(t); cut[stream] += len(t)
+        out = {}
+        for s in parts:
+            text = "".join(parts[s])
+            extra = max(0, len(text) - limit)
+            out[s], out[s + "_cut"] = text[extra:], cut[s] + extra
+        return out
+
+    def result(self, limit: int = EXEC_INLINE_MAX) -> str:
+        """Output in execute_code's shape — what a chat reply gets in place of a __RUN__ block."""
+        if self.status == "timed_out":
+            return f"Timed out after {self.timeout}s"
+        if self.status == "failed" and self.error:
+            return f"Execution error: {self.error}"
+        t = self.tail(limit)
+        def stream(s):
+            text = t[s].strip()
+            if text and t[s + "_cut"]:
+                text = f"[… {t[s + '_cut']} chars cut — full output: GET /run/{self.id}/stream]\n" + text
+            return text
+        out, err = stream("stdout"), stream("stderr")
+        text = f"{out}\n--- stderr ---\n{err}" if out and err else out or err
+        if self.status == "cancelled":
+            return (text + "\n" if text else "") + "[cancelled]"
+        if not self.ended:
+            note = f"[still running as job {self.id} — follow with GET /run/{self.id}/stream]"
+            return f"{text}\n{note}" if text else note
+        return text or "(no output)"
+
+    def info(self) -> dict:
+        end = self.ended or time.time()
+        return {"job_id": self.id, "lang": self.lang, "source": self.source, "status": self.status,
+                "exit": self.exit, "error": self.error, "pid": self.pid, "timeout_s": self.timeout,
+                "created": self.created, "started": self.started, "ended": self.ended,
+                "ms": round((end - self.started) * 1000, 1) if self.started else None,
+                "bytes": self.bytes, "next_seq": self.seq, "spilled": self.spill is not None}
+
+_jobs      = OrderedDict()             # job id → ExecJob, oldest first
+_jobs_lock = threading.Lock()
+_jobs_sem  = None
+
+def exec_job_start(lang: str, code: str, timeout: int = 60, source: str = "api") -> ExecJob:
+    """Queue code as a background job; returns at once. At most exec.max_jobs run at a time."""
+    global _jobs_sem
+    x = load_cfg_cached().get("exec", {})
+    if lang not in ("python", "bash", "node"):
+        raise ValueError(f"Unknown language: {lang}")
+    job = ExecJob(lang, code, max(1, min(int(timeout), int(x.get("max_job_s", 3600)))), source)
+    with _jobs_lock:
+        if _jobs_sem is None:
+            _jobs_sem = threading.BoundedSemaphore(int(x.get("max_jobs", 4)))
+        _jobs[job.id] = job
+        keep = int(x.get("jobs_keep", 100))
+        for old in [j for j in _jobs.values() if j.ended][:max(0, len(_jobs) - keep)]:
+            del _jobs[old.id]
+            old.remove_files()
+    job.publish()
+    metric_inc("exec.jobs.started")
+    threading.Thread(target=_exec_job_run, args=(job,), name=f"job-{job.id}", daemon=True).start()
+    return job
+
+def exec_job(job_id: str):
+    """The job, from this process or, under --workers, from the worker that owns it."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None and SERVER["workers"] > 1:
+        meta = next(JOBS_DIR.glob(f"*-{job_id}.json"), None)
+        if meta is not None:
+            try: return _JobFile(meta)
+            except (OSError, ValueError): pass
+    return job
+
+def exec_jobs() -> list:
+    with _jobs_lock:
+        out = [j.info() for j in reversed(_jobs.values())]
+    if SERVER["workers"] > 1:
+        mine = {j["job_id"] for j in out}
+        for meta in JOBS_DIR.glob("*.json"):
+            try: info = json.loads(meta.read_text())
+            except (OSError, ValueError): continue
+            if info["job_id"] not in mine: out.append(info)
+        out.sort(key=lambda j: j["created"], reverse=True)
+    return out
+
+class _JobFile(ExecJob):
+    """An exec job another pre-fork worker owns, read back from its files in JOBS_DIR."""
+
+    def __init__(self, meta: Path):
+        self.meta, self.out = meta, meta.with_suffix(".jsonl")
+        self.refresh()
+
+    def refresh(self):
+        i = self._info = json.loads(self.meta.read_text())
+        self.id, self.lang, self.source, self.status = i["job_id"], i["lang"], i["source"], i["status"]
+        self.exit, self.error, self.pid, self.timeout = i["exit"], i["error"], i["pid"], i["timeout_s"]
+        self.created, self.started, self.ended, self.seq = i["created"], i["started"], i["ended"], i["next_seq"]
+
+    def info(self) -> dict:
+        try: self.refresh()
+        except (OSError, ValueError): pass        # owner removed it; keep the last we read
+        i = dict(self._info)
+        if self.started and not self.ended: i["ms"] = round((time.time() - self.started) * 1000, 1)
+        return i
+
+    def read(self, seq: int = 0) -> list:
+        out = []
+        try:
+            with open(self.out, encoding="utf-8") as f:
+                for line in f:
+                    if not line.endswith("\n"): break       # the owner is mid-write
+                    e = json.loads(line)
+                    if e[0] >= seq: out.append(tuple(e))
+        except FileNotFoundError: pass
+        return out
+
+    def follow(self, seq: int = 0, idle: float = 15.0):
+        quiet = time.monotonic()
+        while True:
+            done = self.info()["ended"] is not None
+            chunk = self.read(seq)
+            for n, stream, text in chunk:
+                yield {"type": "output", "seq": n, "stream": stream, "text": text}
+                seq = n + 1
+            if done:
+                yield {"type": "exit", **self.info()}; return
+            if chunk: quiet = time.monotonic()
+            elif time.monotonic() - quiet >= idle:
+                yield {"type": "ping", "status": self.status}; quiet = time.monotonic()
+            time.sleep(0.25)
+
+    def cancel(self) -> bool:
+        self.info()
+        if self.ended: return False
+        self.meta.with_suffix(".cancel").touch()      # the owner reads it before starting and at finish
+        self.cancel_pid()
+        return True
+
+def _exec_job_run(job: ExecJob):
+    with _jobs_sem:
+        with job.cond:
+            if job.status == "cancelled": return
+            marked = job.cancel_marked()
+            if not marked: job.status, job.started = "running", time.time()
+        if marked: job.finish("cancelled"); return
+        job.publish()
+        try:
+            pool = exec_pool() if job.lang == "python" else None
+            if pool is not None:
+                try:
+                    return _exec_job_pooled(job, pool)
+                except WorkerPoolError as e:
+                    if job.pid: raise
+                    log.warning(f"exec pool unavailable ({e}) — job {job.id} runs in a fresh process")
+            _exec_job_process(job)
+        except Exception as e:
+            job.finish("failed", error=str(e) or type(e).__name__)
+        finally:
+            log.info(f"Job {job.id} ({job.lang}, {job.source}): {job.status} exit={job.exit}")
+
+def _exec_job_pooled(job: ExecJob, pool):
+    def on_frame(h, p):
+        if h.get("event") == "start":
+            job.pid = h["pid"]; job.publish()
+            if job.status == "cancelled": job.cancel_pid()
+        elif h.get("event") == "out": job.append(h["name"], p)
+    x = load_cfg_cached().get("exec", {})
+    rh, _ = pool.call({"op": "run", "stream": True, "timeout": job.timeout,
+                       "max_mem_mb": int(x.get("max_mem_mb", 0))},
+                      job.code.encode(), timeout=job.timeout + 10, on_frame=on_frame)
+    if not rh.get("ok"):
+        raise WorkerPoolError(rh.get("error", "exec worker failed"))
+    job.finish("timed_out" if rh["timed_out"] else "done", rh["exit"])
+
+def _exec_job_process(job: ExecJob):
+    """node, bash, and python without the pool: own session so cancel/timeout take the whole group."""
+    import select, signal, tempfile
+    env = os.environ.copy()
+    env["PATH"] = BIN_PATH + ":" + env.get("PATH","")
+    env["PYTHONPATH"] = str(SKILLS_DIR) + ":" + env.get("PYTHONPATH","")
+    fname = None
+    if job.lang == "bash":
+        cmd = ["bash", "-c", job.code]
+    else:
+        with tempfile.NamedTemporaryFile(suffix=".py" if job.lang == "python" else ".js",
+                                         mode="w", delete=False) as f:
+            f.write(job.code); fname = f.name
+        cmd = ["python3" if job.lang == "python" else "node", fname]
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, cwd=str(FORGE_WS), env=env, start_new_session=True)
+        job.pid = proc.pid; job.publish()
+        if job.status == "cancelled": job.cancel_pid()
+        names = {proc.stdout.fileno(): "stdout", proc.stderr.fileno(): "stderr"}
+        live, timed_out = set(names), False
+        deadline = time.monotonic() + job.timeout
+        while live:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                timed_out = proc.poll() is None
+                break
+            for fd in select.select(list(live), [], [], min(left, 0.25))[0]:
+                chunk = os.read(fd, 65536)
+                if chunk: job.append(names[fd], chunk)
+                else: live.discard(fd)
+            if proc.poll() is not None:
+                deadline = min(deadline, time.monotonic() + 0.5)
+        if timed_out:
+            try: os.killpg(proc.pid, signal.SIGKILL)
+            except OSError: pass
+        rc = proc.wait()
+        proc.stdout.close(); proc.stderr.close()
+        job.finish("timed_out" if timed_out else "done", rc)
+    finally:
+        if fname: Path(fname).unlink(missing_ok=True)
+
+
 def save_to_workspace(rel_path: str, body: str) -> str:
     """Save a file to ~/Forge/. Prevents path traversal."""
     try:
@@ -1235,11 +3012,9 @@ def browser_run(script: str, timeout: int = 120) -> str:
         title = await page.title()
         print(title)
     """
-    # Auto-install playwright if missing
-    try:
-        import importlib
-        importlib.import_module("playwright")
-    except ImportError:
+    # Auto-install playwright if missing (only probe for it — the script runs in a subprocess)
+    import importlib.util
+    if importlib.util.find_spec("playwright") is None:
         log.info("Installing playwright...")
         r = subprocess.run(
             ["pip3","install","--quiet","--break-system-packages","playwright"],
@@ -1272,15 +3047,208 @@ asyncio.run(main())
 
 def browser_install_check() -> str:
     """Check if browser automation is available."""
-    try:
-        import importlib
-        importlib.import_module("playwright")
+    import importlib.util
+    if importlib.util.find_spec("playwright") is not None:
         return "Playwright: installed"
-    except ImportError:
-        return "Playwright: not installed (Forge will install on first browser task)"
+    return "Playwright: not installed (Forge will install on first browser task)"
+
+
+# ── MEDIA CACHE ───────────────────────────────────────────
+# Derived media results on disk, keyed by media_key() = sha256(bytes + prompt/caption):
+#   ~/.forge/cache/<kind>/<key>.json  (transcripts, vision, video)  ·  images/<key>.img
+#   ~/.forge/cache/tg/<kind>-<id>.json  Telegram file_unique_id → key, so a hit skips the download
+# Size-bounded LRU: reads touch the file's mtime, writes evict the oldest files once the
+# total passes media.cache_max_mb (default 512). Hit/miss counts at GET /media/cache/status.
+MEDIA_CACHE = FORGE_CFG / "cache"
+
+_media_cache_lock  = threading.Lock()
+_media_cache_state = {"bytes": None, "files": 0, "evictions": 0, "hits": {}, "misses": {}}
+
+def media_key(data: bytes, prompt: str = "") -> str:
+    import hashlib
+    h = hashlib.sha256(data)
+    h.update(b"\0" + prompt.encode())
+    return h.hexdigest()
+
+def _media_cache_scan() -> list:
+    """[(mtime, size, path)] for every cached file, oldest first."""
+    files = []
+    for d in MEDIA_CACHE.iterdir() if MEDIA_CACHE.exists() else ():
+        if not d.is_dir(): continue
+        for f in os.scandir(d):
+            if f.is_file() and not f.name.startswith("."):
+                st = f.stat()
+                files.append((st.st_mtime, st.st_size, f.path))
+    return sorted(files)
+
+def _media_cache_account(delta_bytes: int, delta_files: int):
+    """Track the cache size; evict least-recently-used files when it passes the cap."""
+    cap, evicted = int(float(load_cfg_cached().get("media", {}).get("cache_max_mb", 512)) * 1024 * 1024), 0
+    with _media_cache_lock:
+        st = _media_cache_state
+        if st["bytes"] is None:
+            files = _media_cache_scan()
+            st["bytes"], st["files"] = sum(f[1] for f in files), len(files)
+        else:
+            st["bytes"] += delta_bytes; st["files"] += delta_files
+        if st["bytes"] > cap:
+            files = _media_cache_scan()
+            st["bytes"], st["files"] = sum(f[1] for f in files), len(files)
+            for _, size, path in files:
+                if st["bytes"] <= cap * 0.9: break
+                try: os.unlink(path)
+                except OSError: continue
+                st["bytes"] -= size; st["files"] -= 1; evicted += 1
+            st["evictions"] += evicted
+    if evicted:
+        metric_inc("media_cache.evictions", evicted)
+        log.info(f"media cache: evicted {evicted} files, {st['bytes'] // 1024} KB left")
+
+def media_cache_read(kind: str, name: str):
+    path = MEDIA_CACHE / kind / name
+    try:
+        data = path.read_bytes()
+        os.utime(path)                      # LRU: a hit makes the entry young again
+    except OSError:
+        data = None
+    outcome = "hits" if data is not None else "misses"
+    with _media_cache_lock:
+        counts = _media_cache_state[outcome]
+        counts[kind] = counts.get(kind, 0) + 1
+    metric_inc(f"media_cache.{kind}.{outcome}")
+    return data
+
+def media_cache_write(kind: str, name: str, data: bytes):
+    try:
+        d = MEDIA_CACHE / kind
+        d.mkdir(parents=True, exist_ok=True)
+        dest = d / name
+        try: old = dest.stat().st_size
+        except OSError: old = None
+        tmp = d / f".{name}.{threading.get_ident()}.tmp"
+        tmp.write_bytes(data)
+        tmp.replace(dest)
+        _media_cache_account(len(data) - (old or 0), 0 if old is not None else 1)
+    except OSError as e:
+        log.warning(f"media cache write failed ({kind}): {e}")
+
+def media_cache_get(kind: str, key: str):
+    raw = media_cache_read(kind, f"{key}.json")
+    try:
+        return json.loads(raw) if raw else None
+    except ValueError:
+        return None
+
+def media_cache_put(kind: str, key: str, result: dict):
+    media_cache_write(kind, f"{key}.json", json.dumps(result, ensure_ascii=False).encode())
 
+def _tg_index_name(kind: str, file_uid: str, prompt: str) -> str:
+    return f"{kind}-{media_key(file_uid.encode(), prompt)[:40]}.json"
+
+def media_index_get(kind: str, file_uid: str, prompt: str = ""):
+    """Cached result for a Telegram file_unique_id (+ caption), or None."""
+    raw = media_cache_read("tg", _tg_index_name(kind, file_uid, prompt)) if file_uid else None
+    try:
+        return media_cache_get(kind, json.loads(raw)["key"]) if raw else None
+    except (ValueError, KeyError):
+        return None
+
+def media_index_put(kind: str, file_uid: str, prompt: str, key: str):
+    if file_uid:
+        media_cache_write("tg", _tg_index_name(kind, file_uid, prompt), json.dumps({"key": key}).encode())
+
+def media_cache_status() -> dict:
+    _media_cache_account(0, 0)
+    with _media_cache_lock:
+        st = _media_cache_state
+        hits, misses = sum(st["hits"].values()), sum(st["misses"].values())
+        return {"bytes": st["bytes"], "files": st["files"], "evictions": st["evictions"],
+                "max_bytes": int(float(load_cfg_cached().get("media", {}).get("cache_max_mb", 512)) * 1024 * 1024),
+                "hits": hits, "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+                "by_kind": {k: {"hits": st["hits"].get(k, 0), "misses": st["misses"].get(k, 0)}
+                            for k in sorted(set(st["hits"]) | set(st["misses"]))}}
 
 # ── VISION — process images and files ─────────────────────
+# Images are prepared before any vision call: Claude scales anything beyond ~1568px
+# on the long edge down itself, so larger uploads only cost bandwidth. Pillow if
+# installed, else ffmpeg, else the original bytes. Prepared bytes are cached by the
+# sha256 of the input, so a re-sent photo is neither re-encoded nor re-uploaded larger.
+VISION_MAX_EDGE = 1568
+IMAGE_MIME = {"jpeg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+
+VISION_SYSTEM = ("You are {name}, the owner's personal AI. You are looking at an image the owner sent. "
+                 "Describe what matters in it accurately and concisely, read any text exactly, "
+                 "and answer the owner's question about it if they asked one.")
+
+def image_format(data: bytes) -> str:
+    """Sniff the image format from magic bytes: jpeg/png/gif/webp, or "" if unknown."""
+    if data[:3] == b"\xff\xd8\xff": return "jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n": return "png"
+    if data[:4] == b"GIF8": return "gif"
+    if len(data) > 12 and data[:4] == b"RIFF" and data[8:12] == b"WEBP": return "webp"
+    return ""
+
+def _prepare_pillow(data: bytes):
+    import io
+    from PIL import Image, ImageOps
+    im = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+    im.thumbnail((VISION_MAX_EDGE, VISION_MAX_EDGE), Image.LANCZOS)
+    out = io.BytesIO()
+    if im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info):
+        im.save(out, "WEBP", quality=85)          # keeps alpha, still compact
+        return out.getvalue(), "webp"
+    im.convert("RGB").save(out, "JPEG", quality=85, optimize=True)   # no exif= → metadata dropped
+    return out.getvalue(), "jpeg"
+
+def _prepare_ffmpeg(data: bytes):
+    env = os.environ.copy(); env["PATH"] = BIN_PATH + ":" + env.get("PATH", "")
+    r = subprocess.run(
+        ["ffmpeg", "-loglevel", "error", "-i", "pipe:0", "-frames:v", "1", "-map_metadata", "-1",
+         "-vf", f"scale='min({VISION_MAX_EDGE},iw)':'min({VISION_MAX_EDGE},ih)':force_original_aspect_ratio=decrease",
+         "-q:v", "3", "-f", "image2pipe", "-c:v", "mjpeg", "pipe:1"],
+        input=data, capture_output=True, timeout=30, env=env)
+    if r.returncode != 0 or not r.stdout:
+        raise RuntimeError(r.stderr.decode(errors="replace").strip()[:200] or "no output")
+    return r.stdout, "jpeg"
+
+def prepare_image(data: bytes, cache: bool = True):
+    """
+    Shrink an image for a vision call: downscale to VISION_MAX_EDGE, re-encode, strip metadata.
+    Returns (bytes, media_type). Falls back to the original whenever that is smaller or
+    nothing can decode it. Records vision.* metrics.
+    """
+    import importlib.util
+    fmt, key = image_format(data), media_key(data)
+    metric_inc("vision.images"); metric_inc("vision.bytes_in", len(data))
+
+    out = media_cache_read("images", f"{key}.img") if cache else None
+    out_fmt = image_format(out) if out else fmt
+
+    if out is None:
+        t0 = time.perf_counter()
+        try:
+            with _span("vision.prepare", bytes=len(data), fmt=fmt or "?"):
+                if importlib.util.find_spec("PIL"):
+                    out, out_fmt = _prepare_pillow(data)
+                else:
+                    out, out_fmt = _prepare_ffmpeg(data)
+        except Exception as e:
+            log.debug(f"image prepare skipped ({fmt or 'unknown format'}): {e}")
+            out, out_fmt = data, fmt
+        if len(out) >= len(data):
+            out, out_fmt = data, fmt
+        metric_observe("vision.prepare_ms", (time.perf_counter() - t0) * 1000)
+        if cache:
+            media_cache_write("images", f"{key}.img", out)
+
+    saved = len(data) - len(out)
+    metric_inc("vision.bytes_out", len(out))
+    metric_observe("vision.bytes_saved", saved)
+    if saved:
+        log.debug(f"vision image {len(data)} → {len(out)} bytes ({saved} saved)")
+    return out, IMAGE_MIME.get(out_fmt, "image/jpeg")
+
 def vision_describe(file_path: str, question: str = "Describe this image in detail.", cfg: dict = None) -> str:
     """
     Send an image or PDF to Claude for analysis.
@@ -1298,11 +3266,13 @@ def vision_describe(file_path: str, question: str = "Describe this image in deta
 
     mime, _ = mimetypes.guess_type(str(p))
     mime     = mime or "image/jpeg"
-    data     = base64.standard_b64encode(p.read_bytes()).decode()
 
     if mime == "application/pdf":
+        data = base64.standard_b64encode(p.read_bytes()).decode()
         content_block = {"type":"document","source":{"type":"base64","media_type":"application/pdf","data":data}}
     elif mime.startswith("image/"):
+        raw, mime = prepare_image(p.read_bytes())
+        data = base64.standard_b64encode(raw).decode()
         content_block = {"type":"image","source":{"type":"base64","media_type":mime,"data":data}}
     else:
         # Try reading as text
@@ -1352,6 +3322,7 @@ def task_create(title: str, steps: list, agent: str = "FORGE") -> str:
         "created":  datetime.now().isoformat(),
         "progress": 0,
     }
+    if leases_enabled(): task["distributed"] = True
     task_file.write_text(json.dumps(task, indent=2))
 
     # Also save to DB
@@ -1361,7 +3332,10 @@ def task_create(title: str, steps: list, agent: str = "FORGE") -> str:
     c.commit(); c.close()
 
     log.info(f"Task created: {title} ({len(steps)} steps)")
-    threading.Thread(target=_run_task, args=(task_file,), daemon=True).start()
+    if task.get("distributed"):
+        lease_enqueue(task_file.stem, [{"kind": "step", "file": task_file.name, "instruction": st} for st in steps])
+    else:
+        threading.Thread(target=_run_task, args=(task_file,), daemon=True).start()
     return task_id
 
 
@@ -1398,7 +3372,10 @@ def _run_task(task_file: Path):
             log.error(f"Task step failed: {e}")
             return
 
-    # Done
+    _task_finish(task_file, task, cfg)
+
+
+def _task_finish(task_file: Path, task: dict, cfg: dict):
     task["status"] = "completed"
     task_file.write_text(json.dumps(task, indent=2))
 
@@ -1422,7 +3399,7 @@ def task_resume_pending():
     for f in TASKS_DIR.glob("*.json"):
         try:
             task = json.loads(f.read_text())
-            if task.get("status") in ("pending","running"):
+            if task.get("status") in ("pending","running") and not task.get("distributed"):
                 log.info(f"Resuming interrupted task: {task['title']}")
                 threading.Thread(target=_run_task, args=(f,), daemon=True).start()
                 time.sleep(2)
@@ -1430,6 +3407,226 @@ def task_resume_pending():
             pass
 
 
+
+# ── TASK LEASES — remote workers ──────────────────────────
+# With "coordinator": {"enabled": true} task steps (and the Claude scheduled jobs,
+# with "remote_jobs": true) are queued in task_leases instead of run here. Workers —
+# `daemon.py --worker --coordinator URL`, on this box or others — lease them over
+# HTTP, run them with their own credentials and tools, heartbeat the lease while
+# they work and post the result back. A step is only leasable once the steps before
+# it in the same task are done; a lease that isn't heartbeated expires and is
+# handed out again, up to max_attempts.
+# forge.json "coordinator": {"enabled": false, "token": "", "lease_s": 60, "max_attempts": 3,
+#   "remote_jobs": false, "acquire_max": 4}   — without a token only loopback clients may lease;
+#   acquire_max caps the leases one /lease/acquire call hands out
+def _coord_cfg(cfg: dict = None) -> dict:
+    return {"enabled": False, "token": "", "lease_s": 60, "max_attempts": 3, "remote_jobs": False, "acquire_max": 4,
+            **(cfg or load_cfg_cached()).get("coordinator", {})}
+
+def leases_enabled(cfg: dict = None) -> bool:
+    return bool(_coord_cfg(cfg)["enabled"])
+
+def lease_enqueue(task_id: str, items: list):
+    """items: [{"kind": "step"|"claude", ...payload}] — one lease row each, in order."""
+    now = datetime.now().isoformat()
+    c = _db()
+    c.executemany("INSERT INTO task_leases(task_id,step,kind,payload,status,attempts,created,updated) "
+                  "VALUES(?,?,?,?,'queued',0,?,?)",
+                  [(task_id, i, it["kind"], json.dumps(it), now, now) for i, it in enumerate(items)])
+    c.commit(); c.close()
+    event_publish("lease.queued", task_id=task_id, steps=len(items))
+
+def lease_acquire(worker: str, n: int = 1) -> list:
+    """Hand out up to n runnable leases to `worker`."""
+    x, now = _coord_cfg(), time.time()
+    c = _db()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        expired = c.execute("SELECT id, task_id, step FROM task_leases WHERE status='leased' AND lease_until < ? "
+                            "AND attempts >= ?", (now, int(x["max_attempts"]))).fetchall()
+        for r in expired: _lease_fail(c, r["id"], "lease expired too many times")
+        rows = c.execute(
+            "SELECT l.* FROM task_leases l WHERE (l.status='queued' OR (l.status='leased' AND l.lease_until < ?)) "
+            "AND NOT EXISTS (SELECT 1 FROM task_leases p WHERE p.task_id=l.task_id AND p.step < l.step "
+            "AND p.status != 'done') ORDER BY l.id LIMIT ?", (now, max(1, n))).fetchall()
+        out = []
+        for r in rows:
+            token = os.urandom(8).hex()
+            c.execute("UPDATE task_leases SET status='leased', worker=?, token=?, lease_until=?, "
+                      "attempts=attempts+1, updated=? WHERE id=?",
+                      (worker, token, now + float(x["lease_s"]), datetime.now().isoformat(), r["id"]))
+            out.append({"lease_id": r["id"], "token": token, "task_id": r["task_id"], "step": r["step"],
+                        "kind": r["kind"], "payload": json.loads(r["payload"]), "lease_s": float(x["lease_s"]),
+                        "attempt": r["attempts"] + 1})
+        c.commit()
+    finally:
+        c.close()
+    if out: metric_inc("leases.acquired", len(out))
+    return out
+
+def lease_heartbeat(lease_id: int, token: str) -> bool:
+    """Extend a lease; False means it was lost (expired and re-leased, or cancelled)."""
+    c = _db()
+    cur = c.execute("UPDATE task_leases SET lease_until=?, updated=? WHERE id=? AND token=? AND status='leased'",
+                    (time.time() + float(_coord_cfg()["lease_s"]), datetime.now().isoformat(), lease_id, token))
+    c.commit(); c.close()
+    return cur.rowcount == 1
+
+def lease_complete(lease_id: int, token: str, result: str = None, error: str = None) -> dict:
+    """Record a step's outcome. Errors are retried until max_attempts."""
+    c = _db()
+    try:
+        c.execute("BEGIN IMMEDIATE")
+        r = c.execute("SELECT * FROM task_leases WHERE id=? AND token=? AND status='leased'",
+                      (lease_id, token)).fetchone()
+        if not r:
+            c.rollback(); return {"ok": False, "error": "lease lost"}
+        if error and r["attempts"] < int(_coord_cfg()["max_attempts"]):
+            c.execute("UPDATE task_leases SET status='queued', worker=NULL, token=NULL, result=?, updated=? "
+                      "WHERE id=?", (f"Error: {error}"[:2000], datetime.now().isoformat(), lease_id))
+            c.commit(); metric_inc("leases.retried")
+            return {"ok": True, "retry": True}
+        if error:
+            _lease_fail(c, lease_id, error); c.commit()
+            return {"ok": True, "failed": True}
+        c.execute("UPDATE task_leases SET status='done', result=?, lease_until=NULL, updated=? WHERE id=?",
+                  (result or "", datetime.now().isoformat(), lease_id))
+        remaining = c.execute("SELECT COUNT(*) FROM task_leases WHERE task_id=? AND status!='done'",
+                              (r["task_id"],)).fetchone()[0]
+        c.commit()
+    finally:
+        c.close()
+    metric_inc("leases.done")
+    _lease_apply(dict(r), result or "", finished=remaining == 0)
+    return {"ok": True}
+
+def _lease_fail(c, lease_id: int, error: str):
+    """Fail a lease and cancel the steps queued after it (caller commits)."""
+    r = c.execute("SELECT * FROM task_leases WHERE id=?", (lease_id,)).fetchone()
+    now = datetime.now().isoformat()
+    c.execute("UPDATE task_leases SET status='failed', result=?, updated=? WHERE id=?",
+              (f"Error: {error}"[:2000], now, lease_id))
+    c.execute("UPDATE task_leases SET status='cancelled', updated=? WHERE task_id=? AND step > ?",
+              (now, r["task_id"], r["step"]))
+    metric_inc("leases.failed")
+    p = json.loads(r["payload"])
+    if p["kind"] == "step":
+        f = TASKS_DIR / p["file"]
+        try:
+            task = json.loads(f.read_text())
+            task["results"].append({"step": r["step"], "instruction": p["instruction"], "result": f"Error: {error}",
+                                    "worker": r["worker"]})
+            task["status"] = "error"
+            f.write_text(json.dumps(task, indent=2))
+        except (OSError, ValueError): pass
+    log.error(f"Lease {lease_id} ({r['task_id']} step {r['step']}) failed: {error}")
+
+def _lease_apply(r: dict, result: str, finished: bool):
+    """Fold a finished lease back into local state — the task file, or the scheduled job's follow-up."""
+    p = json.loads(r["payload"])
+    if p["kind"] == "claude":
+        done = JOB_DONE.get(p.get("done"))
+        if done: threading.Thread(target=done, args=(result,), daemon=True).start()
+        return
+    with _task_file_lock:
+        f = TASKS_DIR / p["file"]
+        task = json.loads(f.read_text())
+        task["results"].append({"step": r["step"], "instruction": p["instruction"], "result": result,
+                                "worker": r["worker"]})
+        task["progress"], task["status"] = r["step"] + 1, "running"
+        f.write_text(json.dumps(task, indent=2))
+    log.info(f"Task '{task['title']}' step {r['step']+1}/{len(task['steps'])} done by {r['worker']}")
+    if finished: _task_finish(f, task, load_cfg())
+
+_task_file_lock = threading.Lock()
+
+def lease_status() -> dict:
+    c = _db()
+    by = {r[0]: r[1] for r in c.execute("SELECT status, COUNT(*) FROM task_leases GROUP BY status")}
+    workers = [dict(r) for r in c.execute(
+        "SELECT worker, COUNT(*) AS active, MAX(updated) AS seen FROM task_leases "
+        "WHERE status='leased' AND lease_until >= ? GROUP BY worker", (time.time(),))]
+    done = {r[0]: r[1] for r in c.execute("SELECT worker, COUNT(*) FROM task_leases WHERE status='done' "
+                                           "GROUP BY worker")}
+    c.close()
+    return {"enabled": leases_enabled(), "leases": by, "workers": workers, "done_by_worker": done}
+
+def _lease_execute(kind: str, payload: dict, cfg: dict) -> str:
+    """Run one leased item on this (worker) machine."""
+    if kind == "step":
+        result = ForgeAI.call(build_system_prompt(cfg=cfg), [{"role": "user", "content": payload["instruction"]}],
+                              cfg=cfg)
+        return parse_directives(result, cfg)
+    if kind == "claude":
+        where = PROJECT_DIR if payload.get("where") == "project" else FORGE_WS
+        return _spawn_claude_fresh(payload["prompt"], workdir=str(where), label=payload.get("done", ""))
+    raise ValueError(f"unknown lease kind: {kind}")
+
+def task_worker_main() -> int:
+    """daemon.py --worker --coordinator URL [--token T] [--concurrency N] [--name NAME]"""
+    import socket, urllib.request, urllib.error
+    argv = sys.argv
+    opt = lambda k, env, d=None: argv[argv.index(k) + 1] if k in argv else os.environ.get(env, d)
+    url   = (opt("--coordinator", "FORGE_COORDINATOR") or "").rstrip("/")
+    token = opt("--token", "FORGE_COORDINATOR_TOKEN", "")
+    n     = int(opt("--concurrency", "FORGE_WORKER_CONCURRENCY", "1"))
+    name  = opt("--name", "FORGE_WORKER_NAME", f"{socket.gethostname()}:{os.getpid()}")
+    if not url: raise SystemExit("usage: daemon.py --worker --coordinator URL [--token T] [--concurrency N]")
+    _prepare_dirs(clear_jobs=False)         # a daemon may be running from the same HOME
+
+    def post(path: str, body: dict, timeout: float = 60) -> dict:
+        req = urllib.request.Request(url + path, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json",
+                                              **({"Authorization": f"Bearer {token}"} if token else {})})
+        with urllib.request.urlopen(req, timeout=timeout) as r: return json.loads(r.read())
+
+    def run_one(lease: dict):
+        stop = threading.Event()
+        def beat():
+            while not stop.wait(lease["lease_s"] / 3):
+                try:
+                    if not post("/lease/heartbeat", {"lease_id": lease["lease_id"], "token": lease["token"]})["ok"]:
+                        log.warning(f"Lease {lease['lease_id']} lost"); return
+                except Exception as e:
+                    log.warning(f"Lease heartbeat: {e}")
+        threading.Thread(target=beat, daemon=True).start()
+        t0, body = time.perf_counter(), {"lease_id": lease["lease_id"], "token": lease["token"]}
+        try:
+            body["result"] = _lease_execute(lease["kind"], lease["payload"], load_cfg())
+        except Exception as e:
+            body["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            stop.set()
+        log.info(f"Lease {lease['lease_id']} ({lease['task_id']} step {lease['step']}) "
+                 f"{'failed' if 'error' in body else 'done'} in {time.perf_counter() - t0:.1f}s")
+        for attempt in range(5):       # the result is the expensive part — try hard to deliver it
+            try: post("/lease/complete", body); return
+            except urllib.error.HTTPError as e:
+                if e.code == 409:      # lease expired and went elsewhere; retrying can't help
+                    log.warning(f"Lease {lease['lease_id']} lost before completing — result dropped"); return
+                log.warning(f"Lease complete: {e}"); time.sleep(2 ** attempt)
+            except Exception as e:
+                log.warning(f"Lease complete: {e}"); time.sleep(2 ** attempt)
+
+    def slot():
+        while True:
+            try:
+                leases = post("/lease/acquire", {"worker": name, "max": 1, "wait": 20}, timeout=40)["leases"]
+            except urllib.error.HTTPError as e:
+                log.error(f"Coordinator refused: {e.code} {e.read()[:200]!r}"); time.sleep(10); continue
+            except Exception as e:
+                log.warning(f"Coordinator unreachable: {e}"); time.sleep(5); continue
+            for lease in leases: run_one(lease)
+
+    log.info(f"Worker {name} — {n} slot(s) leasing from {url}")
+    threads = [threading.Thread(target=slot, name=f"lease-{i}", daemon=True) for i in range(n)]
+    for t in threads: t.start()
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        return 0
+
+
 # ── NAME DETECTION ────────────────────────────────────────
 def check_name_assignment(message: str, cfg: dict):
     """Detect when owner gives the AI a name. Update identity.md and forge.json."""
@@ -1455,7 +3652,12 @@ def check_name_assignment(message: str, cfg: dict):
                 break
 
 # ── CHAT ──────────────────────────────────────────────────
-def process_chat(message: str, agent: str = "FORGE") -> str:
+def process_chat(message: str, agent: str = "FORGE", async_directives: bool = None) -> str:
+    """
+    One chat turn. async_directives (default forge.json directives.async) returns the
+    reply before its directives finish; their results arrive on /events and the
+    finished reply is what goes into memory.
+    """
     cfg = load_cfg()
 
     # First contact — born blank
@@ -1491,24 +3693,39 @@ def process_chat(message: str, agent: str = "FORGE") -> str:
     check_name_assignment(message, cfg)
 
     # Normal chat
-    if agent == "FORGE":
-        system = build_system_prompt(cfg=cfg)
-    else:
-        a = get_agent(agent)
-        system = a["system_prompt"] if a else build_system_prompt(cfg=cfg)
-
-    history  = mem_recall(agent, 4)
-    messages = [{"role": r["role"], "content": r["content"][:500]} for r in history]
-    messages.append({"role": "user", "content": message})
+    with _span("prompt.build", agent=agent):
+        if agent == "FORGE":
+            system = build_system_prompt(cfg=cfg)
+        else:
+            a = get_agent(agent)
+            system = a["system_prompt"] if a else build_system_prompt(cfg=cfg)
+
+        x = cfg.get("summaries", {})
+        earlier = memory_context(agent) if x.get("enabled", False) else ""
+        if earlier:
+            # summaries stand in for older turns and memory.md's last-exchange note
+            history = mem_recall(agent, int(x.get("recent_messages", 2)))
+            system  = re.sub(r"## Last Known Activity\n.*?(?=\n##|\n━━━|\Z)", "", system, flags=re.S)
+            system += "\n\n" + earlier
+        else:
+            history = mem_recall(agent, 4)
+        messages = [{"role": r["role"], "content": r["content"][:500]} for r in history]
+        messages.append({"role": "user", "content": message})
 
 
 
     # ── Process ───────────────────────────────────────────────────────
+    _last_chat_at[0] = time.time()
     response = ForgeAI.call(system, messages, cfg=cfg)
-    response = parse_directives(response, cfg)
-
     mem_save("user", message, agent)
-    mem_save("assistant", response, agent)
+    if async_directives is None:
+        async_directives = bool(cfg.get("directives", {}).get("async", False))
+    if async_directives:
+        response = parse_directives(response, cfg, background=True,
+                                    on_done=lambda final: mem_save("assistant", final, agent))
+    else:
+        response = parse_directives(response, cfg)
+        mem_save("assistant", response, agent)
 
     # Save last exchange to memory.md for context continuity
     def _save_last_exchange(msg, resp):
@@ -1626,37 +3843,178 @@ def _fill_knowledge_gap(topic: str, cfg: dict):
         log.error(f"Fill gap: {e}")
 
 
+# ── MEMORY SUMMARIES ──────────────────────────────────────
+# Older conversation is kept as a hierarchy of summaries per agent: each finished day
+# of `memory` rows becomes a "day" summary, each finished week of day summaries a
+# "week" summary, each finished month of week summaries (by the week's Monday) a
+# "month" summary. Rollups run in small batches when chat has been idle for a while,
+# newest periods first, and stop once the run's token budget is spent. When an agent has
+# summaries, process_chat puts them in the system prompt in place of older raw messages
+# and memory.md's "Last Known Activity": only the last recent_messages turns go raw.
+# A pass stops at the first period it can't finish (budget spent, or the call failed),
+# so a week or month is only rolled up once the finer periods before it are in.
+# forge.json "summaries": enabled (false), idle_minutes (10), budget_tokens (20000 per run),
+#   lookback_days (60), prompt_chars (1500), recent_messages (2), skip_agents (["ALARM_*"]),
+#   provider / model (default: primary model)
+SUMMARY_SYSTEM = ("You condense an assistant's conversation logs into memory. Write a dense factual "
+                  "summary: decisions, facts learned about the owner, commitments, open threads, names, "
+                  "numbers. No preamble, no filler. At most {words} words.")
+SUMMARY_WORDS  = {"day": 150, "week": 200, "month": 250}
+
+_last_chat_at = [0.0]
+
+def _summary_periods(level: str, start: datetime):
+    """(period_start, period_end) strings for the period holding `start`."""
+    if level == "day":
+        d0 = start.replace(hour=0, minute=0, second=0, microsecond=0); d1 = d0 + timedelta(days=1)
+    elif level == "week":
+        d0 = (start - timedelta(days=start.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        d1 = d0 + timedelta(days=7)
+    else:
+        d0 = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        d1 = (d0 + timedelta(days=32)).replace(day=1)
+    return d0.date().isoformat(), d1.date().isoformat()
+
+def _summarise(level: str, agent: str, text: str, cfg: dict) -> str:
+    """The summary text; raises RuntimeError when the provider call failed."""
+    x = cfg.get("summaries", {})
+    with _span("summary.llm", level=level, agent=agent):
+        reply = ForgeAI.call(SUMMARY_SYSTEM.format(words=SUMMARY_WORDS[level]),
+                             [{"role": "user", "content": f"Agent {agent} — {level} log:\n\n{text}"}],
+                             provider=x.get("provider"), model=x.get("model"), cfg=cfg).strip()
+    if call_failed(reply): raise RuntimeError(reply[:200] or "empty reply")
+    return reply
+
+def _summary_candidates(c, level: str, lookback: str, today: str) -> list:
+    """[(agent, period_start, period_end, n, first id, last id, load)] still to roll up, newest first.
+    load() fetches the source text, so only periods the budget reaches are read."""
+    have = {(r[0], r[1]) for r in c.execute(
+        "SELECT agent, period_start FROM memory_summaries WHERE level=?", (level,))}
+    out = []
+    if level == "day":
+        for r in c.execute("SELECT agent, substr(timestamp,1,10) AS day, COUNT(*), MIN(id), MAX(id) FROM memory "
+                           "WHERE timestamp >= ? AND timestamp < ? GROUP BY agent, day ORDER BY day DESC",
+                           (lookback, today)).fetchall():
+            start, end = _summary_periods("day", datetime.fromisoformat(r[1]))
+            if (r[0], start) in have: continue
+            def load(agent=r[0], lo=r[3], hi=r[4], day=r[1]):
+                rows = c.execute("SELECT role, content, timestamp FROM memory WHERE agent=? AND id BETWEEN ? AND ? "
+                                 "AND substr(timestamp,1,10)=? ORDER BY id", (agent, lo, hi, day)).fetchall()
+                return "\n".join(f"[{t[11:16]}] {role}: {(text or '')[:1500]}" for role, text, t in rows)
+            out.append((r[0], start, end, r[2], r[3], r[4], load))
+        return out
+    child, groups = ("day" if level == "week" else "week"), {}
+    for r in c.execute("SELECT id, agent, period_start, summary FROM memory_summaries "
+                       "WHERE level=? AND period_start >= ? ORDER BY period_start", (child, lookback)).fetchall():
+        start, end = _summary_periods(level, datetime.fromisoformat(r["period_start"]))
+        if end > today or (r["agent"], start) in have: continue      # period not over, or done
+        groups.setdefault((r["agent"], start, end), []).append(
+            (r["id"], f"{child} of {r['period_start']}:\n{r['summary']}"))
+    for (agent, start, end), g in groups.items():
+        out.append((agent, start, end, len(g), g[0][0], g[-1][0], lambda g=g: "\n\n".join(t for _, t in g)))
+    return sorted(out, key=lambda x: x[1], reverse=True)
+
+def run_summaries(force: bool = False) -> dict:
+    """One rollup pass — days, then weeks, then months — within summaries.budget_tokens."""
+    import fnmatch
+    cfg = load_cfg()
+    x = cfg.get("summaries", {})
+    if not x.get("enabled", False): return {"skipped": "disabled"}
+    idle = (time.time() - _last_chat_at[0]) / 60
+    if not force and idle < float(x.get("idle_minutes", 10)):
+        return {"skipped": f"chat active {idle:.1f}m ago"}
+    budget, spent, done = int(x.get("budget_tokens", 20000)), 0, {"day": 0, "week": 0, "month": 0}
+    today = datetime.now().date().isoformat()
+    lookback = (datetime.now() - timedelta(days=int(x.get("lookback_days", 60)))).date().isoformat()
+    skip, stopped = x.get("skip_agents", ["ALARM_*"]), None
+    c = _db()
+    try:
+        for level in ("day", "week", "month"):
+            for agent, start, end, n, first_id, last_id, load in _summary_candidates(c, level, lookback, today):
+                if any(fnmatch.fnmatchcase(agent, pat) for pat in skip): continue
+                text = load()[-48000:]
+                cost = len(text) // 4 + SUMMARY_WORDS[level] * 2
+                if spent + cost > budget:
+                    stopped = "budget"; break
+                spent += cost
+                try:
+                    summary = _summarise(level, agent, text, cfg)
+                except RuntimeError as e:
+                    log.warning(f"Memory summary {level} {agent} {start}: {e}")
+                    metric_inc("summaries.failed")
+                    stopped = "call failed"; break
+                c.execute("INSERT OR REPLACE INTO memory_summaries(agent,level,period_start,period_end,summary,"
+                          "source_rows,first_id,last_id,tokens,created) VALUES(?,?,?,?,?,?,?,?,?,?)",
+                          (agent, level, start, end, summary, n, first_id, last_id, cost, datetime.now().isoformat()))
+                c.commit(); done[level] += 1
+            if stopped: break        # coarser levels would roll up an incomplete set
+    finally:
+        c.close()
+    metric_inc("summaries.tokens", spent)
+    if any(done.values()): log.info(f"Memory summaries — {done} (~{spent} tokens)")
+    return {"written": done, "tokens": spent, "budget": budget, "stopped": stopped}
+
+def memory_context(agent: str, max_chars: int = None) -> str:
+    """Summaries for the prompt, newest first: the last week as days, then weeks, then months,
+    each level covering only what the finer ones don't."""
+    x = load_cfg_cached().get("summaries", {})
+    max_chars = max_chars or int(x.get("prompt_chars", 1500))
+    keep = {"day": int(x.get("prompt_days", 7)), "week": int(x.get("prompt_weeks", 4)), "month": 6}
+    c = _db()
+    parts, covered_from, used = [], None, 0
+    for level in ("day", "week", "month"):
+        rows = c.execute("SELECT period_start, period_end, summary FROM memory_summaries WHERE agent=? AND level=? "
+                         "AND period_end <= ? ORDER BY period_start DESC LIMIT ?",
+                         (agent, level, covered_from or "9999", keep[level])).fetchall()
+        for r in rows:
+            line = f"- {level} of {r['period_start']}: {r['summary']}"
+            if used + len(line) > max_chars: break
+            parts.append((r["period_start"], line)); used += len(line)
+            covered_from = r["period_start"]
+    c.close()
+    if not parts: return ""
+    return "## Earlier conversations (summaries)\n" + "\n".join(l for _, l in sorted(parts, reverse=True))
+
+def _sched_summaries():
+    try: run_summaries()
+    except Exception as e: log.error(f"Memory summaries: {e}")
+
+
 # ── HEARTBEAT ─────────────────────────────────────────────
 _hb_lock = threading.Lock()
 
 def run_heartbeat():
     """
     Every 30 minutes:
-    1. Read all core files (soul, identity, character, tools, heartbeat)
-    2. Rewrite memory.md with current state
-    3. Check tasks folder and DB
-    4. Run god mode cycle if active
-    5. Notify owner if enabled
+    1. Collect state — counts from one DB connection, task files
+    2. Rewrite memory.md, only if anything but its timestamp changed
+    3. Stamp heartbeat.md with the run time
+    4. Notify owner if enabled
+    Per-phase timings (ms) go into the heartbeats row.
     """
     if not _hb_lock.acquire(blocking=False):
         return  # Already running — skip
 
+    timings, mark = {}, [time.perf_counter()]
+    def phase(label):
+        now = time.perf_counter()
+        timings[label] = round((now - mark[0]) * 1000, 2); mark[0] = now
+
     try:
         cfg  = load_cfg()
         name = get_agent_name()
         god  = god_mode_active()
-        mems = mem_count()
-        lrns = len(get_learnings(999))
-        ags  = len(get_agents())
 
-        # Pending tasks
         c = _db()
+        n = stats_read(c)
+        mems, lrns, ags = stat(n, "memory"), stat(n, "learnings"), stat(n, "agents")
         db_tasks = c.execute("SELECT title FROM tasks WHERE status='pending' LIMIT 5").fetchall()
         c.close()
         task_files = []
         td = FORGE_WS / "tasks"
         if td.exists():
             task_files = [f.name for f in td.glob("*.md")]
+        phase("state")
 
         # Get previous "doing" from memory for continuity
         prev_doing = ""
@@ -1669,7 +4027,7 @@ def run_heartbeat():
         now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
         task_lines  = "\n".join(f"- {t[0]}" for t in db_tasks) or "None."
         tfile_lines = "\n".join(f"- [file] {f}" for f in task_files) or ""
-        write_core("memory.md", f"""# Memory
+        memory_changed = write_core_if_changed("memory.md", f"""# Memory
 
 > Working memory. Updated: {now_str}
 > I read this at every heartbeat to restore context.
@@ -1701,37 +4059,43 @@ Review identity.md for everything I know about my owner.
 ---
 
 *Rewritten every 30 minutes by heartbeat.*
-""")
+""", current=prev_mem, ignore=r"^> Working memory\. Updated: .*$")
+        phase("memory_md")
 
         # Update heartbeat.md last-run
-        hb = read_core("heartbeat.md")
-        hb = re.sub(r"(## Last Run\n)[^\n#]*", rf"\g<1>{now_str}", hb)
+        prev_hb = read_core("heartbeat.md")
+        hb = re.sub(r"(## Last Run\n)[^\n#]*", rf"\g<1>{now_str}", prev_hb)
         hb = re.sub(r"(## Status\n)[^\n#]*", rf"\g<1>OK — {now_str}", hb)
-        write_core("heartbeat.md", hb)
+        write_core_if_changed("heartbeat.md", hb, current=prev_hb)
+        phase("heartbeat_md")
 
         # God mode cycle — disabled (token cost too high)
         # if god:
         #     threading.Thread(target=_god_cycle, args=(cfg,), daemon=True).start()
 
         # Telegram notify if enabled
-        hb_text = read_core("heartbeat.md")
-        if "Notify Owner: true" in hb_text:
+        if "Notify Owner: true" in hb:
             _notify(f"Heartbeat OK — {mems:,} memories | {name} | mode: {'GOD' if god else 'std'}", cfg)
+        phase("notify")
 
         # Log to DB
         c = _db()
-        c.execute("INSERT INTO heartbeats(status,notes,timestamp) VALUES(?,?,?)",
-                  ("ok", json.dumps({"god":god,"memories":mems,"name":name}), datetime.now().isoformat()))
+        c.execute("INSERT INTO heartbeats(status,notes,timestamp,timings) VALUES(?,?,?,?)",
+                  ("ok", json.dumps({"god":god,"memories":mems,"name":name,"memory_changed":memory_changed}),
+                   datetime.now().isoformat(), json.dumps(timings)))
         c.commit(); c.close()
+        for label, ms in timings.items():
+            metric_observe(f"heartbeat.{label}_ms", ms)
 
-        log.info(f"Heartbeat OK — name={name} god={god} memories={mems}")
+        log.info(f"Heartbeat OK — name={name} god={god} memories={mems} "
+                 f"memory.md {'rewritten' if memory_changed else 'unchanged'} ({sum(timings.values()):.0f}ms)")
 
     except Exception as e:
         log.error(f"Heartbeat error: {e}")
         try:
             c = _db()
-            c.execute("INSERT INTO heartbeats(status,notes,timestamp) VALUES(?,?,?)",
-                      ("error", str(e)[:200], datetime.now().isoformat()))
+            c.execute("INSERT INTO heartbeats(status,notes,timestamp,timings) VALUES(?,?,?,?)",
+                      ("error", str(e)[:200], datetime.now().isoformat(), json.dumps(timings)))
             c.commit(); c.close()
         except:
             pass
@@ -1835,10 +4199,15 @@ def _tg_download(token: str, file_id: str) -> bytes:
         return b""
 
 
-def _tg_vision(image_bytes: bytes, caption: str, cfg: dict) -> str:
+def _tg_vision(image_bytes: bytes, caption: str, cfg: dict, cache: bool = True) -> str:
     """Send image bytes to Anthropic vision and return the response.
-    Uses ForgeAI.call() so both API key and OAuth paths are handled uniformly."""
+    Uses ForgeAI.call() so both API key and OAuth paths are handled uniformly.
+    Model replies are cached by media_key(image, caption)."""
     import base64
+    key = media_key(image_bytes, caption)
+    hit = media_cache_get("vision", key) if cache else None
+    if hit:
+        return hit["result"]
     try:
         api_key = (cfg.get("providers", {}).get("anthropic", {}).get("api_key", "")
                    or os.environ.get("ANTHROPIC_API_KEY", ""))
@@ -1847,18 +4216,12 @@ def _tg_vision(image_bytes: bytes, caption: str, cfg: dict) -> str:
         if not api_key and not oauth:
             return "Image received — configure an Anthropic API key to enable vision analysis."
 
-        # Detect media type
-        media_type = "image/jpeg"
-        if image_bytes[:8] == b'\x89PNG\r\n\x1a\n':
-            media_type = "image/png"
-        elif image_bytes[:4] in (b'GIF8',):
-            media_type = "image/gif"
-        elif len(image_bytes) > 12 and image_bytes[8:12] == b'WEBP':
-            media_type = "image/webp"
+        # Downscale / re-encode / strip metadata; media type comes from the prepared bytes
+        image_bytes, media_type = prepare_image(image_bytes)
         b64 = base64.standard_b64encode(image_bytes).decode()
 
         prompt = caption.strip() if caption.strip() else "Describe this image in detail and note anything important."
-        system = build_system_prompt(cfg=cfg)
+        system = VISION_SYSTEM.format(name=get_agent_name())
 
         # API key path — use SDK directly with multimodal message
         if api_key:
@@ -1872,6 +4235,7 @@ def _tg_vision(image_bytes: bytes, caption: str, cfg: dict) -> str:
                     {"type": "text",  "text": prompt}
                 ]}]
             )
+            media_cache_put("vision", key, {"result": resp.content[0].text})
             return resp.content[0].text
 
         # OAuth path — try Bearer token against REST API
@@ -1894,7 +4258,8 @@ def _tg_vision(image_bytes: bytes, caption: str, cfg: dict) -> str:
         try:
             with _ur.urlopen(req, timeout=60) as r:
                 resp = json.loads(r.read().decode())
-                return resp["content"][0]["text"]
+            media_cache_put("vision", key, {"result": resp["content"][0]["text"]})
+            return resp["content"][0]["text"]
         except Exception as auth_err:
             if "401" in str(auth_err):
                 return "Vision requires an Anthropic API key — add one to forge.json under providers.anthropic.api_key."
@@ -1904,31 +4269,158 @@ def _tg_vision(image_bytes: bytes, caption: str, cfg: dict) -> str:
         return f"Could not analyse image: {e}"
 
 
-def _tg_transcribe_local(audio_path: str) -> str:
-    """Transcribe audio using local faster-whisper (medium model). Zero cost, no API key needed."""
+# Local transcription runs in a pool of `daemon.py --transcribe-worker` processes,
+# each holding one WhisperModel. forge.json "media" settings:
+#   whisper_workers (1), whisper_queue (32), whisper_timeout (300s), whisper_model ("medium"),
+#   whisper_queue_wait_s (600) — how long a caller waits for its chunk to reach a worker,
+#   whisper_recycle_after (0 = never), whisper_max_rss_mb (0 = no limit),
+#   whisper_chunk_s (30) — longest chunk transcribe_stream() hands to one worker
+_transcribe_pool      = None
+_transcribe_pool_lock = threading.Lock()
+
+def transcribe_pool() -> WorkerPool:
+    global _transcribe_pool
+    with _transcribe_pool_lock:
+        if _transcribe_pool is None:
+            m = load_cfg().get("media", {})
+            workers = max(1, int(m.get("whisper_workers", 1)))
+            _transcribe_pool = WorkerPool(
+                "whisper", "transcribe-worker", size=workers,
+                queue_max=int(m.get("whisper_queue", 32)),
+                timeout=float(m.get("whisper_timeout", 300)),
+                queue_wait_s=float(m.get("whisper_queue_wait_s", 600)),
+                recycle_after=int(m.get("whisper_recycle_after", 0)),
+                max_rss_mb=int(m.get("whisper_max_rss_mb", 0)),
+                env={"FORGE_WHISPER_MODEL":   str(m.get("whisper_model", "medium")),
+                     "FORGE_WHISPER_THREADS": str(max(1, (os.cpu_count() or 2) // workers))},
+            )
+        return _transcribe_pool
+
+WHISPER_SR       = 16000
+
+def _group_speech(speech: list, max_len: int, max_gap: int) -> list:
+    """Merge VAD speech ranges (sample offsets) into [start, end] chunks of at most max_len samples."""
+    chunks = []
+    for r in speech:
+        s, e = r["start"], r["end"]
+        while e - s > max_len:
+            chunks.append([s, s + max_len]); s += max_len
+        if chunks and e - chunks[-1][0] <= max_len and s - chunks[-1][1] <= max_gap:
+            chunks[-1][1] = e
+        else:
+            chunks.append([s, e])
+    return chunks
+
+def _transcribe_worker_main() -> int:
+    """
+    Entry point for `daemon.py --transcribe-worker`: load the model once, then answer jobs.
+      op "segment"    — decode audio, split it on voice activity; returns chunk spans + 16 kHz int16 PCM
+      op "transcribe" — transcribe one int16 PCM chunk
+    """
+    import io
+    model = _get_whisper_model()
+    if model is None:
+        return worker_serve(None, {"ok": False, "error": "faster-whisper not installed"})
+    import numpy as np
+    from faster_whisper.audio import decode_audio
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    def segment(header, audio):
+        pcm = decode_audio(io.BytesIO(audio), sampling_rate=WHISPER_SR)
+        speech = get_speech_timestamps(pcm, VadOptions(min_silence_duration_ms=int(header.get("min_silence_ms", 500))))
+        chunks = _group_speech(speech, int(header.get("chunk_s", 30) * WHISPER_SR), 2 * WHISPER_SR)
+        return ({"sr": WHISPER_SR, "duration": round(len(pcm) / WHISPER_SR, 2), "chunks": chunks},
+                (np.clip(pcm, -1, 1) * 32767).astype(np.int16).tobytes())
+
+    def transcribe(header, pcm):
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768
+        segments, info = model.transcribe(audio, language=header.get("language") or None, vad_filter=False)
+        off = header.get("offset", 0.0)
+        segs = [{"start": round(off + seg.start, 2), "end": round(off + seg.end, 2), "text": seg.text.strip()}
+                for seg in segments]
+        return {"text": " ".join(x["text"] for x in segs if x["text"]), "segments": segs,
+                "language": info.language}, b""
+
+    ops = {"segment": segment, "transcribe": transcribe}
+    return worker_serve(lambda h, p, emit: ops[h["op"]](h, p),
+                        {"model": os.environ.get("FORGE_WHISPER_MODEL", "medium")})
+
+
+def transcribe_stream(audio: bytes, language: str = None, cache: bool = True):
+    """
+    Segmented transcription. A worker splits the audio on voice activity, the chunks are
+    transcribed across the whole pool, and results come back in order as they finish.
+    Yields events: {"type": "meta"}, one {"type": "partial"} per chunk, then {"type": "done"}.
+    Results are cached by media_key(audio, language), so a re-sent file costs nothing
+    (cache=False skips the lookup but still stores the fresh result).
+    Raises WorkerPoolError if local transcription is unavailable or a chunk fails.
+    """
+    digest = media_key(audio, language or "")
+    hit = media_cache_get("transcripts", digest) if cache else None
+    if hit:
+        yield {"type": "meta", "hash": digest, "cached": True,
+               "duration": hit.get("duration"), "chunks": len(hit["chunks"])}
+        for i, ch in enumerate(hit["chunks"]):
+            yield {"type": "partial", "index": i, **ch}
+        yield {"type": "done", "hash": digest, "cached": True, "text": hit["text"],
+               "language": hit.get("language"), "duration": hit.get("duration")}
+        return
+
+    pool, t0 = transcribe_pool(), time.perf_counter()
+    m = load_cfg_cached().get("media", {})
+    with _span("media.segment", bytes=len(audio)):
+        sh, pcm = pool.call({"op": "segment", "chunk_s": float(m.get("whisper_chunk_s", 30))}, audio)
+    if not sh.get("ok"):
+        raise WorkerPoolError(sh.get("error", "segmentation failed"))
+    sr, spans = sh["sr"], sh["chunks"]
+    yield {"type": "meta", "hash": digest, "cached": False, "duration": sh["duration"], "chunks": len(spans)}
+
+    # Chunk 0 runs alone so its detected language can pin the rest; after that keep
+    # every worker busy without flooding the shared queue.
+    window, pending, chunks, nxt = pool.size * 2, {}, [], 0
+    try:
+        for i in range(len(spans)):
+            while nxt < len(spans) and (nxt == i or (i > 0 and nxt - i < window)):
+                s, e = spans[nxt]
+                pending[nxt] = pool.submit({"op": "transcribe", "offset": s / sr, "language": language},
+                                           pcm[2 * s:2 * e])
+                nxt += 1
+            with _span("media.transcribe_chunk", index=i):
+                rh, _ = pool.wait(pending.pop(i))
+            if not rh.get("ok"):
+                raise WorkerPoolError(rh.get("error", "chunk failed"))
+            language = language or rh.get("language")
+            ch = {"start": round(spans[i][0] / sr, 2), "end": round(spans[i][1] / sr, 2),
+                  "text": rh["text"], "segments": rh["segments"]}
+            chunks.append(ch)
+            yield {"type": "partial", "index": i, "ms": rh.get("ms"), **ch}
+    finally:
+        for fut in pending.values(): fut.cancel()
+
+    result = {"text": " ".join(c["text"] for c in chunks if c["text"]), "language": language,
+              "duration": sh["duration"], "chunks": chunks}
+    media_cache_put("transcripts", digest, result)
+    yield {"type": "done", "hash": digest, "cached": False, "text": result["text"], "language": language,
+           "duration": sh["duration"], "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+
+def _tg_transcribe_local(audio: bytes, cache: bool = True) -> str:
+    """Transcribe audio bytes with local faster-whisper via the worker pool. Zero cost, no API key needed."""
     try:
-        model = _get_whisper_model()
-        if model is None:
-            log.info("faster-whisper not installed — falling back to OpenAI API")
-            return ""
-        segments, _ = model.transcribe(audio_path)
-        return " ".join(seg.text for seg in segments).strip()
-    except Exception as e:
-        log.error(f"faster-whisper error: {e}")
-        return ""
+        with _span("media.transcribe_local", bytes=len(audio)):
+            for ev in transcribe_stream(audio, cache=cache):
+                if ev["type"] == "done":
+                    return ev["text"]
+    except WorkerPoolError as e:
+        log.info(f"Local transcription unavailable ({e}) — falling back to OpenAI API")
+    return ""
 
 
-def _tg_transcribe(audio_bytes: bytes, cfg: dict) -> str:
+def _tg_transcribe(audio_bytes: bytes, cfg: dict, cache: bool = True) -> str:
     """Transcribe voice/audio bytes. Tries local faster-whisper first, falls back to OpenAI API."""
-    import tempfile, os
-    tmp = None
     try:
-        with tempfile.NamedTemporaryFile(suffix=".ogg", delete=False) as f:
-            f.write(audio_bytes)
-            tmp = f.name
-
         # Try local faster-whisper first (free, no API key)
-        transcript = _tg_transcribe_local(tmp)
+        transcript = _tg_transcribe_local(audio_bytes, cache)
         if transcript:
             return transcript
 
@@ -1939,101 +4431,132 @@ def _tg_transcribe(audio_bytes: bytes, cfg: dict) -> str:
         )
         if not openai_key:
             return ""
+        # Audio goes to curl on stdin — no temp file
+        fname = "audio.wav;type=audio/wav" if audio_bytes[:4] == b"RIFF" else "audio.ogg;type=audio/ogg"
         result = subprocess.run([
             "curl", "-s", "-X", "POST",
             "https://api.openai.com/v1/audio/transcriptions",
             "-H", f"Authorization: Bearer {openai_key}",
             "-F", "model=whisper-1",
-            "-F", f"file=@{tmp};type=audio/ogg"
-        ], capture_output=True, text=True, timeout=30)
+            "-F", f"file=@-;filename={fname}"
+        ], input=audio_bytes, capture_output=True, timeout=30)
         if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return data.get("text", "").strip()
+            text = json.loads(result.stdout).get("text", "").strip()
+            if text:
+                media_cache_put("transcripts", media_key(audio_bytes),
+                                {"text": text, "language": None, "duration": None,
+                                 "chunks": [{"start": 0.0, "end": None, "text": text, "segments": []}]})
+            return text
     except Exception as e:
         log.error(f"Transcription error: {e}")
-    finally:
-        if tmp and os.path.exists(tmp):
-            try: os.unlink(tmp)
-            except: pass
     return ""
 
 
-def _tg_video(video_bytes: bytes, caption: str, cfg: dict) -> str:
-    """Process a video: extract audio → transcribe locally, extract 4 frames → Claude vision → combined response."""
-    import tempfile, os, base64, shutil, urllib.request
-
-    tmp_video = tmp_audio = None
-    frames_dir = None
+# Video: one ffmpeg pass pulls the audio track and keyframes, then transcription and
+# vision run side by side. Frame count follows the clip length. forge.json "media":
+#   video_frame_every_s (10), video_max_frames (8)
 
+def _video_extract(src: str, out_dir: str, cfg: dict) -> dict:
+    """
+    Single ffmpeg pass over a video file: only keyframes are decoded (-skip_frame nokey),
+    spaced evenly over the clip, and the audio track is written as 16 kHz mono WAV — what
+    whisper resamples to anyway, and ~10x cheaper than encoding Opus.
+    Returns {"duration": s, "audio": bytes, "frames": [jpeg bytes]}.
+    """
+    import math
+    m = cfg.get("media", {})
     try:
-        # Write video to temp file
-        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
-            f.write(video_bytes)
-            tmp_video = f.name
+        probe = json.loads(subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration:stream=codec_type",
+             "-of", "json", src], capture_output=True, text=True, timeout=30).stdout or "{}")
+        duration  = float(probe.get("format", {}).get("duration") or 0)
+        has_audio = any(st.get("codec_type") == "audio" for st in probe.get("streams", []))
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        duration, has_audio = 0.0, True
+    max_frames = max(1, int(m.get("video_max_frames", 8)))
+    if duration > 0:
+        n   = min(max_frames, max(3, math.ceil(duration / float(m.get("video_frame_every_s", 10)))))
+        gap = duration / n
+    else:
+        n, gap = min(4, max_frames), 0.0
+
+    out = Path(out_dir)
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-skip_frame:v", "nokey", "-i", src,
+           "-map", "0:v:0", "-an",
+           "-vf", f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{gap:.3f})',scale=640:-2",
+           "-vsync", "vfr", "-frames:v", str(n), "-q:v", "4", str(out / "frame%02d.jpg")]
+    if has_audio:   # an output with no streams would fail the whole command
+        cmd += ["-map", "0:a:0", "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le",
+                str(out / "audio.wav")]
+    with _span("media.ffmpeg", frames=n, duration=round(duration, 1)):
+        subprocess.run(cmd, capture_output=True, timeout=120)
+    audio = out / "audio.wav"
+    return {"duration": duration,
+            "audio":    audio.read_bytes() if audio.exists() else b"",
+            "frames":   [f.read_bytes() for f in sorted(out.glob("frame*.jpg"))[:n]]}
+
+
+def _video_vision(frames: list, prompt: str, cfg: dict) -> str:
+    """Send video frames to Claude vision over the REST API. Returns "" without credentials."""
+    import base64, urllib.request
+    api_key = (cfg.get("providers", {}).get("anthropic", {}).get("api_key", "")
+               or os.environ.get("ANTHROPIC_API_KEY", ""))
+    oauth_token = (cfg.get("providers", {}).get("anthropic", {}).get("oauth_token", "")
+                   or os.environ.get("CLAUDE_CODE_OAUTH_TOKEN", ""))
+    if not frames or not (api_key or oauth_token):
+        return ""
 
-        # Extract audio track
-        tmp_audio = tmp_video.replace(".mp4", "_audio.ogg")
-        subprocess.run(
-            ["ffmpeg", "-y", "-i", tmp_video, "-vn", "-acodec", "libopus", tmp_audio],
-            capture_output=True, timeout=60
-        )
+    content = [{"type": "image", "source": {"type": "base64", "media_type": "image/jpeg",
+                                            "data": base64.standard_b64encode(fb).decode()}}
+               for fb in frames]
+    content.append({"type": "text", "text": prompt})
 
-        # Transcribe audio
-        transcript = ""
-        if os.path.exists(tmp_audio) and os.path.getsize(tmp_audio) > 0:
-            transcript = _tg_transcribe_local(tmp_audio)
-            if not transcript:
-                with open(tmp_audio, "rb") as af:
-                    transcript = _tg_transcribe(af.read(), cfg)
+    headers = {"Content-Type": "application/json", "anthropic-version": "2023-06-01"}
+    if api_key:
+        headers["x-api-key"] = api_key
+    else:
+        headers["Authorization"] = f"Bearer {oauth_token}"
 
-        # Extract 4 key frames
-        frames_dir = tempfile.mkdtemp()
-        subprocess.run(
-            ["ffmpeg", "-y", "-i", tmp_video,
-             "-vf", "select='not(mod(n\\,floor(nb_frames/4)))',scale=640:-1",
-             "-vsync", "vfr", "-frames:v", "4",
-             f"{frames_dir}/frame%02d.jpg"],
-            capture_output=True, timeout=60
-        )
-        frame_files = sorted(Path(frames_dir).glob("frame*.jpg"))
+    payload = json.dumps({
+        "model": "claude-sonnet-4-6",
+        "max_tokens": 1024,
+        "messages": [{"role": "user", "content": content}]
+    }).encode()
 
-        # Send frames to Claude vision
-        api_key = (cfg.get("providers", {}).get("anthropic", {}).get("api_key", "")
-                   or os.environ.get("ANTHROPIC_API_KEY", ""))
-        oauth_token = (cfg.get("providers", {}).get("anthropic", {}).get("oauth_token", "")
-                       or os.environ.get("CLAUDE_CODE_OAUTH_TOKEN", ""))
-
-        vision_result = ""
-        if frame_files and (api_key or oauth_token):
-            content = []
-            for fp in frame_files[:4]:
-                b64 = base64.standard_b64encode(fp.read_bytes()).decode()
-                content.append({"type": "image", "source": {"type": "base64", "media_type": "image/jpeg", "data": b64}})
-
-            prompt = caption.strip() if caption.strip() else "Analyse these 4 video frames and describe what's happening."
-            if transcript:
-                prompt += f"\n\nAudio transcript: {transcript}"
-            content.append({"type": "text", "text": prompt})
-
-            headers = {"Content-Type": "application/json", "anthropic-version": "2023-06-01"}
-            if api_key:
-                headers["x-api-key"] = api_key
-            else:
-                headers["Authorization"] = f"Bearer {oauth_token}"
+    base = os.environ.get("ANTHROPIC_BASE_URL", "https://api.anthropic.com").rstrip("/")
+    req = urllib.request.Request(base + "/v1/messages", data=payload, headers=headers, method="POST")
+    with urllib.request.urlopen(req, timeout=60) as r:
+        return json.loads(r.read().decode())["content"][0]["text"]
 
-            payload = json.dumps({
-                "model": "claude-sonnet-4-6",
-                "max_tokens": 1024,
-                "messages": [{"role": "user", "content": content}]
-            }).encode()
 
-            req = urllib.request.Request(
-                "https://api.anthropic.com/v1/messages",
-                data=payload, headers=headers, method="POST"
-            )
-            with urllib.request.urlopen(req, timeout=60) as r:
-                resp = json.loads(r.read().decode())
-                vision_result = resp["content"][0]["text"]
+def _tg_video(video_bytes: bytes, caption: str, cfg: dict, cache: bool = True) -> str:
+    """Process a video: one ffmpeg pass for audio + keyframes, then transcription and vision in parallel.
+    The combined reply is cached by media_key(video, caption)."""
+    import tempfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    digest = media_key(video_bytes, caption)
+    hit = media_cache_get("video", digest) if cache else None
+    if hit:
+        return hit["result"]
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="forge-video-") as tmp:
+            src = os.path.join(tmp, "video.mp4")
+            Path(src).write_bytes(video_bytes)
+            media = _video_extract(src, tmp, cfg)
+
+        frames = media["frames"]
+        prompt = caption.strip() if caption.strip() else \
+            f"Analyse these {len(frames)} video frames, in order, and describe what's happening."
+
+        # Vision no longer sees the transcript: the two run concurrently and are combined below.
+        with _span("media.video_parallel", frames=len(frames), audio_bytes=len(media["audio"])):
+            with ThreadPoolExecutor(2, thread_name_prefix="video") as ex:
+                t = ex.submit(_trace_bind(_tg_transcribe), media["audio"], cfg) if media["audio"] else None
+                v = ex.submit(_trace_bind(_video_vision), frames, prompt, cfg)
+                transcript = t.result() if t else ""
+                vision_result = v.result()
 
         # Build combined response
         parts = []
@@ -2041,20 +4564,17 @@ def _tg_video(video_bytes: bytes, caption: str, cfg: dict) -> str:
             parts.append(f"*Audio:* {transcript}")
         if vision_result:
             parts.append(f"*Vision:* {vision_result}")
+        if not parts:
+            return "Could not extract content from video."
 
-        return "\n\n".join(parts) if parts else "Could not extract content from video."
+        result = "\n\n".join(parts)
+        media_cache_put("video", digest, {"result": result, "duration": media["duration"],
+                                          "frames": len(frames), "transcript": transcript})
+        return result
 
     except Exception as e:
         log.error(f"Video processing error: {e}")
         return f"Video processing failed: {e}"
-    finally:
-        for path in [tmp_video, tmp_audio]:
-            if path and os.path.exists(path):
-                try: os.unlink(path)
-                except: pass
-        if frames_dir and os.path.exists(frames_dir):
-            try: shutil.rmtree(frames_dir)
-            except: pass
 
 
 
@@ -2072,7 +4592,7 @@ def _spawn_claude_fresh(prompt: str, workdir: str = None, label: str = "") -> st
 
     env = os.environ.copy()
     env["CLAUDE_CODE_OAUTH_TOKEN"] = oauth_token
-    env["PATH"] = "/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin:" + env.get("PATH", "")
+    env["PATH"] = BIN_PATH + ":" + env.get("PATH", "")
 
     args = ["claude", "-p", "--output-format", "json",
             "--dangerously-skip-permissions", "--model", "sonnet", prompt]
@@ -2114,6 +4634,82 @@ def run_parallel(task_map: dict) -> dict:
     return results
 
 
+# ── PAGING ────────────────────────────────────────────────
+# List endpoints share ?limit=&fields=&after_id=&before_id=.
+#   after_id   rows with a larger id, oldest first — "what's new since"
+#   before_id  rows with a smaller id, newest first — scrolling back
+#   neither    the newest page, in the endpoint's usual order
+# The next cursors come back as X-Next-After-Id / X-Next-Before-Id (the latter only
+# when the page is full). limit is clamped to the endpoint's maximum.
+PAGE_LIMITS = {"memory": (40, 500), "tasks": (50, 200), "learnings": (50, 500),
+               "board": (500, 1000), "skills": (200, 1000)}   # (default, max)
+PAGE_HEADERS = ("X-Next-After-Id", "X-Next-Before-Id", "X-Next-After")
+SKILL_LIST_FIELDS = ["name", "file", "stem", "description", "usage", "code"]
+_table_columns = {}
+
+def table_columns(table: str) -> list:
+    if table not in _table_columns:
+        c = _db(); _table_columns[table] = [r[1] for r in c.execute(f"PRAGMA table_info({table})")]; c.close()
+    return _table_columns[table]
+
+def _qs_int(qs: dict, key: str, default=None):
+    v = qs.get(key, [None])[0]
+    if v in (None, ""): return default
+    try: return int(v)
+    except ValueError: raise ValueError(f"{key} must be an integer")
+
+def page_fields(qs: dict, allowed: list, default: list = None) -> list:
+    """?fields=a,b as a list of known names; `id` is always included when the source has one."""
+    raw = qs.get("fields", [""])[0]
+    if not raw: return list(default or allowed)
+    want = [f.strip() for f in raw.split(",") if f.strip()]
+    bad = [f for f in want if f not in allowed]
+    if bad: raise ValueError(f"unknown field(s): {', '.join(bad)} — allowed: {', '.join(allowed)}")
+    if "id" in allowed and "id" not in want: want.insert(0, "id")
+    return want
+
+def page_request(qs: dict, table: str, kind: str = None) -> dict:
+    """Parse and bound the paging parameters. Raises ValueError for the client."""
+    default, maximum = PAGE_LIMITS[kind or table]
+    page = {"limit": max(1, min(_qs_int(qs, "limit", default), maximum)),
+            "after_id": _qs_int(qs, "after_id"), "before_id": _qs_int(qs, "before_id"),
+            "fields": page_fields(qs, table_columns(table))}
+    if page["after_id"] is not None and page["before_id"] is not None:
+        raise ValueError("use after_id or before_id, not both")
+    return page
+
+def page_query(c, table: str, page: dict, where: str = "1", params=(), order: str = "DESC"):
+    """(row cursor, cursor headers) for one page; rows come out in `order` unless after_id is set."""
+    params = list(params)
+    if page["after_id"] is not None:
+        where, scan, order = f"({where}) AND id > ?", "ASC", "ASC"; params.append(page["after_id"])
+    elif page["before_id"] is not None:
+        where, scan = f"({where}) AND id < ?", "DESC"; params.append(page["before_id"])
+    else:
+        scan = "DESC"
+    sql = f"SELECT {{cols}} FROM {table} WHERE {where} ORDER BY id {scan} LIMIT ?"
+    lo, hi, n = c.execute(f"SELECT MIN(id), MAX(id), COUNT(*) FROM ({sql.format(cols='id')})",
+                          [*params, page["limit"]]).fetchone()
+    headers = {}
+    if n:
+        headers["X-Next-After-Id"] = hi
+        if n == page["limit"]: headers["X-Next-Before-Id"] = lo
+    sql = sql.format(cols=", ".join(page["fields"]))
+    if order != scan: sql = f"SELECT * FROM ({sql}) ORDER BY id {order}"
+    return c.execute(sql, [*params, page["limit"]]), headers
+
+def json_rows(rows, batch: int = 200):
+    """Encode rows as a JSON array, one chunk per `batch` rows, without building the list."""
+    yield b"["
+    sep, buf = "", []
+    for r in rows:
+        buf.append(json.dumps(dict(r), ensure_ascii=False))
+        if len(buf) >= batch:
+            yield (sep + ",".join(buf)).encode(); sep, buf = ",", []
+    if buf: yield (sep + ",".join(buf)).encode()
+    yield b"]"
+
+
 # ── HTTP SERVER ───────────────────────────────────────────
 class Handler(BaseHTTPRequestHandler):
     def log_message(self, *a): pass
@@ -2121,15 +4717,77 @@ class Handler(BaseHTTPRequestHandler):
     def _cors(self):
         self.send_header("Access-Control-Allow-Origin","*")
         self.send_header("Access-Control-Allow-Methods","GET,POST,OPTIONS")
-        self.send_header("Access-Control-Allow-Headers","Content-Type")
+        self.send_header("Access-Control-Expose-Headers", ", ".join((TRACE_HEADER, *PAGE_HEADERS)))
+        self.send_header("Access-Control-Allow-Headers","Content-Type, X-Forge-Trace-Id")
 
     def out(self, data, code=200):
         body = json.dumps(data, ensure_ascii=False).encode()
         self.send_response(code)
+        self._status = code
         self.send_header("Content-Type","application/json; charset=utf-8")
         self.send_header("Content-Length", len(body))
+        trace_id = current_trace_id()
+        if trace_id: self.send_header(TRACE_HEADER, trace_id)
         self._cors(); self.end_headers(); self.wfile.write(body)
 
+    def out_stream(self, chunks, headers: dict = None):
+        """Send a JSON body as it is produced (no Content-Length; the connection closes after)."""
+        self.send_response(200)
+        self._status = 200
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        for k, v in (headers or {}).items(): self.send_header(k, str(v))
+        trace_id = current_trace_id()
+        if trace_id: self.send_header(TRACE_HEADER, trace_id)
+        self._cors(); self.end_headers()
+        try:
+            for chunk in chunks: self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            getattr(chunks, "close", lambda: None)()
+        self.close_connection = True
+
+    def ndjson(self, events):
+        """Stream dicts as newline-delimited JSON, each line flushed as soon as it is produced."""
+        self.send_response(200)
+        self._status = 200
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        trace_id = current_trace_id()
+        if trace_id: self.send_header(TRACE_HEADER, trace_id)
+        self._cors(); self.end_headers()
+        try:
+            for ev in events:
+                self.wfile.write((json.dumps(ev, ensure_ascii=False) + "\n").encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass   # client went away; closing the generator cancels its queued work
+        finally:
+            getattr(events, "close", lambda: None)()
+        self.close_connection = True
+
+    def _out_page(self, qs: dict, table: str, where: str = "1", params=(), order: str = "DESC"):
+        """One page of `table` (see PAGING), streamed."""
+        try: page = page_request(qs, table)
+        except ValueError as e: self.out({"error": str(e)}, 400); return
+        c = _db()
+        try:
+            rows, headers = page_query(c, table, page, where, params, order)
+            self.out_stream(json_rows(rows), headers)
+        finally:
+            c.close()
+
+    def _lease_allowed(self) -> bool:
+        """Lease endpoints: coordinator on, and the token if one is set (loopback only if not)."""
+        x = _coord_cfg()
+        if not x["enabled"]:
+            self.out({"error": "coordinator mode is off"}, 404); return False
+        if x["token"]:
+            import hmac
+            if hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {x['token']}"): return True
+        elif self.client_address[0] in ("127.0.0.1", "::1"): return True
+        self.out({"error": "unauthorized"}, 401); return False
+
     def do_OPTIONS(self):
         self.send_response(200); self._cors(); self.end_headers()
 
@@ -2137,42 +4795,118 @@ class Handler(BaseHTTPRequestHandler):
         n = int(self.headers.get("Content-Length",0))
         return json.loads(self.rfile.read(n)) if n else {}
 
+    def _traced(self, method, fn):
+        p = urlparse(self.path).path
+        with _slow("http", f"{method} {p}", self.headers.get("Content-Length", "0") + " bytes"):
+            if p in TRACE_SKIP or p.startswith("/traces/") or p.startswith("/debug/"):
+                return fn()
+            self._status = 200
+            _trace_begin(f"{method} {p}", self.headers.get(TRACE_HEADER, ""))
+            try:
+                fn()
+            finally:
+                _trace_end(self._status)
+
+    BOOT_EXEMPT = ("/status", "/ready", "/ping", "/debug/", "/traces/", "/metrics")
+
     def do_GET(self):
+        if self._booting(): return
+        self._traced("GET", self._do_GET)
+
+    def do_POST(self):
+        if self._booting(): return
+        self._traced("POST", self._do_POST)
+
+    def _booting(self) -> bool:
+        """Until the DB stage is done, only the liveness/readiness endpoints answer."""
+        if boot_ready("db"): return False
         p = urlparse(self.path).path
+        if p.startswith(self.BOOT_EXEMPT): return False
+        self.out({"error": "starting", **boot_state()}, 503)
+        return True
+
+    def _do_GET(self):
+        p = urlparse(self.path).path
+
+        if p == "/traces/recent":
+            try: limit = _qs_int(parse_qs(urlparse(self.path).query), "limit", 50)
+            except ValueError as e: self.out({"error": str(e)}, 400); return
+            self.out(recent_traces(max(1, min(limit, TRACE_BUFFER)))); return
+
+        if p.startswith("/traces/"):
+            tr = get_trace(p[len("/traces/"):])
+            if tr: self.out(tr); return
+            self.out({"error": "trace not found"}, 404); return
+
+        if p == "/debug/profile":
+            qs = parse_qs(urlparse(self.path).query)
+            try: seconds, hz = max(0.1, min(float(qs.get("seconds", ["5"])[0]), 120)), _qs_int(qs, "hz", 100)
+            except ValueError: self.out({"error": "seconds and hz must be numbers"}, 400); return
+            result = profile_threads(seconds, hz)
+            if "error" in result: self.out(result, 409); return
+            if qs.get("format", ["collapsed"])[0] == "json": self.out(result); return
+            body = (result["collapsed"] + "\n").encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; charset=utf-8")
+            self.send_header("Content-Length", len(body))
+            self._cors(); self.end_headers(); self.wfile.write(body); return
+
+        if p == "/debug/slow":
+            try: limit = _qs_int(parse_qs(urlparse(self.path).query), "limit", 50)
+            except ValueError as e: self.out({"error": str(e)}, 400); return
+            self.out({"thresholds_ms": load_cfg_cached().get("debug", {}).get("slow_ms"),
+                      "ops": recent_slow_ops(max(1, min(limit, SLOW_BUFFER)))}); return
+
+        if p == "/metrics":
+            if parse_qs(urlparse(self.path).query).get("format", ["json"])[0] == "prometheus":
+                body = metrics_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", len(body))
+                self._cors(); self.end_headers(); self.wfile.write(body); return
+            self.out(metrics_snapshot()); return
+
+        if p == "/ready":
+            st = boot_state()
+            self.out(st, 200 if st["ready"] else 503); return
+
+        if p == "/ping":
+            self.out({"ok": True}); return
 
         if p == "/status":
+            if not boot_ready("db"):
+                self.out({"online": True, "ready": False, "boot": boot_state()}); return
             cfg = load_cfg()
             c = _db()
-            done = c.execute("SELECT COUNT(*) FROM tasks WHERE status='completed'").fetchone()[0]
-            ags  = c.execute("SELECT COUNT(*) FROM agents").fetchone()[0]
-            hb   = c.execute("SELECT * FROM heartbeats ORDER BY id DESC LIMIT 1").fetchone()
+            n  = stats_read(c)
+            hb = c.execute("SELECT * FROM heartbeats ORDER BY id DESC LIMIT 1").fetchone()
             c.close()
             pm = cfg.get("models",{}).get("primary",{})
             self.out({
                 "online":True, "name":get_agent_name(),
-                "memories":mem_count(), "tasks":done, "agents":ags+1,
+                "memories":stat(n, "memory"), "tasks":stat(n, "tasks", "status", "completed"),
+                "agents":stat(n, "agents")+1,
                 "owner":cfg.get("owner",""), "primary_model":pm.get("model",""),
                 "provider":pm.get("provider",""), "god_mode":god_mode_active(),
                 "first_contact":is_first_contact(),
                 "last_heartbeat":dict(hb) if hb else None,
                 "workspace":str(FORGE_WS),
+                "ready":boot_ready(),
+                "worker":{"pid": os.getpid(), "slot": SERVER["slot"], "workers": SERVER["workers"],
+                          "leader": is_leader(), "events_next": _events_seq,
+                          "local": ["/events", "/metrics", "/traces", "/debug/slow"]},
             }); return
 
         if p == "/agents":
             self.out(get_agents()); return
 
         if p.startswith("/history"):
-            qs    = parse_qs(urlparse(self.path).query)
-            ag    = qs.get("agent",["FORGE"])[0]
-            limit = int(qs.get("limit",["40"])[0])
-            c     = _db()
-            rows  = c.execute("SELECT * FROM memory WHERE agent=? ORDER BY id DESC LIMIT ?",
-                               (ag,limit)).fetchall()
-            c.close(); self.out([dict(r) for r in reversed(rows)]); return
+            qs = parse_qs(urlparse(self.path).query)
+            # chat order: oldest first, so the newest page is read backwards and flipped in SQL
+            self._out_page(qs, "memory", "agent=?", (qs.get("agent",["FORGE"])[0],), order="ASC"); return
 
         if p == "/tasks":
-            c = _db(); rows = c.execute("SELECT * FROM tasks ORDER BY id DESC LIMIT 50").fetchall()
-            c.close(); self.out([dict(r) for r in rows]); return
+            self._out_page(parse_qs(urlparse(self.path).query), "tasks"); return
 
         if p == "/tasks/active":
             active = []
@@ -2187,11 +4921,23 @@ class Handler(BaseHTTPRequestHandler):
             self.out(active); return
 
         if p == "/skills":
-            skills = []
-            if SKILLS_DIR.exists():
-                for f in SKILLS_DIR.glob("*.py"):
-                    skills.append({"name":f.stem,"file":str(f),"size":f.stat().st_size})
-            self.out(skills); return
+            self.out([{"name": e["stem"], "file": str(e["file"]), "size": e["size"]}
+                      for e in skill_registry.scan()]); return
+
+        if p == "/skill/installs":
+            self.out(skill_installs()); return
+
+        if p.startswith("/skill/install/"):
+            job = skill_install(p[len("/skill/install/"):])
+            if not job: self.out({"error": "install not found"}, 404); return
+            self.out(job.info()); return
+
+        if p == "/skills/stats":
+            self.out(skill_registry.stats()); return
+
+        if p == "/skills/pool":
+            pool = skill_pool()
+            self.out(pool.status() if pool else {"name": "skills", "available": False, "error": "skills.pool is off"}); return
 
         if p == "/browser/check":
             self.out({"status": browser_install_check()}); return
@@ -2201,14 +4947,19 @@ class Handler(BaseHTTPRequestHandler):
             c.close(); self.out([dict(r) for r in rows]); return
 
         if p == "/learnings":
-            self.out(get_learnings(50)); return
+            self._out_page(parse_qs(urlparse(self.path).query), "learnings"); return
 
         if p == "/tasks/board":
-            self.out(get_tasks_board()); return
+            try: page = page_request(parse_qs(urlparse(self.path).query), "tasks", "board")
+            except ValueError as e: self.out({"error": str(e)}, 400); return
+            self.out_stream(tasks_board_stream(page)); return
 
         if p == "/usage":
             self.out(get_usage_stats()); return
 
+        if p == "/stats/check":
+            self.out(stats_check()); return
+
         if p == "/config":
             cfg = load_cfg()
             safe = json.loads(json.dumps(cfg))
@@ -2235,7 +4986,7 @@ class Handler(BaseHTTPRequestHandler):
 
         if p == "/probe":
             # Detect all available Claude/Anthropic tools on this machine
-            path_str = "/opt/homebrew/bin:/usr/local/bin:/usr/bin:/bin:" + os.environ.get("PATH","")
+            path_str = BIN_PATH + ":" + os.environ.get("PATH","")
             tools_found = {}
             # Known tools
             for tool in ["claude", "claude-cowork", "cowork", "anthropic"]:
@@ -2276,6 +5027,9 @@ class Handler(BaseHTTPRequestHandler):
             c.close()
             self.out([dict(r) for r in rows]); return
 
+        if p == "/alarms/stats":
+            self.out(alarm_stats()); return
+
         if p == "/alarm-logs":
             qs = parse_qs(urlparse(self.path).query)
             alarm_id = int(qs.get("alarm_id", [0])[0])
@@ -2295,6 +5049,60 @@ class Handler(BaseHTTPRequestHandler):
                 state = {"active": False}
             self.out(state); return
 
+        if p == "/memory/summaries":
+            qs = parse_qs(urlparse(self.path).query)
+            c = _db()
+            rows = c.execute("SELECT * FROM memory_summaries WHERE agent=? ORDER BY period_start DESC, level LIMIT ?",
+                             (qs.get("agent", ["FORGE"])[0].upper(), int(qs.get("limit", ["50"])[0]))).fetchall()
+            c.close(); self.out([dict(r) for r in rows]); return
+
+        if p == "/db/size":
+            self.out(db_size_trend()); return
+
+        if p == "/lease/status":
+            self.out(lease_status()); return
+
+        if p == "/db/backups":
+            self.out(list_backups()); return
+
+        if p == "/archive/search":
+            qs  = parse_qs(urlparse(self.path).query)
+            arg = lambda k, d="": qs.get(k, [d])[0]
+            try:
+                self.out(archive_search(arg("table", "memory"), arg("q"), arg("since"), arg("until"),
+                                        arg("agent"), min(int(arg("limit", "50")), 1000))); return
+            except ValueError as e:
+                self.out({"error": str(e)}, 400); return
+
+        if p == "/events":
+            qs = parse_qs(urlparse(self.path).query)
+            try: after, wait = _qs_int(qs, "after", 0), min(float(qs.get("wait", ["0"])[0]), 60)
+            except ValueError: self.out({"error": "after must be an integer and wait a number"}, 400); return
+            self.out(events_since(after, wait, qs.get("type", [None])[0])); return
+
+        if p == "/run/jobs":
+            self.out(exec_jobs()); return
+
+        m = re.fullmatch(r"/run/([0-9a-f]+)(/stream)?", p)
+        if m:
+            job = exec_job(m.group(1))
+            if not job: self.out({"error": "job not found"}, 404); return
+            if m.group(2):
+                try: start = _qs_int(parse_qs(urlparse(self.path).query), "from", 0)
+                except ValueError as e: self.out({"error": str(e)}, 400); return
+                self.ndjson(job.follow(max(0, start))); return
+            self.out({**job.info(), "output": job.result(4096)}); return
+
+        if p == "/exec/status":
+            pool = exec_pool()
+            self.out(pool.status() if pool else {"name": "exec", "available": False, "error": "exec.pool is off"}); return
+
+        if p == "/media/cache/status":
+            self.out(media_cache_status()); return
+
+        if p == "/media/transcribe/status":
+            self.out(transcribe_pool().status()); return
+
         if p == "/skills/get":
             stem = parse_qs(urlparse(self.path).query).get("name", [""])[0]
             stem = re.sub(r"[^a-zA-Z0-9_]", "_", stem.lower())
@@ -2304,27 +5112,22 @@ class Handler(BaseHTTPRequestHandler):
             self.out({"error": "skill not found"}, 404); return
 
         if p == "/skills/list":
-            SKILLS_DIR.mkdir(parents=True, exist_ok=True)
-            skills = []
-            for f in sorted(SKILLS_DIR.glob("*.py")):
-                if f.name.startswith("_"): continue
-                try:
-                    text      = f.read_text()
-                    lines     = text.split("\n")
-                    name_line = next((l for l in lines if l.startswith("Skill:")), "")
-                    name      = name_line.replace("Skill:", "").strip() or f.stem
-                    desc      = next((l.strip().strip('"').strip("'") for l in lines[1:8]
-                                      if l.strip() and not l.strip().startswith(
-                                          ('"""', "'''", "#", "Skill:", "Usage:", "Requires:", "Setup:")
-                                      )), f.stem)
-                except:
-                    name, desc, text = f.stem, "", ""
-                skills.append({"name": name, "file": f.name, "stem": f.stem, "description": desc, "code": text})
-            self.out(skills); return
+            # sorted by stem; ?after=<stem> is the cursor. Source only with fields=...,code
+            qs = parse_qs(urlparse(self.path).query)
+            try:
+                fields = page_fields(qs, SKILL_LIST_FIELDS, [f for f in SKILL_LIST_FIELDS if f != "code"])
+                limit  = max(1, min(_qs_int(qs, "limit", PAGE_LIMITS["skills"][0]), PAGE_LIMITS["skills"][1]))
+            except ValueError as e: self.out({"error": str(e)}, 400); return
+            after = qs.get("after", [""])[0]
+            rows = [e for e in sorted(skill_registry.scan(), key=lambda e: e["stem"])
+                    if not e["stem"].startswith("_") and e["stem"] > after][:limit]
+            listed = [{f: (f"{e['stem']}.py" if f == "file" else e[f]) for f in fields} for e in rows]
+            self.out_stream(json_rows(listed),
+                            {"X-Next-After": rows[-1]["stem"]} if len(rows) == limit else None); return
 
         self.out({"error":"not found"},404)
 
-    def do_POST(self):
+    def _do_POST(self):
         try:
             b = self._body()
         except Exception as e:
@@ -2352,7 +5155,7 @@ class Handler(BaseHTTPRequestHandler):
             except Exception:
                 pass  # never block chat on task logging failure
             try:
-                resp = process_chat(msg, ag)
+                resp = process_chat(msg, ag, b.get("async_directives"))
                 self.out({"response":resp,"agent":ag,
                           "god_mode":god_mode_active(),"name":get_agent_name()})
                 # Complete task in forge.db
@@ -2479,39 +5282,76 @@ class Handler(BaseHTTPRequestHandler):
             self.out({"result":result}); return
 
         # ── Media processing endpoints (called by gateway.js) ─────────────
+        # Each accepts {"file_unique_id"} without data: a cached result, or 404 {"miss": true}
+        # so the gateway only downloads from Telegram when it has to.
         if p == "/media/transcribe":
             import base64
             data_b64 = b.get("data","")
+            uid      = b.get("file_unique_id","")
+            if not data_b64 and uid:
+                hit = media_index_get("transcripts", uid)
+                if hit: self.out({"transcript": hit["text"], "cached": True}); return
+                self.out({"miss": True}, 404); return
             if not data_b64: self.out({"error":"data required"},400); return
             try:
                 audio_bytes = base64.b64decode(data_b64)
             except Exception as e:
                 self.out({"error":f"base64 decode failed: {e}"},400); return
-            transcript = _tg_transcribe(audio_bytes, load_cfg())
+            transcript = _tg_transcribe(audio_bytes, load_cfg(), b.get("cache", True) is not False)
+            if transcript: media_index_put("transcripts", uid, "", media_key(audio_bytes))
             self.out({"transcript": transcript or ""}); return
 
+        if p == "/media/transcribe/stream":
+            # NDJSON: meta, then one partial per voice-activity chunk as it finishes, then done
+            import base64
+            data_b64 = b.get("data","")
+            if not data_b64: self.out({"error":"data required"},400); return
+            try:
+                audio_bytes = base64.b64decode(data_b64)
+            except Exception as e:
+                self.out({"error":f"base64 decode failed: {e}"},400); return
+            def events():
+                try:
+                    yield from transcribe_stream(audio_bytes, b.get("language") or None,
+                                                 b.get("cache", True) is not False)
+                except Exception as e:
+                    yield {"type": "error", "error": str(e) or type(e).__name__}
+            self.ndjson(events()); return
+
         if p == "/media/vision":
             import base64
             data_b64 = b.get("data","")
             caption  = b.get("caption","")
+            uid      = b.get("file_unique_id","")
+            if not data_b64 and uid:
+                hit = media_index_get("vision", uid, caption)
+                if hit: self.out({"result": hit["result"], "cached": True}); return
+                self.out({"miss": True}, 404); return
             if not data_b64: self.out({"error":"data required"},400); return
             try:
                 image_bytes = base64.b64decode(data_b64)
             except Exception as e:
                 self.out({"error":f"base64 decode failed: {e}"},400); return
-            result = _tg_vision(image_bytes, caption, load_cfg())
+            result = _tg_vision(image_bytes, caption, load_cfg(), b.get("cache", True) is not False)
+            media_index_put("vision", uid, caption, media_key(image_bytes, caption))
             self.out({"result": result}); return
 
         if p == "/media/video":
             import base64
             data_b64 = b.get("data","")
             caption  = b.get("caption","")
+            uid      = b.get("file_unique_id","")
+            if not data_b64 and uid:
+                hit = media_index_get("video", uid, caption)
+                if hit: self.out({"result": hit["result"], "cached": True}); return
+                self.out({"miss": True}, 404); return
             if not data_b64: self.out({"error":"data required"},400); return
             try:
                 video_bytes = base64.b64decode(data_b64)
             except Exception as e:
                 self.out({"error":f"base64 decode failed: {e}"},400); return
-            result = _tg_video(video_bytes, caption, load_cfg())
+            result = _tg_video(video_bytes, caption, load_cfg(), b.get("cache", True) is not False)
+            media_index_put("video", uid, caption, media_key(video_bytes, caption))
             self.out({"result": result}); return
 
         if p == "/browser":
@@ -2525,21 +5365,55 @@ class Handler(BaseHTTPRequestHandler):
             lang = b.get("lang","python")
             code = b.get("code","")
             if not code: self.out({"error":"code required"},400); return
-            result = execute_code(lang, code, int(b.get("timeout",60)))
-            self.out({"result":result}); return
+            try:
+                timeout, wait = int(b.get("timeout",60)), float(b.get("wait", 0))
+                job = exec_job_start(lang, code, timeout)
+            except (TypeError, ValueError) as e:
+                self.out({"error": str(e)}, 400); return
+            # "wait": seconds to hold the request open; a job that ends by then comes back with its result
+            resp = {"job_id": job.id, "stream": f"/run/{job.id}/stream"}
+            if wait > 0 and job.wait(wait):
+                resp["result"] = job.result()
+            self.out({**resp, "status": job.status, "exit": job.exit}); return
+
+        m = re.fullmatch(r"/run/([0-9a-f]+)/cancel", p)
+        if m:
+            job = exec_job(m.group(1))
+            if not job: self.out({"error": "job not found"}, 404); return
+            self.out({"cancelled": job.cancel(), **job.info()}); return
 
         if p == "/skill/install":
-            result = install_skill(b, load_cfg())
-            self.out({"result":result}); return
+            job = install_skill_async(b, load_cfg())
+            if float(b.get("wait", 0)) > 0: job.done.wait(float(b["wait"]))
+            self.out(job.info()); return
 
         if p == "/skill/call":
             name   = b.get("name","")
             args   = b.get("args",[])
             kwargs = b.get("kwargs",{})
             if not name: self.out({"error":"name required"},400); return
-            result = call_skill(name, *args, **kwargs)
+            if not isinstance(args, list) or not isinstance(kwargs, dict):
+                self.out({"error":"args must be a list and kwargs an object"},400); return
+            try: timeout = None if b.get("timeout") is None else float(b["timeout"])
+            except (TypeError, ValueError): self.out({"error":"timeout must be a number"},400); return
+            result = run_skill(name, args, kwargs, timeout)
             self.out({"result":result}); return
 
+        if p == "/skill/call_batch":
+            name   = b.get("name","")
+            inputs = b.get("inputs",[])
+            if not name or not isinstance(inputs, list):
+                self.out({"error":"name and inputs[] required"},400); return
+            limit = int(load_cfg_cached().get("skills", {}).get("batch_max", 1000))
+            if len(inputs) > limit: self.out({"error":f"at most {limit} inputs per batch"},400); return
+            t0 = time.perf_counter()
+            try: timeout = None if b.get("timeout") is None else float(b["timeout"])
+            except (TypeError, ValueError): self.out({"error":"timeout must be a number"},400); return
+            try: results = call_skill_batch(name, inputs, timeout)
+            except ValueError as e: self.out({"error":str(e)},400); return
+            self.out({"results": results, "errors": sum(1 for r in results if r["error"]),
+                      "ms": round((time.perf_counter() - t0) * 1000, 1)}); return
+
         if p == "/tasks/new":
             title       = b.get("title","").strip()
             description = b.get("description","").strip()
@@ -2597,23 +5471,28 @@ class Handler(BaseHTTPRequestHandler):
             channel  = b.get("channel", "telegram")
             enabled  = 1 if b.get("enabled", True) else 0
             now_ts   = datetime.now().isoformat()
+            # optional run options; null/absent falls back to forge.json "alarms"
+            opts = {k: (None if b[k] is None else int(b[k]))
+                    for k in ("max_instances", "coalesce", "jitter_s") if k in b}
             c = _db()
             if alarm_id:
+                sets = "".join(f", {k}=?" for k in opts)
                 c.execute(
-                    "UPDATE alarms SET name=?, cron=?, task=?, channel=?, enabled=? WHERE id=?",
-                    (name, cron, task, channel, enabled, int(alarm_id))
+                    f"UPDATE alarms SET name=?, cron=?, task=?, channel=?, enabled=?{sets} WHERE id=?",
+                    (name, cron, task, channel, enabled, *opts.values(), int(alarm_id))
                 )
                 c.commit(); c.close()
-                _reschedule_alarms()
+                sync_alarm(int(alarm_id))
                 self.out({"success": True, "id": int(alarm_id)}); return
             else:
+                cols = "".join(f",{k}" for k in opts)
                 cur = c.execute(
-                    "INSERT INTO alarms(name,cron,task,channel,enabled,created) VALUES(?,?,?,?,?,?)",
-                    (name, cron, task, channel, enabled, now_ts)
+                    f"INSERT INTO alarms(name,cron,task,channel,enabled,created{cols}) VALUES(?,?,?,?,?,?{',?' * len(opts)})",
+                    (name, cron, task, channel, enabled, now_ts, *opts.values())
                 )
                 new_id = cur.lastrowid
                 c.commit(); c.close()
-                _reschedule_alarms()
+                sync_alarm(new_id)
                 self.out({"success": True, "id": new_id}); return
 
         if p == "/alarms/toggle":
@@ -2623,16 +5502,26 @@ class Handler(BaseHTTPRequestHandler):
             c = _db()
             c.execute("UPDATE alarms SET enabled=? WHERE id=?", (enabled, int(alarm_id)))
             c.commit(); c.close()
-            _reschedule_alarms()
+            sync_alarm(int(alarm_id))
             self.out({"success": True}); return
 
+        if p == "/alarms/run":
+            alarm_id = b.get("id")
+            if not alarm_id: self.out({"error":"id required"},400); return
+            _fire_alarm(int(alarm_id))
+            c = _db()
+            row = c.execute("SELECT last_run,last_status,last_result FROM alarms WHERE id=?", (int(alarm_id),)).fetchone()
+            c.close()
+            if not row: self.out({"error":"alarm not found"},404); return
+            self.out({"success": True, **dict(row)}); return
+
         if p == "/alarms/delete":
             alarm_id = b.get("id")
             if not alarm_id: self.out({"error":"id required"},400); return
             c = _db()
             c.execute("DELETE FROM alarms WHERE id=?", (int(alarm_id),))
             c.commit(); c.close()
-            _reschedule_alarms()
+            sync_alarm(int(alarm_id))
             self.out({"success": True}); return
 
         if p == "/skills/save":
@@ -2641,6 +5530,7 @@ class Handler(BaseHTTPRequestHandler):
             if not code: self.out({"error": "code required"}, 400); return
             SKILLS_DIR.mkdir(parents=True, exist_ok=True)
             (SKILLS_DIR / f"{name}.py").write_text(code)
+            skill_registry.forget(name)
             self.out({"success": True, "file": f"{name}.py"}); return
 
         if p == "/skills/delete":
@@ -2649,6 +5539,7 @@ class Handler(BaseHTTPRequestHandler):
             skill_file = SKILLS_DIR / f"{name}.py"
             if skill_file.exists():
                 skill_file.unlink()
+                skill_registry.forget(name)
                 self.out({"success": True}); return
             self.out({"error": "skill not found"}, 404); return
 
@@ -2725,23 +5616,68 @@ Escalate to CORTEX only when cross-domain synthesis is required.
                     fpath.write_text(content_txt)
             self.out({"success": True, "path": str(agent_dir), "files": list(files.keys())}); return
 
+        if p == "/memory/summaries/run":
+            self.out(run_summaries(force=bool(b.get("force")))); return
+
+        if p == "/db/retention/run":
+            conv = b.get("convert_vacuum")
+            self.out(run_retention(bool(b.get("dry_run")), None if conv is None else bool(conv))); return
+
+        if p.startswith("/lease/"):
+            if not self._lease_allowed(): return
+            if p == "/lease/acquire":
+                try:
+                    n    = min(int(b.get("max", 1)), int(_coord_cfg()["acquire_max"]))
+                    wait = min(float(b.get("wait", 0)), 25)
+                except (TypeError, ValueError): self.out({"error": "max must be an integer and wait a number"}, 400); return
+                deadline = time.time() + wait
+                worker = str(b.get("worker") or self.client_address[0])[:100]
+                while True:
+                    leases = lease_acquire(worker, n)
+                    if leases or time.time() >= deadline: break
+                    time.sleep(0.5)
+                self.out({"leases": leases}); return
+            try: lease_id = int(b.get("lease_id", 0))
+            except (TypeError, ValueError): self.out({"error": "lease_id must be an integer"}, 400); return
+            if p == "/lease/heartbeat":
+                self.out({"ok": lease_heartbeat(lease_id, str(b.get("token", "")))}); return
+            if p == "/lease/complete":
+                r = lease_complete(lease_id, str(b.get("token", "")), b.get("result"), b.get("error"))
+                self.out(r, 200 if r["ok"] else 409); return
+
+        if p == "/stats/repair":
+            self.out(stats_check(repair=True)); return
+
+        if p == "/db/backup":
+            try: self.out(backup_db(b.get("label") or "manual", b.get("compress")))
+            except Exception as e: self.out({"error": str(e)}, 500)
+            return
+
+        if p in ("/db/backup/verify", "/db/restore"):
+            name = Path(b.get("name", "")).name          # backups dir only over HTTP
+            if not name: self.out({"error": "name required"}, 400); return
+            if p == "/db/restore" and not b.get("confirm"): self.out({"error": "confirm required"}, 400); return
+            try: self.out(verify_backup(name) if p == "/db/backup/verify" else restore_db(name))
+            except FileNotFoundError as e: self.out({"error": str(e)}, 404)
+            except Exception as e: self.out({"error": str(e)}, 500)
+            return
+
         # ── Danger Zone: Reset Memory ──────────────────────────────────
         if p == "/memory/reset":
             confirm = b.get("confirm")
             if not confirm: self.out({"error": "confirm required"}, 400); return
-            import shutil, time as _time
-            backup_path = FORGE_CFG / f"forge_backup_{int(_time.time())}.db"
             try:
-                shutil.copy2(FORGE_CFG / "forge.db", backup_path)
-                log.info(f"Memory backup created: {backup_path}")
+                backup_path = BACKUP_DIR / backup_db("pre_reset")["name"]
             except Exception as e:
+                backup_path = None
                 log.warning(f"Backup failed before memory reset: {e}")
             c = _db()
             c.execute("DELETE FROM memory")
             c.execute("DELETE FROM learnings")
             c.commit(); c.close()
             log.info("Memory + learnings tables cleared via dashboard")
-            self.out({"success": True, "message": "Memory cleared", "backup": str(backup_path)}); return
+            self.out({"success": True, "message": "Memory cleared",
+                      "backup": str(backup_path) if backup_path else None}); return
 
         # ── Danger Zone: Clear All Tasks ────────────────────────────────
         if p == "/tasks/clear":
@@ -2759,6 +5695,8 @@ Escalate to CORTEX only when cross-domain synthesis is required.
 # ── ALARM ENGINE ──────────────────────────────────────────
 def _fire_alarm(alarm_id: int):
     """Execute an alarm: route through process_chat with isolated agent ID. Result only goes to Telegram."""
+    t0 = time.perf_counter()
+    took = lambda: _alarm_timed(alarm_id, t0)
     try:
         c = _db()
         row = c.execute("SELECT * FROM alarms WHERE id=?", (alarm_id,)).fetchone()
@@ -2772,7 +5710,7 @@ def _fire_alarm(alarm_id: int):
         log.info(f"Alarm firing: [{alarm['name']}] → {task[:80]}")
 
         # Route through process_chat with isolated agent ID (task text never sent to Telegram)
-        result = process_chat(task, agent=f"ALARM_{alarm_id}")
+        result = process_chat(task, agent=f"ALARM_{alarm_id}", async_directives=False)
         result = (result or "Task completed — no output returned.")[:3800]
 
         fired_at = datetime.now().isoformat()
@@ -2780,8 +5718,8 @@ def _fire_alarm(alarm_id: int):
         # Log execution to alarm_logs (task text stays here, not in Telegram)
         c = _db()
         c.execute(
-            "INSERT INTO alarm_logs (alarm_id, fired_at, status, result, triggered_msg) VALUES (?,?,?,?,?)",
-            (alarm_id, fired_at, "completed", result[:500], task)
+            "INSERT INTO alarm_logs (alarm_id, fired_at, status, result, triggered_msg, duration_ms) VALUES (?,?,?,?,?,?)",
+            (alarm_id, fired_at, "completed", result[:500], task, took())
         )
         # Update alarms table with last run metadata
         c.execute(
@@ -2800,9 +5738,10 @@ def _fire_alarm(alarm_id: int):
         try:
             c = _db()
             c.execute(
-                "INSERT INTO alarm_logs (alarm_id, fired_at, status, result, triggered_msg) VALUES (?,?,?,?,?)",
-                (alarm_id, fired_at, "failed", str(e), "")
+                "INSERT INTO alarm_logs (alarm_id, fired_at, status, result, triggered_msg, duration_ms) VALUES (?,?,?,?,?,?)",
+                (alarm_id, fired_at, "failed", str(e), "", took())
             )
+            metric_inc("alarm.failed")
             c.execute(
                 "UPDATE alarms SET last_run=?, last_status=? WHERE id=?",
                 (fired_at, "failed", alarm_id)
@@ -2814,56 +5753,109 @@ def _fire_alarm(alarm_id: int):
 
 def _skills_summary() -> str:
     """Return a brief list of available skills for AI context."""
-    SKILLS_DIR.mkdir(parents=True, exist_ok=True)
-    skills = []
-    for f in SKILLS_DIR.glob("*.py"):
-        if f.name.startswith("_") or f.name == "gmail_auth.py": continue
-        try:
-            first_lines = f.read_text().split("\n")[:5]
-            desc = next((l.strip().lstrip("#").strip() for l in first_lines if l.strip() and not l.startswith('"""')), f.stem)
-        except:
-            desc = f.stem
-        skills.append(f"  • {f.stem}: {desc}")
+    skills = [f"  • {e['stem']}: {e['summary']}" for e in skill_registry.scan()
+              if not e["stem"].startswith("_") and e["stem"] != "gmail_auth"]
     return "\n".join(skills) if skills else "  (no skills installed)"
 
 
 # Global scheduler reference (set in main)
 _scheduler = None
 
+# Alarm jobs run on their own bounded APScheduler executor, so a slow alarm can't
+# hold up the heartbeat or the nightly jobs, and overlapping runs of one alarm are
+# capped by max_instances (extra runs are skipped and counted, not queued).
+# forge.json "alarms": {"workers": 4, "max_instances": 1, "coalesce": true,
+#   "misfire_grace_s": 300, "jitter_s": 0}   — the last three can be set per alarm
+ALARM_DEFAULTS = {"workers": 4, "max_instances": 1, "coalesce": True, "misfire_grace_s": 300, "jitter_s": 0}
+_alarm_jobs = {}                    # alarm id -> the spec its job was scheduled with
+_alarm_sync_lock = threading.Lock()
+
+def _alarm_cfg() -> dict:
+    return {**ALARM_DEFAULTS, **load_cfg_cached().get("alarms", {})}
+
+def _alarm_timed(alarm_id: int, t0: float) -> float:
+    ms = round((time.perf_counter() - t0) * 1000, 1)
+    metric_observe(f"alarm.{alarm_id}.ms", ms); metric_observe("alarm.ms", ms); metric_inc("alarm.runs")
+    return ms
+
+def _alarm_spec(a: dict, x: dict):
+    """What an alarm's job should look like — None when it shouldn't be scheduled."""
+    parts = (a.get("cron") or "0 9 * * *").split()
+    if not a.get("enabled") or len(parts) != 5: return None
+    pick = lambda k: x[k] if a.get(k) is None else a[k]
+    return (*parts, int(pick("max_instances")), bool(pick("coalesce")), int(pick("jitter_s")),
+            int(x["misfire_grace_s"]))
+
+def _alarm_apply(alarm_id: int, spec) -> str:
+    """Bring one alarm's job in line with spec. Caller holds _alarm_sync_lock."""
+    old = _alarm_jobs.get(alarm_id)
+    if spec == old: return "unchanged"
+    if spec is None:
+        try: _scheduler.remove_job(f"alarm_{alarm_id}")
+        except Exception: pass          # JobLookupError — it was never scheduled
+        _alarm_jobs.pop(alarm_id, None)
+        return "removed"
+    minute, hour, day, month, dow, max_instances, coalesce, jitter, grace = spec
+    _scheduler.add_job(_fire_alarm, "cron", id=f"alarm_{alarm_id}", args=[alarm_id],
+                       minute=minute, hour=hour, day=day, month=month, day_of_week=dow,
+                       jitter=jitter or None, executor="alarms", max_instances=max_instances,
+                       coalesce=coalesce, misfire_grace_time=grace, replace_existing=True)
+    _alarm_jobs[alarm_id] = spec
+    return "added" if old is None else "updated"
+
+def sync_alarm(alarm_id: int):
+    """One alarm was created, edited, toggled or deleted — reschedule just that one."""
+    if not HAS_APSCHEDULER or _scheduler is None: return
+    c = _db(); row = c.execute("SELECT * FROM alarms WHERE id=?", (alarm_id,)).fetchone(); c.close()
+    with _alarm_sync_lock:
+        try: what = _alarm_apply(alarm_id, _alarm_spec(dict(row), _alarm_cfg()) if row else None)
+        except Exception as e:
+            log.warning(f"Could not schedule alarm {alarm_id}: {e}"); return
+    if what != "unchanged": log.info(f"Alarm {alarm_id} {what}")
+
 def _reschedule_alarms():
-    """Re-sync all enabled alarms from DB into APScheduler."""
-    global _scheduler
+    """Diff every alarm in the DB against the scheduled jobs and touch only the ones that differ."""
     if not HAS_APSCHEDULER or _scheduler is None: return
     try:
-        # Remove all existing alarm jobs
-        for job in _scheduler.get_jobs():
-            if job.id.startswith("alarm_"):
-                job.remove()
-        # Add enabled alarms
-        c = _db()
-        rows = c.execute("SELECT * FROM alarms WHERE enabled=1").fetchall()
-        c.close()
-        for row in rows:
-            a = dict(row)
-            parts = (a["cron"] or "0 9 * * *").split()
-            if len(parts) != 5: continue
-            min_, hr_, dom_, mon_, dow_ = parts
-            try:
-                _scheduler.add_job(
-                    _fire_alarm,
-                    "cron",
-                    id=f"alarm_{a['id']}",
-                    args=[a["id"]],
-                    minute=min_, hour=hr_,
-                    day=dom_, month=mon_, day_of_week=dow_,
-                    replace_existing=True,
-                )
-                log.info(f"Scheduled alarm [{a['name']}] → cron: {a['cron']}")
-            except Exception as e:
-                log.warning(f"Could not schedule alarm {a['id']}: {e}")
+        c = _db(); rows = c.execute("SELECT * FROM alarms").fetchall(); c.close()
+        x = _alarm_cfg()
+        want, done = {r["id"]: _alarm_spec(dict(r), x) for r in rows}, {}
+        with _alarm_sync_lock:
+            for alarm_id in set(_alarm_jobs) | set(want):
+                try: what = _alarm_apply(alarm_id, want.get(alarm_id))
+                except Exception as e:
+                    log.warning(f"Could not schedule alarm {alarm_id}: {e}"); what = "failed"
+                done[what] = done.get(what, 0) + 1
+        done.pop("unchanged", None)
+        if done: log.info(f"Alarms synced — {done}")
     except Exception as e:
         log.error(f"_reschedule_alarms: {e}")
 
+def _alarm_event(ev):
+    """APScheduler listener: count alarm runs skipped at max_instances or missed past the grace time."""
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+    if not ev.job_id.startswith("alarm_"): return
+    what = "skipped" if ev.code == EVENT_JOB_MAX_INSTANCES else "missed"
+    metric_inc(f"alarm.{what}")
+    log.warning(f"Alarm {ev.job_id[6:]} run {what} — "
+                + ("previous run still going" if what == "skipped" else "scheduler was busy or asleep"))
+
+def alarm_stats(limit: int = 200) -> list:
+    """Per-alarm run counts and duration percentiles over the last `limit` logged runs."""
+    c = _db()
+    alarms = c.execute("SELECT id, name, cron, enabled, max_instances, coalesce, jitter_s FROM alarms").fetchall()
+    out = []
+    for a in alarms:
+        runs = c.execute("SELECT status, duration_ms FROM alarm_logs WHERE alarm_id=? ORDER BY id DESC LIMIT ?",
+                         (a["id"], limit)).fetchall()
+        ms = sorted(r["duration_ms"] for r in runs if r["duration_ms"] is not None)
+        q = lambda p: round(ms[min(len(ms) - 1, int(p * len(ms)))], 1) if ms else None
+        out.append({**dict(a), "runs": len(runs), "failed": sum(r["status"] == "failed" for r in runs),
+                    "p50_ms": q(.5), "p95_ms": q(.95), "max_ms": ms[-1] if ms else None,
+                    "scheduled": a["id"] in _alarm_jobs})
+    c.close()
+    return out
+
 
 # ── BACKGROUND LOOPS ──────────────────────────────────────
 def _heartbeat_loop():
@@ -2871,9 +5863,10 @@ def _heartbeat_loop():
         time.sleep(30 * 60)
         try: run_heartbeat()
         except Exception as e: log.error(f"Heartbeat loop: {e}")
+        _sched_summaries()
 
 def _nightly_loop():
-    """3am: god mode deep improvement if active."""
+    """3am: god mode deep improvement if active, then a backup and retention."""
     while True:
         now    = datetime.now()
         target = now.replace(hour=3, minute=0, second=0, microsecond=0)
@@ -2882,6 +5875,9 @@ def _nightly_loop():
         if god_mode_active():
             try: _god_cycle(load_cfg())
             except Exception as e: log.error(f"Nightly: {e}")
+        _sched_backup()
+        try: run_retention()
+        except Exception as e: log.error(f"Retention: {e}")
 
 
 # ── SCHEDULED JOBS ────────────────────────────────────────
@@ -2900,7 +5896,11 @@ def _sched_seo():
         "Identify the top 3 quick wins. Implement any that are safe, isolated file edits. "
         f"Save a detailed report to ~/Forge/research/seo_audit_{date_str}.md with findings and actions taken."
     )
-    result = _spawn_claude_fresh(prompt, workdir=str(PROJECT_DIR), label="seo")
+    run_claude_job("seo", prompt, "project")
+
+
+def _seo_done(result: str):
+    cfg = load_cfg()
     summary = (result or "No output")[:400]
     save_learning("scheduled_seo", f"SEO run {datetime.now().strftime('%Y-%m-%d')}: {summary[:150]}", "scheduler")
     _notify(f"*Forge SEO Audit done*\n\n{summary}", cfg)
@@ -2925,21 +5925,39 @@ def _sched_competitive_research():
         f"Owner context:\n{identity}\n\n"
         f"Save a full report to ~/Forge/research/competitive_{date_str}.md."
     )
-    result = _spawn_claude_fresh(prompt, workdir=str(FORGE_WS), label="competitive")
+    run_claude_job("competitive", prompt, "workspace")
+
+
+def _competitive_done(result: str):
+    cfg = load_cfg()
     summary = (result or "No output")[:400]
     save_learning("competitive_intel", f"Research {datetime.now().strftime('%Y-%m-%d')}: {summary[:150]}", "scheduler")
     _notify(f"Competitive Research done\n\n{summary}", cfg)
     log.info(f"Scheduled competitive done: {summary[:80]}")
 
 
+JOB_DONE = {"seo": _seo_done, "competitive": _competitive_done}   # follow-up once the result is in
+
+def run_claude_job(label: str, prompt: str, where: str):
+    """Run a scheduled Claude job here, or queue it for a remote worker (coordinator.remote_jobs)."""
+    x = _coord_cfg()
+    if x["enabled"] and x["remote_jobs"]:
+        lease_enqueue(f"job_{label}_{datetime.now():%Y%m%d_%H%M%S}",
+                      [{"kind": "claude", "prompt": prompt, "where": where, "done": label}])
+        log.info(f"Scheduled {label} queued for a remote worker"); return
+    JOB_DONE[label](_spawn_claude_fresh(prompt, workdir=str(PROJECT_DIR if where == "project" else FORGE_WS),
+                                        label=label))
+
+
 def _sched_daily_brief():
     """9AM daily — send task status and priorities brief to Telegram."""
     cfg = load_cfg()
     log.info("Scheduled: daily brief")
     try:
         c = _db()
-        backlog  = c.execute("SELECT COUNT(*) FROM tasks WHERE status NOT IN ('completed')").fetchone()[0]
-        in_prog  = c.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('running','in_progress')").fetchone()[0]
+        n        = stats_read(c)
+        backlog  = stat(n, "tasks") - stat(n, "tasks", "status", "completed")
+        in_prog  = stat(n, "tasks", "status", "running", "in_progress")
         done_24h = c.execute(
             "SELECT COUNT(*) FROM tasks WHERE status='completed' AND completed > ?",
             ((datetime.now() - timedelta(hours=24)).isoformat(),)
@@ -2967,70 +5985,574 @@ def _sched_daily_brief():
         log.error(f"Daily brief: {e}")
 
 
-# ── MAIN ──────────────────────────────────────────────────
-if __name__ == "__main__":
+# ── RETENTION & ARCHIVE ───────────────────────────────────
+# Nightly, rows older than their table's retention move out of forge.db into gzip
+# JSONL archives, one file per table and month (~/.forge/archive/memory/2025-01.jsonl.gz),
+# searchable through GET /archive/search. Rows are appended to the archive and
+# fsynced before they're deleted, so a crash in between duplicates rows, never loses them.
+# Freed pages go back to the filesystem with incremental vacuum. That needs the DB in
+# auto_vacuum=INCREMENTAL, and switching takes one full VACUUM under an exclusive lock,
+# so the nightly job never does it on its own: run `daemon.py --vacuum` once, or set
+# "convert_vacuum": true. Each run records the DB size in db_size for GET /db/size.
+# forge.json "retention": {"memory": {"days": 0, "agents": {"ALARM_*": 30}},
+#   "heartbeats": {"days": 30}, "alarm_logs": {"days": 90}, "learnings": {"days": 0},
+#   "hour": 4, "vacuum_pages": 2000, "convert_vacuum": false}   — days 0 keeps a table forever
+ARCHIVE_DIR = FORGE_CFG / "archive"
+RETENTION_TABLES = {            # table → (timestamp column, default days)
+    "memory":     ("timestamp", 0),
+    "heartbeats": ("timestamp", 30),
+    "alarm_logs": ("fired_at",  90),
+    "learnings":  ("timestamp", 0),
+}
+RETENTION_BATCH = 5000
+_retention_lock = threading.Lock()
+
+def _archive_rows(table: str, rows: list):
+    """Append rows to their month's archive file and fsync it."""
+    import gzip
+    ts_col = RETENTION_TABLES[table][0]
+    by_month = {}
+    for r in rows:
+        by_month.setdefault((r[ts_col] or "unknown")[:7], []).append(r)
+    (ARCHIVE_DIR / table).mkdir(parents=True, exist_ok=True)
+    for month, part in by_month.items():
+        with open(ARCHIVE_DIR / table / f"{month}.jsonl.gz", "ab") as raw:
+            # gzip members concatenate: each run appends one, readers see a single stream
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                gz.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in part).encode())
+            raw.flush(); os.fsync(raw.fileno())
+
+def _retention_rules(table: str, policy: dict) -> list:
+    """[(extra WHERE clause, params, days)] — per-agent overrides first, then everyone else."""
+    days = int(policy.get("days", RETENTION_TABLES[table][1]))
+    agents = policy.get("agents", {}) if table == "memory" else {}
+    rules = [("agent GLOB ?", [pat], int(d)) for pat, d in agents.items()]
+    rest = " AND ".join("NOT agent GLOB ?" for _ in agents) or "1"
+    rules.append((rest, list(agents), days))
+    return [r for r in rules if r[2] > 0]
+
+def run_retention(dry_run: bool = False, convert_vacuum: bool = None) -> dict:
+    """Archive and delete expired rows, vacuum, record the DB size. Returns per-table counts."""
+    if not _retention_lock.acquire(blocking=False):
+        return {"error": "retention already running"}
+    t0, report = time.perf_counter(), {"tables": {}, "dry_run": dry_run}
+    try:
+        policy = load_cfg().get("retention", {})
+        c = _db()
+        for table, (ts_col, _) in RETENTION_TABLES.items():
+            moved = 0
+            for where, params, days in _retention_rules(table, policy.get(table, {})):
+                cutoff = (datetime.now() - timedelta(days=days)).isoformat()
+                sql = f"FROM {table} WHERE {ts_col} < ? AND {where}"
+                if dry_run:
+                    moved += c.execute(f"SELECT COUNT(*) {sql}", [cutoff, *params]).fetchone()[0]
+                    continue
+                while True:
+                    rows = [dict(r) for r in c.execute(f"SELECT * {sql} ORDER BY id LIMIT {RETENTION_BATCH}",
+                                                       [cutoff, *params]).fetchall()]
+                    if not rows: break
+                    _archive_rows(table, rows)
+                    c.executemany(f"DELETE FROM {table} WHERE id=?", [(r["id"],) for r in rows])
+                    c.commit()
+                    moved += len(rows)
+            report["tables"][table] = moved
+            if moved and not dry_run: metric_inc(f"retention.{table}_archived", moved)
+        if not dry_run:
+            if convert_vacuum is None: convert_vacuum = bool(policy.get("convert_vacuum", False))
+            report["vacuum"] = _incremental_vacuum(c, int(policy.get("vacuum_pages", 2000)), convert_vacuum)
+            report["size"] = record_db_size(c)
+            report["stats_ok"] = stats_check(repair=True)["ok"]   # nightly counter consistency pass
+        c.close()
+        report["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        log.info(f"Retention {'(dry run) ' if dry_run else ''}— {report['tables']} in {report['ms']:.0f}ms")
+        return report
+    finally:
+        _retention_lock.release()
+
+def _incremental_vacuum(c, pages: int, convert: bool = False) -> dict:
+    mode = c.execute("PRAGMA auto_vacuum").fetchone()[0]
+    if mode != 2:          # 0 none / 1 full: switching takes effect with one VACUUM
+        if not convert:
+            return {"skipped": "auto_vacuum is not INCREMENTAL — run `daemon.py --vacuum` once"}
+        c.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        c.execute("VACUUM")
+        return {"converted": True}
+    free = c.execute("PRAGMA freelist_count").fetchone()[0]
+    c.execute(f"PRAGMA incremental_vacuum({max(0, pages)})").fetchall()
+    return {"freed_pages": free - c.execute("PRAGMA freelist_count").fetchone()[0]}
+
+def _vacuum_cli() -> int:
+    """daemon.py --vacuum — switch forge.db to incremental auto_vacuum (one full VACUUM)."""
+    c = _db()
+    t0 = time.perf_counter()
+    out = _incremental_vacuum(c, 0, convert=True)
+    out["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    out["size"] = record_db_size(c)
+    c.close()
+    print(json.dumps(out, indent=2))
+    return 0
+
+def record_db_size(c=None) -> dict:
+    own = c is None
+    if own: c = _db()
+    page_size = c.execute("PRAGMA page_size").fetchone()[0]
+    pages     = c.execute("PRAGMA page_count").fetchone()[0]
+    free      = c.execute("PRAGMA freelist_count").fetchone()[0]
+    rows = {t: c.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in RETENTION_TABLES}
+    archive = sum(f.stat().st_size for f in ARCHIVE_DIR.rglob("*.jsonl.gz")) if ARCHIVE_DIR.exists() else 0
+    size = {"timestamp": datetime.now().isoformat(), "bytes": page_size * pages,
+            "free_bytes": page_size * free, "archive_bytes": archive, "rows": rows}
+    c.execute("INSERT INTO db_size(timestamp,bytes,free_bytes,archive_bytes,rows) VALUES(?,?,?,?,?)",
+              (size["timestamp"], size["bytes"], size["free_bytes"], archive, json.dumps(rows)))
+    c.commit()
+    if own: c.close()
+    return size
+
+def db_size_trend(limit: int = 90) -> dict:
+    c = _db()
+    rows = c.execute("SELECT * FROM db_size ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    c.close()
+    trend = [{**dict(r), "rows": json.loads(r["rows"] or "{}")} for r in reversed(rows)]
+    on_disk = sum(p.stat().st_size for p in (DB_PATH, Path(str(DB_PATH) + "-wal")) if p.exists())
+    return {"bytes_on_disk": on_disk, "trend": trend}
+
+def archive_search(table: str, q: str = "", since: str = "", until: str = "",
+                   agent: str = "", limit: int = 50) -> list:
+    """Archived rows of a table, newest month first. since/until are YYYY-MM; q is a case-insensitive substring."""
+    import gzip
+    if table not in RETENTION_TABLES: raise ValueError(f"unknown table: {table}")
+    d, q, out = ARCHIVE_DIR / table, q.lower(), []
+    for f in sorted(d.glob("*.jsonl.gz"), reverse=True) if d.exists() else ():
+        month = f.name[:7]
+        if (since and month < since) or (until and month > until): continue
+        with gzip.open(f, "rt", encoding="utf-8") as fh:
+            hits = [r for r in map(json.loads, fh)
+                    if (not agent or r.get("agent") == agent)
+                    and (not q or any(q in str(v).lower() for v in r.values()))]
+        out += [{**r, "archive": f"{table}/{f.name}"} for r in reversed(hits)]
+        if len(out) >= limit: break
+    return out[:limit]
+
+
+
+# ── BACKUP ────────────────────────────────────────────────
+# Online snapshots through the SQLite backup API: `pages` at a time with a pause
+# between steps, so a writer never waits on more than one step. Each step holds the
+# source read lock; its duration is reported as the lock time.
+# forge.json "backup": {"hour": 2, "keep": 7, "compress": true, "pages": 256, "sleep_ms": 5}
+BACKUP_DIR = FORGE_CFG / "backups"
+_backup_lock = threading.Lock()
+
+def _backup_cfg() -> dict:
+    return {"hour": 2, "keep": 7, "compress": True, "pages": 256, "sleep_ms": 5,
+            **load_cfg().get("backup", {})}
+
+def _backup_copy(src, dst, pages: int, sleep_ms: float) -> dict:
+    """src.backup(dst) in steps; returns step count and lock time (call gaps minus the sleeps)."""
+    t = {"steps": 0, "lock_ms": 0.0, "max_lock_ms": 0.0, "last": time.perf_counter()}
+    def progress(status, remaining, total):
+        now = time.perf_counter()
+        step_ms = max(0.0, (now - t["last"]) * 1000 - (sleep_ms if t["steps"] else 0))
+        t["steps"] += 1; t["lock_ms"] += step_ms; t["max_lock_ms"] = max(t["max_lock_ms"], step_ms)
+        t["pages"], t["last"] = total, now
+    src.backup(dst, pages=pages, progress=progress, sleep=sleep_ms / 1000)
+    return {k: round(v, 1) if isinstance(v, float) else v for k, v in t.items() if k != "last"}
+
+def backup_db(label: str = "scheduled", compress: bool = None) -> dict:
+    """Snapshot forge.db into BACKUP_DIR, check it, compress it, rotate old ones of the same label."""
+    import gzip, shutil
+    x = _backup_cfg()
+    compress = x["compress"] if compress is None else compress
+    label = re.sub(r"[^a-z0-9_]", "_", label.lower()) or "manual"
+    with _backup_lock:
+        BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+        name = f"forge-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]}-{label}.db"
+        tmp, t0 = BACKUP_DIR / (name + ".part"), time.perf_counter()
+        src, dst = sqlite3.connect(DB_PATH), sqlite3.connect(tmp)
+        try:
+            report = _backup_copy(src, dst, int(x["pages"]), float(x["sleep_ms"]))
+            report["check"] = dst.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            src.close(); dst.close()
+        if report["check"] != "ok":
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"backup failed quick_check: {report['check']}")
+        if compress:
+            name += ".gz"
+            with open(tmp, "rb") as fi, gzip.open(BACKUP_DIR / (name + ".part"), "wb", compresslevel=6) as fo:
+                shutil.copyfileobj(fi, fo, 1 << 20)
+            tmp.unlink(); tmp = BACKUP_DIR / (name + ".part")
+        tmp.rename(BACKUP_DIR / name)
+        report.update({"name": name, "bytes": (BACKUP_DIR / name).stat().st_size, "compressed": compress,
+                       "ms": round((time.perf_counter() - t0) * 1000, 1)})
+        report["rotated"] = _backup_rotate(label, int(x["keep"]))
+    metric_observe("backup.ms", report["ms"]); metric_observe("backup.lock_ms", report["max_lock_ms"])
+    log.info(f"Backup {name} — {report['bytes']:,} bytes, {report['steps']} steps in {report['ms']:.0f}ms "
+             f"(lock {report['lock_ms']:.0f}ms total, {report['max_lock_ms']:.0f}ms max)")
+    return report
+
+def _backup_rotate(label: str, keep: int) -> list:
+    old = sorted(BACKUP_DIR.glob(f"forge-*-{label}.db*"), key=lambda f: f.name, reverse=True)
+    gone = [f for f in old if not f.name.endswith(".part")][max(1, keep):]
+    for f in gone: f.unlink(missing_ok=True)
+    return [f.name for f in gone]
+
+def list_backups() -> list:
+    if not BACKUP_DIR.exists(): return []
+    return [{"name": f.name, "bytes": f.stat().st_size,
+             "created": datetime.fromtimestamp(f.stat().st_mtime).isoformat(timespec="seconds")}
+            for f in sorted(BACKUP_DIR.glob("forge-*.db*"), reverse=True) if not f.name.endswith(".part")]
+
+def _backup_path(name: str) -> Path:
+    """A backup by file name (HTTP) or path (CLI)."""
+    f = Path(name).expanduser()
+    if not f.is_absolute() and not f.exists(): f = BACKUP_DIR / Path(name).name
+    if not f.exists(): raise FileNotFoundError(f"backup not found: {name}")
+    return f
+
+@contextmanager
+def _backup_opened(f: Path):
+    """An sqlite connection on a backup, decompressed to a temp file first if needed."""
+    import gzip, shutil, tempfile
+    tmp = None
+    if f.suffix == ".gz":
+        fd, tmp = tempfile.mkstemp(suffix=".db", dir=BACKUP_DIR)
+        with gzip.open(f, "rb") as fi, os.fdopen(fd, "wb") as fo: shutil.copyfileobj(fi, fo, 1 << 20)
+    c = sqlite3.connect(tmp or f)
+    try: yield c
+    finally:
+        c.close()
+        if tmp: os.unlink(tmp)
+
+def verify_backup(name: str) -> dict:
+    """Full integrity check of a backup plus its schema version and row counts."""
+    f, t0 = _backup_path(name), time.perf_counter()
+    with _backup_opened(f) as c:
+        check = [r[0] for r in c.execute("PRAGMA integrity_check").fetchall()]
+        tables = [r[0] for r in c.execute("SELECT name FROM sqlite_master WHERE type='table' "
+                                          "AND name NOT LIKE 'sqlite_%'")]
+        report = {"name": f.name, "ok": check == ["ok"], "errors": [] if check == ["ok"] else check[:20],
+                  "schema_version": c.execute("PRAGMA user_version").fetchone()[0],
+                  "rows": {t: c.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0] for t in tables}}
+    report["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+    return report
+
+def _restore_copy(name: str):
+    with _backup_lock, _backup_opened(_backup_path(name)) as src:
+        dst = sqlite3.connect(DB_PATH, timeout=30)
+        try: src.backup(dst)           # one step: the live DB is written under a single lock
+        finally: dst.close()
+
+def restore_db(name: str) -> dict:
+    """Verify a backup, snapshot the current DB, then copy the backup over it in place."""
+    report = verify_backup(name)
+    if not report["ok"]: raise RuntimeError(f"backup {report['name']} failed integrity_check")
+    safety = backup_db("pre_restore")
+    t0 = time.perf_counter()
+    _restore_copy(name)
+    try:
+        init_db(); migrate_db()        # an older snapshot may predate current tables, triggers, columns
+    except Exception as e:
+        _restore_copy(safety["name"])
+        raise RuntimeError(f"backup {report['name']} could not be brought up to schema v{SCHEMA_VERSION} "
+                           f"({e}); the previous database was put back")
+    log.warning(f"Database restored from {report['name']} (previous state saved as {safety['name']})")
+    return {"restored": report["name"], "safety_backup": safety["name"], "rows": report["rows"],
+            "ms": round((time.perf_counter() - t0) * 1000, 1)}
+
+def _sched_backup():
+    try: backup_db()
+    except Exception as e: log.error(f"Backup: {e}")
+
+def _backup_cli() -> int:
+    """daemon.py --backup [label] | --verify <file> | --restore <file> — prints a JSON report."""
+    cmd, arg = sys.argv[1], (sys.argv[2] if len(sys.argv) > 2 else "")
+    try:
+        if cmd == "--backup": out = backup_db(arg or "manual")
+        elif not arg: raise SystemExit(f"usage: daemon.py {cmd} <backup file>")
+        elif cmd == "--verify": out = verify_backup(arg)
+        else: out = restore_db(arg)
+    except (FileNotFoundError, RuntimeError, sqlite3.Error) as e:
+        print(json.dumps({"error": str(e)})); return 1
+    print(json.dumps(out, indent=2))
+    return 0 if out.get("ok", True) else 1
+
+
+# ── BOOT ──────────────────────────────────────────────────
+# The port is bound first so /status and /ready answer immediately; everything
+# below runs on a boot thread. "ready" means the required stages are done —
+# OAuth, task resume and the whisper pre-warm carry on in the background.
+BOOT_REQUIRED = ("db", "dirs", "scheduler")
+_BOOT = {"started": time.time(), "done": {}, "running": None, "errors": {}}
+
+def boot_ready(stage: str = None) -> bool:
+    if stage: return stage in _BOOT["done"]
+    return all(s in _BOOT["done"] for s in BOOT_REQUIRED)
+
+def boot_state() -> dict:
+    return {
+        "ready":    boot_ready(),
+        "uptime_s": round(time.time() - _BOOT["started"], 2),
+        "running":  _BOOT["running"],
+        "stages_ms": dict(_BOOT["done"]),
+        "pending":  [s for s in BOOT_REQUIRED if s not in _BOOT["done"]],
+        "errors":   dict(_BOOT["errors"]),
+    }
+
+def _boot_stage(name: str, fn):
+    _BOOT["running"] = name
+    t0 = time.perf_counter()
+    try:
+        fn()
+        _BOOT["done"][name] = round((time.perf_counter() - t0) * 1000, 1)
+    except Exception as e:
+        _BOOT["errors"][name] = str(e)[:300]
+        log.error(f"Boot stage {name} failed: {e}")
+    finally:
+        _BOOT["running"] = None
+
+def _boot_db():
     init_db()
     migrate_db()
-    CORE_DIR.mkdir(parents=True, exist_ok=True)
 
+def _boot_dirs():
+    if SERVER["workers"] == 1: _prepare_dirs()  # pre-fork: the parent did it once, before forking
+
+def _prepare_dirs(clear_jobs: bool = True):
+    CORE_DIR.mkdir(parents=True, exist_ok=True)
     # Create workspace dirs
     for d in ("documents","projects","research","content","data","tasks","notes"):
         (FORGE_WS / d).mkdir(parents=True, exist_ok=True)
-
     # Create skills dir
     SKILLS_DIR.mkdir(parents=True, exist_ok=True)
+    # Job files left by a previous run — its jobs are gone with the process
+    if clear_jobs:
+        for f in JOBS_DIR.glob("*-*.json*"): f.unlink(missing_ok=True)
+        for f in JOBS_DIR.glob("*-*.cancel"): f.unlink(missing_ok=True)
+
+def _boot_scheduler():
+    """Only the leader runs scheduled work; other workers stand by for the lock."""
+    if leader_acquire():
+        _leader_start()
+    else:
+        log.info(f"Worker pid {os.getpid()} — leader is pid {leader_pid()}, standing by")
+        threading.Thread(target=_leader_standby, name="leader-standby", daemon=True).start()
 
-    # ── OpenAI OAuth — unconditional browser trigger on boot ──────────────
-    _startup_cfg = load_cfg()
-    _startup_provider = (
-        _startup_cfg.get("models", {}).get(
-            _startup_cfg.get("active_model", ""), {}
-        ).get("provider")
-        or _startup_cfg.get("models", {}).get(
-            _startup_cfg.get("models", {}).get("primary", {}).get("provider", ""), {}
-        ).get("provider")
-        or (_startup_cfg.get("models", {}).get("primary") or {}).get("provider")
-        or _startup_cfg.get("provider", "")
-    )
-    if _startup_provider == "openai":
-        log.info("OpenAI provider detected — launching OAuth browser flow on startup")
-        threading.Thread(target=_openai_oauth_browser_flow, daemon=True).start()
-    # ───────────────────────────────────────────────────────────────────────
-
-    # Resume any interrupted tasks from last session
-    threading.Thread(target=task_resume_pending, daemon=True).start()
-
-    # Pre-warm faster-whisper model in background (avoids 150s cold-start on first voice message)
-    threading.Thread(target=_get_whisper_model, daemon=True).start()
+def _start_scheduler():
+    global _scheduler, HAS_APSCHEDULER
+    try:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        HAS_APSCHEDULER = True
+    except ImportError:
+        HAS_APSCHEDULER = False
 
-    # ── Scheduler ─────────────────────────────────────────────
     if HAS_APSCHEDULER:
-        scheduler = BackgroundScheduler(daemon=True)
+        from apscheduler.executors.pool import ThreadPoolExecutor as JobPool
+        from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+        scheduler = BackgroundScheduler(daemon=True, executors={
+            "default": JobPool(10), "alarms": JobPool(int(_alarm_cfg()["workers"]))})
+        scheduler.add_listener(_alarm_event, EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
         _scheduler = scheduler  # expose to alarm engine
         scheduler.add_job(run_heartbeat,              'interval', minutes=30, id='heartbeat',
                           next_run_time=datetime.now())
         scheduler.add_job(_sched_seo,                 'cron', hour=23, minute=0,  id='seo_nightly')
         scheduler.add_job(_sched_competitive_research,'cron', hour=0,  minute=0,  id='competitive')
         scheduler.add_job(_sched_daily_brief,         'cron', hour=9,  minute=0,  id='daily_brief')
+        scheduler.add_job(_sched_summaries,           'interval', minutes=15, id='summaries')
+        scheduler.add_job(_sched_backup,              'cron', minute=0, id='backup',
+                          hour=int(_backup_cfg()["hour"]))
+        scheduler.add_job(run_retention,              'cron', minute=30, id='retention',
+                          hour=int(load_cfg().get("retention", {}).get("hour", 4)))
         if god_mode_active():
             scheduler.add_job(_god_cycle, 'cron', hour=3, minute=0, id='god_cycle',
                               kwargs={"cfg": load_cfg()})
         scheduler.start()
         _reschedule_alarms()  # load alarms from DB on boot
-        log.info("APScheduler running — heartbeat:30m | SEO:11PM | research:12AM | brief:9AM | alarms:synced")
+        log.info("APScheduler running — heartbeat:30m | SEO:11PM | research:12AM | brief:9AM | retention | alarms:synced")
     else:
         log.warning("APScheduler not found — install with: pip3 install apscheduler")
         log.warning("Falling back to thread-based loops (no SEO/research/brief schedules)")
         threading.Thread(target=_heartbeat_loop, daemon=True).start()
         threading.Thread(target=_nightly_loop,   daemon=True).start()
 
+def _boot_background():
+    """Slow, non-essential startup work. Runs after the daemon reports ready."""
+    # ── OpenAI OAuth — browser trigger on boot (with --workers, the leader only) ──
+    _startup_cfg = load_cfg()
+    _startup_provider = (
+        _startup_cfg.get("models", {}).get(
+            _startup_cfg.get("active_model", ""), {}
+        ).get("provider")
+        or _startup_cfg.get("models", {}).get(
+            _startup_cfg.get("models", {}).get("primary", {}).get("provider", ""), {}
+        ).get("provider")
+        or (_startup_cfg.get("models", {}).get("primary") or {}).get("provider")
+        or _startup_cfg.get("provider", "")
+    )
+    if _startup_provider == "openai" and is_leader():
+        log.info("OpenAI provider detected — launching OAuth browser flow on startup")
+        threading.Thread(target=_openai_oauth_browser_flow, daemon=True).start()
+
+    # Pre-warm the transcription worker(s) (avoids 150s cold-start on first voice message).
+    # With --workers only the leader does — each whisper worker holds its own model.
+    if _startup_cfg.get("media", {}).get("whisper_prewarm", True) and is_leader():
+        threading.Thread(target=transcribe_pool().prewarm, daemon=True).start()
+
+    # Fork servers for python __RUN__ blocks — cheap, and the first run skips the spawn
+    if exec_pool() is not None:
+        threading.Thread(target=exec_pool().prewarm, daemon=True).start()
+    if skill_pool() is not None:
+        threading.Thread(target=skill_pool().prewarm, daemon=True).start()
+
+def run_boot():
+    _boot_stage("db",        _boot_db)
+    _boot_stage("dirs",      _boot_dirs)
+    _boot_stage("scheduler", _boot_scheduler)
+    _boot_stage("background", _boot_background)
+    took = round(time.time() - _BOOT["started"], 2)
+    if boot_ready(): log.info(f"Forge daemon ready in {took}s — {_BOOT['done']}")
+    else:            log.error(f"Forge daemon boot incomplete after {took}s — {_BOOT['errors']}")
+
+
+
+# ── PRE-FORK SERVER ───────────────────────────────────────
+# daemon.py --workers N: the parent migrates the DB, creates the directories (clearing
+# the last run's job spill files) and binds the port, then forks N workers that
+# accept() on the shared socket; the parent only supervises and restarts them, and
+# removes a dead worker's spill files. Workers share forge.db (WAL + busy timeout). Whichever holds
+# LEADER_LOCK runs the scheduler, background loops and task resume; the others
+# block on the lock and take over if the leader dies. Exec jobs are shared through
+# their files in JOBS_DIR; other in-process state — /events, metrics, traces, caches —
+# stays per worker, and /status lists it under worker.local.
+LEADER_LOCK = FORGE_CFG / "leader.lock"
+SERVER      = {"workers": 1, "slot": 0}
+_leader     = {"fd": None, "since": None}
+
+def leader_acquire(block: bool = False) -> bool:
+    import fcntl
+    fd = os.open(LEADER_LOCK, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | (0 if block else fcntl.LOCK_NB))
+    except BlockingIOError:
+        os.close(fd); return False
+    os.ftruncate(fd, 0); os.write(fd, str(os.getpid()).encode())
+    _leader.update(fd=fd, since=time.time())       # the kernel drops the lock when we exit
+    return True
+
+def is_leader() -> bool:
+    return _leader["fd"] is not None
+
+def leader_pid():
+    try: return int(LEADER_LOCK.read_text().strip() or 0) or None
+    except (OSError, ValueError): return None
+
+def _leader_start():
+    _start_scheduler()
+    threading.Thread(target=task_resume_pending, daemon=True).start()   # interrupted tasks
+    if SERVER["workers"] > 1:
+        threading.Thread(target=_alarm_sync_loop, name="alarm-sync", daemon=True).start()
+
+def _leader_standby():
+    leader_acquire(block=True)
+    log.warning(f"Worker pid {os.getpid()} took over as leader")
+    metric_inc("server.leader_takeovers")
+    _leader_start()
+
+def _alarm_sync_loop():
+    """Alarms edited through another worker only reach its (absent) scheduler — watch the
+    scheduling columns instead (the task text is read when the alarm fires)."""
+    seen = None
+    while True:
+        try:
+            c = _db()
+            sig = c.execute("SELECT group_concat(id||' '||cron||' '||enabled||' '||IFNULL(max_instances,'-')||' '||"
+                            "IFNULL(coalesce,'-')||' '||IFNULL(jitter_s,'-'), '|') "
+                            "FROM (SELECT * FROM alarms ORDER BY id)").fetchone()[0]
+            c.close()
+            if seen is not None and sig != seen:
+                log.info("Alarms changed in another worker — resyncing")
+                _reschedule_alarms()
+            seen = sig
+        except Exception as e:
+            log.error(f"Alarm sync: {e}")
+        time.sleep(float(load_cfg_cached().get("server", {}).get("alarm_sync_s", 5)))
+
+class _PreforkServer(ThreadingHTTPServer):
+    allow_reuse_address = True
+
+    def get_request(self):
+        conn, addr = self.socket.accept()   # non-blocking listener: losing the race raises EAGAIN
+        conn.setblocking(True)              # BSD accept() would hand us its O_NONBLOCK
+        return conn, addr
+
+def serve_prefork(n: int):
+    import signal
+    init_db(); migrate_db()                 # once, before any worker races for it
+    _prepare_dirs()
+    server = _PreforkServer(("0.0.0.0", PORT), Handler)
+    server.socket.setblocking(False)
+    SERVER["workers"], children, stopping = n, {}, []
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL); signal.signal(signal.SIGINT, signal.SIG_DFL)
+            SERVER["slot"] = slot
+            threading.Thread(target=run_boot, name="boot", daemon=True).start()
+            try: server.serve_forever()
+            finally: os._exit(0)
+        children[pid] = (slot, time.time())
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+
+    signal.signal(signal.SIGTERM, stop); signal.signal(signal.SIGINT, stop)
+    for slot in range(n): spawn(slot)
+    log.info(f"Forge daemon listening on port {PORT} (PID {os.getpid()}) — {n} workers {sorted(children)}")
+    while children:
+        try: pid, status = os.wait()
+        except ChildProcessError: break
+        slot, started = children.pop(pid, (None, 0))
+        for f in JOBS_DIR.glob(f"{pid}-*"): f.unlink(missing_ok=True)   # its exec jobs died with it
+        if slot is None or stopping: continue
+        log.warning(f"Worker {slot} (pid {pid}) exited with {os.waitstatus_to_exitcode(status)} — restarting")
+        if time.time() - started < 5: time.sleep(5)      # don't spin on a crash at boot
+        if not stopping: spawn(slot)
+    server.server_close()
+
+# Worker process entry points: python3 daemon.py --<mode>
+WORKER_MODES = {
+    "--transcribe-worker": _transcribe_worker_main,
+    "--exec-worker":       _exec_worker_main,
+    "--skill-worker":      _skill_worker_main,
+}
+CLI_COMMANDS = {"--backup": _backup_cli, "--verify": _backup_cli, "--restore": _backup_cli,
+                "--vacuum": _vacuum_cli, "--worker": task_worker_main}
+
+# ── MAIN ──────────────────────────────────────────────────
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in WORKER_MODES:
+        sys.exit(WORKER_MODES[sys.argv[1]]())
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        init_db(); migrate_db()
+        sys.exit(CLI_COMMANDS[sys.argv[1]]())
+
     import signal
     signal.signal(signal.SIGTTOU, signal.SIG_IGN)
     signal.signal(signal.SIGTTIN, signal.SIG_IGN)
     signal.signal(signal.SIGHUP,  signal.SIG_IGN)
+    n_workers = int(os.environ.get("FORGE_WORKERS", 1))
+    if "--workers" in sys.argv:
+        n_workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    if n_workers > 1:
+        sys.exit(serve_prefork(n_workers))
     ThreadingHTTPServer.allow_reuse_address = True
     server = ThreadingHTTPServer(("0.0.0.0", PORT), Handler)
-    log.info(f"Forge daemon ready on port {PORT} (PID {os.getpid()})")
+    threading.Thread(target=run_boot, name="boot", daemon=True).start()
+    log.info(f"Forge daemon listening on port {PORT} (PID {os.getpid()}) — booting")
     server.serve_forever()
 
 
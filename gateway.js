@@ -10,6 +10,7 @@ const https = require("https");
 const fs    = require("fs");
 const path  = require("path");
 const os    = require("os");
+const crypto = require("crypto");
 
 const FORGE_CFG   = path.join(os.homedir(), ".forge");
 const DAEMON_URL  = "http://127.0.0.1:2079";
@@ -33,9 +34,13 @@ function log(msg) {
 }
 
 // ── Daemon proxy ─────────────────────────────────────────
-function daemonGet(ep) {
+// Every daemon call carries a trace id so /traces/{id} on the daemon lines up with gateway logs
+const TRACE_HEADER = "x-forge-trace-id";
+function newTraceId() { return crypto.randomBytes(8).toString("hex"); }
+
+function daemonGet(ep, traceId) {
   return new Promise(res => {
-    http.get(DAEMON_URL + ep, r => {
+    http.get(DAEMON_URL + ep, { headers: { [TRACE_HEADER]: traceId || newTraceId() } }, r => {
       let d = "";
       r.on("data", c => d += c);
       r.on("end", () => { try { res(JSON.parse(d)); } catch { res({}); } });
@@ -43,13 +48,14 @@ function daemonGet(ep) {
   });
 }
 
-function daemonPost(ep, body) {
+function daemonPost(ep, body, traceId) {
   return new Promise(res => {
     const p = JSON.stringify(body);
     const req = http.request({
       hostname: "127.0.0.1", port: 2079,
       path: ep, method: "POST",
-      headers: { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(p) }
+      headers: { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(p),
+                 [TRACE_HEADER]: traceId || newTraceId() }
     }, r => {
       let d = "";
       r.on("data", c => d += c);
@@ -61,13 +67,14 @@ function daemonPost(ep, body) {
 }
 
 // Daemon POST with extended timeout — used for media processing
-function daemonPostMedia(ep, body) {
+function daemonPostMedia(ep, body, traceId) {
   return new Promise(res => {
     const p = JSON.stringify(body);
     const req = http.request({
       hostname: "127.0.0.1", port: 2079,
       path: ep, method: "POST",
-      headers: { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(p) }
+      headers: { "Content-Type": "application/json", "Content-Length": Buffer.byteLength(p),
+                 [TRACE_HEADER]: traceId || newTraceId() }
     }, r => {
       let d = "";
       r.on("data", c => d += c);
@@ -79,6 +86,14 @@ function daemonPostMedia(ep, body) {
   });
 }
 
+// Ask the daemon for a cached media result by Telegram file_unique_id before downloading.
+// Returns the daemon's response on a hit, null on a miss.
+async function mediaFromCache(ep, fileUniqueId, extra = {}) {
+  if (!fileUniqueId) return null;
+  const resp = await daemonPost(ep, { file_unique_id: fileUniqueId, ...extra });
+  return resp && resp.cached ? resp : null;
+}
+
 // Download a Telegram file by file_id — returns Buffer
 async function telegramDownload(fileId) {
   const meta = await telegramCall("getFile", { file_id: fileId });
@@ -108,7 +123,7 @@ const gateway = http.createServer(async (req, res) => {
   // CORS
   res.setHeader("Access-Control-Allow-Origin", "*");
   res.setHeader("Access-Control-Allow-Methods", "GET,POST,OPTIONS");
-  res.setHeader("Access-Control-Allow-Headers", "Content-Type");
+  res.setHeader("Access-Control-Allow-Headers", "Content-Type, X-Forge-Trace-Id");
   if (method === "OPTIONS") { res.writeHead(200); res.end(); return; }
 
   // Dashboard
@@ -245,9 +260,11 @@ const gateway = http.createServer(async (req, res) => {
   // API proxy to daemon
   if (url.pathname.startsWith("/api/")) {
     const daemonPath = url.pathname.slice(4) + url.search; // strip /api
+    const traceId    = req.headers[TRACE_HEADER] || newTraceId();
+    res.setHeader(TRACE_HEADER, traceId);
 
     if (method === "GET") {
-      const data = await daemonGet(daemonPath);
+      const data = await daemonGet(daemonPath, traceId);
       res.setHeader("Content-Type", "application/json");
       res.writeHead(200);
       res.end(JSON.stringify(data));
@@ -260,7 +277,7 @@ const gateway = http.createServer(async (req, res) => {
       req.on("end", async () => {
         try {
           const parsed = JSON.parse(body || "{}");
-          const data   = await daemonPost(daemonPath, parsed);
+          const data   = await daemonPost(daemonPath, parsed, traceId);
           res.setHeader("Content-Type", "application/json");
           res.writeHead(200);
           res.end(JSON.stringify(data));
@@ -360,13 +377,17 @@ async function handleTelegram(msg) {
 
   // ── Media: photo ──────────────────────────────────────────
   if (msg.photo) {
-    const fileId  = msg.photo[msg.photo.length - 1].file_id; // highest res
+    const photo   = msg.photo[msg.photo.length - 1]; // highest res
     const caption = (msg.caption || "").trim();
     log(`Telegram ← [photo] caption: ${caption.slice(0, 40)}`);
     await telegramCall("sendChatAction", { chat_id: chatId, action: "typing" });
-    const buf = await telegramDownload(fileId);
-    if (!buf) { await tgSend(chatId, "Could not download photo."); return; }
-    const resp = await daemonPostMedia("/media/vision", { data: buf.toString("base64"), caption });
+    let resp = await mediaFromCache("/media/vision", photo.file_unique_id, { caption });
+    if (!resp) {
+      const buf = await telegramDownload(photo.file_id);
+      if (!buf) { await tgSend(chatId, "Could not download photo."); return; }
+      resp = await daemonPostMedia("/media/vision", { data: buf.toString("base64"), caption,
+                                                      file_unique_id: photo.file_unique_id });
+    }
     await tgSend(chatId, resp.result || resp.error || "Vision processing failed.");
     return;
   }
@@ -375,9 +396,13 @@ async function handleTelegram(msg) {
   if (msg.voice) {
     log(`Telegram ← [voice] ${msg.voice.duration}s`);
     await telegramCall("sendChatAction", { chat_id: chatId, action: "typing" });
-    const buf = await telegramDownload(msg.voice.file_id);
-    if (!buf) { await tgSend(chatId, "Could not download voice message."); return; }
-    const resp = await daemonPostMedia("/media/transcribe", { data: buf.toString("base64") });
+    let resp = await mediaFromCache("/media/transcribe", msg.voice.file_unique_id);
+    if (!resp) {
+      const buf = await telegramDownload(msg.voice.file_id);
+      if (!buf) { await tgSend(chatId, "Could not download voice message."); return; }
+      resp = await daemonPostMedia("/media/transcribe", { data: buf.toString("base64"),
+                                                          file_unique_id: msg.voice.file_unique_id });
+    }
     const transcript = resp.transcript || "";
     if (!transcript) { await tgSend(chatId, "Could not transcribe — add an OpenAI key or install faster-whisper."); return; }
     log(`Voice transcript: ${transcript.slice(0, 80)}`);
@@ -394,9 +419,13 @@ async function handleTelegram(msg) {
     log(`Telegram ← [video] ${msg.video.duration}s`);
     await tgSend(chatId, "⏳ Processing video...");
     await telegramCall("sendChatAction", { chat_id: chatId, action: "upload_video" });
-    const buf = await telegramDownload(msg.video.file_id);
-    if (!buf) { await tgSend(chatId, "Could not download video."); return; }
-    const resp = await daemonPostMedia("/media/video", { data: buf.toString("base64"), caption });
+    let resp = await mediaFromCache("/media/video", msg.video.file_unique_id, { caption });
+    if (!resp) {
+      const buf = await telegramDownload(msg.video.file_id);
+      if (!buf) { await tgSend(chatId, "Could not download video."); return; }
+      resp = await daemonPostMedia("/media/video", { data: buf.toString("base64"), caption,
+                                                     file_unique_id: msg.video.file_unique_id });
+    }
     await tgSend(chatId, resp.result || resp.error || "Video processing failed.");
     return;
   }
@@ -405,9 +434,13 @@ async function handleTelegram(msg) {
   if (msg.document && (msg.document.mime_type || "").startsWith("audio/")) {
     log(`Telegram ← [audio doc] ${msg.document.mime_type}`);
     await telegramCall("sendChatAction", { chat_id: chatId, action: "typing" });
-    const buf = await telegramDownload(msg.document.file_id);
-    if (!buf) { await tgSend(chatId, "Could not download audio file."); return; }
-    const resp = await daemonPostMedia("/media/transcribe", { data: buf.toString("base64") });
+    let resp = await mediaFromCache("/media/transcribe", msg.document.file_unique_id);
+    if (!resp) {
+      const buf = await telegramDownload(msg.document.file_id);
+      if (!buf) { await tgSend(chatId, "Could not download audio file."); return; }
+      resp = await daemonPostMedia("/media/transcribe", { data: buf.toString("base64"),
+                                                          file_unique_id: msg.document.file_unique_id });
+    }
     const transcript = resp.transcript || "";
     if (!transcript) { await tgSend(chatId, "Could not transcribe audio file."); return; }
     await tgSend(chatId, `🎤 _${transcript}_`);